@@ -1,16 +1,115 @@
 from typing import Optional
-from pydantic import ConfigDict
+from pydantic import ConfigDict, field_validator
 from pydantic_settings import BaseSettings
 
+# Максимальный размер страницы, который принимает Clockify API
+CLOCKIFY_MAX_PAGE_SIZE = 5000
+
+# Максимальный промежуток между объединяемыми блоками - сутки
+MAX_MERGE_GAP_MINUTES = 1440
+
+# Реализации группировки записей по дням
+TIMELINE_ENGINES = ("python", "numpy")
+
 
 class Settings(BaseSettings):
     clockify_api_key: str
     clockify_workspace_id: str
     clockify_user_id: str
+    clockify_base_url: str = "https://api.clockify.me/api/v1"  # Можно направить на локальную замену API
     max_period_days: int = 31
     timezone: str = "UTC"
     timezone_offset: int = 0  # Смещение в часах от UTC (например, 3 для GMT+3)
     cache_ttl_minutes: int = 5
+    warm_up_on_startup: bool = True  # Соединение с Clockify и каталог проектов при старте
+    warm_up_timeout: float = 10.0
+    admin_token: Optional[str] = None  # Если задан, служебные endpoints (/stats) требуют X-Admin-Token
+    server_timing_enabled: bool = True  # Заголовок Server-Timing с фазами обработки запроса
+    
+    # Профилирование отдельных запросов (?profile=pstats|collapsed или X-Profile), только при заданном ADMIN_TOKEN
+    profiling_enabled: bool = False
+    profiling_output_dir: Optional[str] = None  # Если задан, профили пишутся сюда, а не отдаются в ответе
+    profiling_sample_interval_ms: float = 5.0  # Интервал семплирования стека для формата collapsed
+    
+    # Пул HTTP соединений к Clockify API
+    http_timeout: float = 30.0
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    http2_enabled: bool = False  # Требует установленного пакета h2
+    
+    # Лимит запросов к Clockify (документированный лимит - 50 запросов в секунду на ключ) и повторы
+    clockify_rate_limit_per_second: float = 50.0
+    clockify_rate_limit_burst: int = 50
+    clockify_max_retries: int = 3
+    clockify_retry_base_delay: float = 0.5
+    clockify_retry_max_delay: float = 10.0  # Больший Retry-After не ждем, а сразу возвращаем ошибку
+    
+    # Постраничная загрузка временных записей
+    clockify_page_size: int = 1000
+    # Общий лимит параллельных запросов к API на один вызов get_time_entries (окна и страницы вместе),
+    # не больше http_max_connections
+    clockify_request_concurrency: int = 4
+    
+    # Командная шкала (/team-timeline): общий на весь запрос лимит параллельных запросов к API
+    # (все пользователи, окна и страницы вместе, не больше http_max_connections) и число пользователей
+    team_request_concurrency: int = 8
+    team_max_users: int = 50
+    
+    # Разбиение периода на окна, загружаемые параллельно
+    time_entries_shard_days: int = 7
+    
+    # Локальное хранилище временных записей (SQLite)
+    entry_store_enabled: bool = False
+    entry_store_path: str = "clockify_entries.db"
+    entry_store_lookback_days: int = 3  # Сколько дней до watermark перезагружать ради правок
+    
+    # Кэш посчитанных закрытых дней
+    day_cache_enabled: bool = True
+    day_cache_max_days: int = 4096  # LRU: сколько дней (с учетом пользователей и проектов) держать
+    day_cache_closed_after_days: int = 1  # День закрыт, если он не позже сегодня минус N дней
+    
+    # Cache-Control ответов /daily-timeline (вместе с ETag); для периодов из одних закрытых дней
+    # можно разрешить кэширование посредниками, например "public, max-age=86400"
+    timeline_cache_control: str = "private, no-cache"
+    timeline_cache_control_closed: Optional[str] = None
+    
+    # Объединение соседних блоков: промежуток по умолчанию (запрос может передать свой merge_gap_minutes)
+    # и удаление повторяющихся описаний внутри объединенного блока
+    merge_gap_minutes: int = 5
+    merge_dedupe_descriptions: bool = False
+    
+    # Группировка записей по дням: "python" или "numpy" (векторная, требует установленного numpy)
+    timeline_engine: str = "python"
+    
+    @field_validator('clockify_page_size')
+    @classmethod
+    def validate_page_size(cls, v):
+        if not 1 <= v <= CLOCKIFY_MAX_PAGE_SIZE:
+            raise ValueError(f'clockify_page_size must be between 1 and {CLOCKIFY_MAX_PAGE_SIZE}')
+        return v
+    
+    @field_validator('clockify_base_url')
+    @classmethod
+    def validate_base_url(cls, v):
+        if not v.startswith(('http://', 'https://')):
+            raise ValueError('clockify_base_url must start with http:// or https://')
+        return v.rstrip('/')
+    
+    @field_validator('merge_gap_minutes')
+    @classmethod
+    def validate_merge_gap(cls, v):
+        if not 0 <= v <= MAX_MERGE_GAP_MINUTES:
+            raise ValueError(f'merge_gap_minutes must be between 0 and {MAX_MERGE_GAP_MINUTES}')
+        return v
+    
+    @field_validator('timeline_engine')
+    @classmethod
+    def validate_timeline_engine(cls, v):
+        v = v.lower()
+        if v not in TIMELINE_ENGINES:
+            raise ValueError(f'timeline_engine must be one of: {", ".join(TIMELINE_ENGINES)}')
+        return v
     
     model_config = ConfigDict(
         env_file=".env",
@@ -0,0 +1,240 @@
+"""Метрики в текстовом формате Prometheus без внешних зависимостей.
+
+Счетчики и гистограммы обновляются на горячем пути, поэтому запись - это поиск дочерней серии
+в словаре по кортежу меток, bisect по границам корзин и несколько сложений (единицы микросекунд).
+Блокировок нет: сервис однопоточный (asyncio). Счетчики, которые и так ведут кэши и лимитер,
+не дублируются - их отдают коллекторы в момент запроса /metrics.
+"""
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# (имя, тип, описание, [(метки, значение)]) - то, что отдает коллектор при сборе
+Sample = Tuple[Dict[str, str], float]
+MetricFamily = Tuple[str, str, str, List[Sample]]
+
+# Границы по умолчанию: от 5 мс до 30 с
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Последняя корзина - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> "_Timer":
+        """with histogram.labels(...).time(): ... - записывает длительность блока в секундах"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(perf_counter() - self._started)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Серия с заданными значениями меток (создается при первом обращении)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def clear(self):
+        self._children.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса и коллекторов, вызываемых при сборе"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """Коллектор отдает готовые значения (например, счетчики кэшей) в момент запроса /metrics"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "clockify_agent_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+REQUESTS = registry.counter(
+    "clockify_agent_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+UPSTREAM_DURATION = registry.histogram(
+    "clockify_agent_upstream_request_duration_seconds", "Clockify API call latency by endpoint", ("endpoint",)
+)
+UPSTREAM_RESPONSES = registry.counter(
+    "clockify_agent_upstream_responses_total", "Clockify API responses by endpoint and status", ("endpoint", "status")
+)
+ENTRIES_PER_REQUEST = registry.histogram(
+    "clockify_agent_entries_per_request", "Time entries ingested per timeline request", ("kind",),
+    buckets=(10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+)
+PHASE_DURATION = registry.histogram(
+    "clockify_agent_phase_duration_seconds", "Time spent in timeline phases (fetch, grouping, summary, serialization)",
+    ("phase",), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: латентность и коды ответов по шаблону маршрута (/api/v1/daily-timeline, а не путь с параметрами)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # FastAPI кладет найденный маршрут в scope; несуществующие пути сводятся в одну серию
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_DURATION.labels(method, path).observe(perf_counter() - started)
+            REQUESTS.labels(method, path, status).inc()
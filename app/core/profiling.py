@@ -0,0 +1,189 @@
+"""Профилирование отдельного запроса по флагу (X-Profile или ?profile=), выключено по умолчанию.
+
+pstats - детерминированный cProfile, файл открывается через python -m pstats или snakeviz.
+collapsed - семплирование стека потока event loop из фонового потока, формат "a;b;c 12"
+для flamegraph.pl и speedscope. Оба профилировщика видят весь поток, поэтому в профиль
+попадают и конкурентные запросы; одновременно профилируется не больше одного запроса.
+"""
+import cProfile
+import marshal
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import structlog
+from fastapi import Header, HTTPException, Query, Request, Response
+
+from app.core.config import settings
+from app.core.security import verify_admin_token
+
+logger = structlog.get_logger()
+
+PROFILE_FORMATS = ("pstats", "collapsed")
+
+_MEDIA_TYPES = {"pstats": "application/octet-stream", "collapsed": "text/plain"}
+
+# Профилируемый сейчас запрос: cProfile и семплер рассчитаны на один на поток
+_active = False
+
+
+def _profiling_in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={
+            "error": "Profiling in progress",
+            "message": "Another request is being profiled, try again later",
+            "code": "PROFILING_IN_PROGRESS"
+        }
+    )
+
+
+class StackSampler:
+    """Фоновый поток, который с заданным интервалом снимает стек целевого потока"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> bytes:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()).encode()
+
+
+class RequestProfiler:
+    """with profiler: ... профилирует блок; неактивный профилировщик ничего не делает"""
+
+    def __init__(self, profile_format: Optional[str] = None, name: str = "request"):
+        self.format = profile_format
+        self.name = name
+        self.artifact: Optional[bytes] = None
+        self.filename: Optional[str] = None
+        self.path: Optional[str] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+
+    @property
+    def active(self) -> bool:
+        return self.format is not None
+
+    def __enter__(self):
+        global _active
+        if not self.active:
+            return self
+        if _active:
+            raise _profiling_in_progress()
+        _active = True
+        if self.format == "pstats":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = StackSampler(threading.get_ident(), settings.profiling_sample_interval_ms / 1000)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        if not self.active:
+            return
+        try:
+            if self._profiler is not None:
+                self._profiler.disable()
+                self._profiler.create_stats()
+                self.artifact = marshal.dumps(self._profiler.stats)
+            else:
+                self._sampler.stop()
+                self.artifact = self._sampler.collapsed()
+        finally:
+            _active = False
+
+        self.filename = f"{self.name}-{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(3)}.{self.format}"
+        # Профиль упавшего запроса тоже сохраняется, если задан каталог
+        if settings.profiling_output_dir:
+            os.makedirs(settings.profiling_output_dir, exist_ok=True)
+            self.path = os.path.join(settings.profiling_output_dir, self.filename)
+            with open(self.path, "wb") as file:
+                file.write(self.artifact)
+        logger.info("Request profiled", name=self.name, format=self.format, path=self.path, size=len(self.artifact))
+
+    def response(self, response: Response) -> Response:
+        """Ответ с профилем: файл для скачивания или обычный ответ со ссылкой на записанный файл"""
+        if not self.active or self.artifact is None:
+            return response
+        if self.path is not None:
+            response.headers["X-Profile-File"] = self.filename
+            return response
+        return Response(
+            self.artifact,
+            media_type=_MEDIA_TYPES[self.format],
+            headers={"Content-Disposition": f'attachment; filename="{self.filename}"'}
+        )
+
+
+def get_request_profiler(
+    request: Request,
+    profile: Optional[str] = Query(None, pattern="^(pstats|collapsed)$",
+                                   description="Profile this request (requires PROFILING_ENABLED and admin token): pstats or collapsed"),
+    x_profile: Optional[str] = Header(None)
+) -> RequestProfiler:
+    """Dependency: профилировщик запроса; без флага - неактивный"""
+    profile_format = profile or x_profile
+    name = request.url.path.rstrip("/").rsplit("/", 1)[-1] or "request"
+    if profile_format is None:
+        return RequestProfiler(name=name)
+
+    if not settings.profiling_enabled:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "Forbidden",
+                "message": "Request profiling is disabled (set PROFILING_ENABLED=true)",
+                "code": "PROFILING_DISABLED"
+            }
+        )
+    # Профиль раскрывает внутренности сервиса, поэтому без ADMIN_TOKEN профилирование не открывается
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "Forbidden",
+                "message": "Request profiling requires ADMIN_TOKEN to be configured",
+                "code": "ADMIN_TOKEN_NOT_CONFIGURED"
+            }
+        )
+    verify_admin_token(request.headers.get("X-Admin-Token"))
+    if profile_format not in PROFILE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Invalid profile format",
+                "message": f"Profile format must be one of: {', '.join(PROFILE_FORMATS)}",
+                "code": "INVALID_PROFILE_FORMAT"
+            }
+        )
+    if _active:
+        raise _profiling_in_progress()
+    return RequestProfiler(profile_format, name)
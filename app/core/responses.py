@@ -0,0 +1,21 @@
+from typing import Any
+import orjson
+import pydantic_core
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.timing import phase
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON ответ, сериализуемый один раз без повторной валидации через response_model.
+
+    Pydantic модели сериализуются ядром pydantic (быстрее, чем orjson поверх model_dump),
+    словари и списки - через orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with phase("serialization"):
+            if isinstance(content, BaseModel):
+                return pydantic_core.to_json(content)
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,21 @@
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Dependency для служебных endpoints: если задан ADMIN_TOKEN, требует его в заголовке X-Admin-Token"""
+    if not settings.admin_token:
+        return
+    
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "Forbidden",
+                "message": "Valid X-Admin-Token header is required",
+                "code": "ADMIN_TOKEN_REQUIRED"
+            }
+        )
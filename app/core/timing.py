@@ -0,0 +1,103 @@
+"""Замер фаз обработки запроса: заголовок Server-Timing, поля в логе и гистограмма фаз в /metrics.
+
+Middleware кладет PhaseTimer запроса в ContextVar; код сервиса отмечает фазы через
+with phase("grouping"): ... и не знает, есть ли активный запрос. Задачи, созданные внутри
+запроса (объединение одинаковых запросов, параллельная загрузка окон), наследуют контекст
+и пишут в тот же таймер.
+"""
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Optional
+
+import structlog
+
+from app.core.metrics import PHASE_DURATION
+
+logger = structlog.get_logger()
+
+
+class PhaseTimer:
+    """Длительности фаз одного запроса (секунды); повторные фазы суммируются"""
+
+    __slots__ = ("started", "phases")
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        """Значение заголовка Server-Timing: fetch;dur=12.3, grouping;dur=4.5, total;dur=20.1"""
+        metrics = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def log_fields(self) -> Dict[str, float]:
+        return {f"{name}_ms": round(seconds * 1000, 2) for name, seconds in self.phases.items()}
+
+
+_current_timer: ContextVar[Optional[PhaseTimer]] = ContextVar("phase_timer", default=None)
+
+
+def current_timer() -> Optional[PhaseTimer]:
+    return _current_timer.get()
+
+
+class phase:
+    """with phase("fetch"): ... - время блока попадает в таймер текущего запроса и в метрики"""
+
+    __slots__ = ("name", "_histogram", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._histogram = PHASE_DURATION.labels(name)
+
+    def __enter__(self):
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter() - self._started
+        self._histogram.observe(elapsed)
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.add(self.name, elapsed)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware: таймер фаз на каждый запрос, заголовок Server-Timing и лог фаз.
+
+    Заголовок отправляется вместе с началом ответа, поэтому сериализация обычного JSON ответа
+    в нем есть, а у потоковых ответов - только фазы до первой строки.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = PhaseTimer()
+        token = _current_timer.set(timer)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = timer.server_timing(perf_counter() - timer.started).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timer.reset(token)
+            # Логируем только запросы с отмеченными фазами, а не /health и /metrics
+            if timer.phases:
+                logger.info("Request phases", path=scope["path"], status=status,
+                            total_ms=round((perf_counter() - timer.started) * 1000, 2), **timer.log_fields())
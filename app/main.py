@@ -1,10 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import structlog
 
 from app.routers import timeline
 from app.core.config import settings
+from app.core.security import verify_admin_token
+from app.core.metrics import registry, MetricsMiddleware
+from app.core.timing import ServerTimingMiddleware
+from app.services.http_client import http_client_manager
+from app.services.project_catalog import get_project_catalog_stats
+from app.services.timeline_service import timeline_requests
+from app.services.entry_store import get_entry_store, close_entry_store
+from app.services.day_cache import day_result_cache
+from app.services.rate_limiter import upstream_rate_limiter
 
 # Configure structured logging
 structlog.configure(
@@ -30,8 +40,19 @@ logger = structlog.get_logger()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting Clockify Agent")
+    await http_client_manager.start()
+    
+    # Сервис создается один раз и переиспользуется всеми запросами
+    timeline_service = timeline.get_timeline_service()
+    if settings.warm_up_on_startup:
+        try:
+            await asyncio.wait_for(timeline_service.warm_up(), timeout=settings.warm_up_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Warm-up timed out", timeout=settings.warm_up_timeout)
     yield
     logger.info("Shutting down Clockify Agent")
+    await http_client_manager.close()
+    close_entry_store()
 
 app = FastAPI(
     title="Clockify Agent",
@@ -49,6 +70,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Латентность и коды ответов по маршрутам для /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Фазы обработки запроса в заголовке Server-Timing и в логе
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware)
+
 # Include routers
 app.include_router(timeline.router, prefix="/api/v1", tags=["timeline"])
 
@@ -59,3 +87,57 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "clockify-agent"}
+
+@app.get("/stats", dependencies=[Depends(verify_admin_token)])
+async def get_stats():
+    """Статистика для тюнинга производительности; открыта, пока не задан ADMIN_TOKEN"""
+    entry_store = get_entry_store()
+    return {
+        "http_pool": http_client_manager.get_pool_stats(),
+        "rate_limiter": upstream_rate_limiter.get_stats(),
+        "entry_store": entry_store.get_stats() if entry_store else None,
+        "project_catalog": get_project_catalog_stats(),
+        "day_cache": day_result_cache.get_stats(),
+        "timeline_coalescing": timeline_requests.get_stats()
+    }
+
+def _collect_cache_metrics():
+    """Счетчики, которые уже ведут кэши, лимитер и объединение запросов, - в формате метрик"""
+    day_cache = day_result_cache.get_stats()
+    catalogs = get_project_catalog_stats()
+    coalescing = timeline_requests.get_stats()
+    limiter = upstream_rate_limiter.get_stats()
+    pool = http_client_manager.get_pool_stats()
+    return [
+        ("clockify_agent_day_cache_hits_total", "counter", "Day result cache hits",
+         [({}, day_cache["hits"])]),
+        ("clockify_agent_day_cache_misses_total", "counter", "Day result cache misses",
+         [({}, day_cache["misses"])]),
+        ("clockify_agent_day_cache_evictions_total", "counter", "Day result cache evictions",
+         [({}, day_cache["evictions"])]),
+        ("clockify_agent_day_cache_size", "gauge", "Days held in the result cache",
+         [({}, day_cache["size"])]),
+        ("clockify_agent_project_catalog_hits_total", "counter", "Project catalog lookups served from memory",
+         [({"workspace": ws}, stats["hits"]) for ws, stats in catalogs.items()]),
+        ("clockify_agent_project_catalog_misses_total", "counter", "Project catalog lookups that needed a load",
+         [({"workspace": ws}, stats["misses"]) for ws, stats in catalogs.items()]),
+        ("clockify_agent_timeline_requests_executed_total", "counter", "Timeline builds actually executed",
+         [({}, coalescing["executed"])]),
+        ("clockify_agent_timeline_requests_coalesced_total", "counter", "Timeline requests served by an in-flight build",
+         [({}, coalescing["coalesced"])]),
+        ("clockify_agent_rate_limiter_wait_seconds_total", "counter", "Time spent waiting for the upstream rate limit",
+         [({}, limiter["total_wait_seconds"])]),
+        ("clockify_agent_upstream_retries_total", "counter", "Clockify requests retried after 429/5xx",
+         [({}, limiter["retries"])]),
+        ("clockify_agent_http_pool_connections", "gauge", "Open connections to Clockify API",
+         [({"state": "in_use"}, pool["in_use"]), ({"state": "idle"}, pool["idle"])])
+    ]
+
+
+registry.register_collector(_collect_cache_metrics)
+
+
+@app.get("/metrics", dependencies=[Depends(verify_admin_token)])
+async def get_metrics():
+    """Метрики в текстовом формате Prometheus; доступ как у /stats"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,38 +1,90 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from datetime import datetime, date
-from typing import Optional
+from typing import AsyncIterator, Optional, Union
+import json
 import structlog
 
 from app.services.timeline_service import TimelineService
-from app.schemas.response import DailyTimelineResponse, ProjectTimelineResponse
+from app.services.clockify_client import ClockifyUnavailableError
+from app.schemas.response import (
+    DailyTimelineResponse, ProjectTimelineResponse, TeamTimelineResponse,
+    DailyTimelineDayLine, DailyTimelineSummaryLine
+)
 from app.schemas.request import ErrorResponse
 from app.utils.validators import validate_date_range
-from app.core.config import settings
+from app.utils.etag import parse_if_none_match
+from app.core.config import settings, MAX_MERGE_GAP_MINUTES
+from app.core.responses import FastJSONResponse
+from app.core.profiling import RequestProfiler, get_request_profiler
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Сервис общий для процесса: кэши и каталог проектов живут между запросами
+_timeline_service: Optional[TimelineService] = None
+
 def get_timeline_service() -> TimelineService:
-    """Dependency для получения сервиса временной шкалы"""
-    return TimelineService()
+    """Dependency для получения общего сервиса временной шкалы (создается один раз)"""
+    global _timeline_service
+    if _timeline_service is None:
+        _timeline_service = TimelineService()
+    return _timeline_service
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _wants_ndjson(request: Request, stream: Optional[str]) -> bool:
+    """Потоковый режим включается параметром ?stream=ndjson или заголовком Accept"""
+    return stream == "ndjson" or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+async def _ndjson_lines(
+    first_line: Union[DailyTimelineDayLine, DailyTimelineSummaryLine],
+    lines: AsyncIterator[Union[DailyTimelineDayLine, DailyTimelineSummaryLine]]
+) -> AsyncIterator[str]:
+    """Сериализует строки потока; ошибка после начала ответа передается последней строкой"""
+    try:
+        yield first_line.model_dump_json() + "\n"
+        async for line in lines:
+            yield line.model_dump_json() + "\n"
+    except Exception as e:
+        # Статус 200 уже отправлен - сообщаем об ошибке в самом потоке
+        logger.error("Error while streaming daily timeline", error=str(e))
+        code = "UPSTREAM_UNAVAILABLE" if isinstance(e, ClockifyUnavailableError) else "STREAM_ERROR"
+        yield json.dumps({"type": "error", "error": "Stream interrupted", "message": str(e), "code": code}) + "\n"
+    finally:
+        await lines.aclose()
 
+# response_model не задаем: сервис уже отдает готовую модель, повторная валидация и jsonable_encoder
+# обходятся дороже самой сериализации. Схема ответа в OpenAPI задается через responses
 @router.get(
     "/daily-timeline",
-    response_model=DailyTimelineResponse,
+    response_model=None,
+    response_class=FastJSONResponse,
+    responses={200: {"model": DailyTimelineResponse}, 304: {"description": "Entries not changed since If-None-Match ETag"}},
     summary="Get daily timeline",
-    description="Get timeline data grouped by days and projects for a specified date range"
+    description="Get timeline data grouped by days and projects for a specified date range. "
+                "With ?stream=ndjson or Accept: application/x-ndjson days are streamed as NDJSON lines, "
+                "followed by a summary line. Responses carry an ETag; If-None-Match returns 304 when "
+                "the entries have not changed"
 )
 async def get_daily_timeline(
+    request: Request,
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
     end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
-    timeline_service: TimelineService = Depends(get_timeline_service)
+    stream: Optional[str] = Query(None, pattern="^ndjson$", description="Set to 'ndjson' to stream days as they are ready"),
+    merge_gap_minutes: Optional[int] = Query(None, ge=0, le=MAX_MERGE_GAP_MINUTES, description="Merge blocks separated by at most this many minutes (default MERGE_GAP_MINUTES)"),
+    timeline_service: TimelineService = Depends(get_timeline_service),
+    profiler: RequestProfiler = Depends(get_request_profiler)
 ):
     """
     Получает ежедневную временную шкалу за указанный период.
     
     - **start_date**: Начальная дата в формате YYYY-MM-DD
     - **end_date**: Конечная дата в формате YYYY-MM-DD
-    - **max_period**: Максимальный период 31 день
+    - **stream**: `ndjson` - отдавать дни потоком по мере готовности (то же, что Accept: application/x-ndjson)
+    - **merge_gap_minutes**: Промежуток объединения соседних блоков в минутах (по умолчанию MERGE_GAP_MINUTES)
+    - **profile**: `pstats` или `collapsed` - вернуть профиль запроса (PROFILING_ENABLED и admin token)
+    - **max_period**: Максимальный период задается MAX_PERIOD_DAYS (по умолчанию 31 день)
     
     Возвращает данные, сгруппированные по дням и проектам с временными блоками.
     """
@@ -56,13 +108,38 @@ async def get_daily_timeline(
         logger.info("Processing daily timeline request", 
                    start_date=start_date, end_date=end_date)
         
-        # Получение данных
-        result = await timeline_service.get_daily_timeline(start, end)
+        if _wants_ndjson(request, stream):
+            lines = timeline_service.stream_daily_timeline(start, end, merge_gap_minutes)
+            # Первая строка считается до отправки заголовков: ранние ошибки получают обычный статус
+            first_line = await lines.__anext__()
+            return StreamingResponse(_ndjson_lines(first_line, lines), media_type=NDJSON_MEDIA_TYPE)
+        
+        # Получение данных; с ?profile= профилируется вместе с сериализацией
+        with profiler:
+            etag, result = await timeline_service.get_daily_timeline_conditional(
+                start, end, merge_gap_minutes, if_none_match=parse_if_none_match(request.headers.get("if-none-match"))
+            )
+            headers = {"ETag": etag}
+            cache_control = timeline_service.cache_control(end)
+            if cache_control:
+                headers["Cache-Control"] = cache_control
+            # Данные не менялись: группировка и сериализация пропущены
+            response = Response(status_code=304, headers=headers) if result is None else FastJSONResponse(result, headers=headers)
         
-        return result
+        return profiler.response(response)
         
     except HTTPException:
         raise
+    except ClockifyUnavailableError as e:
+        logger.error("Clockify API unavailable in daily timeline", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Upstream unavailable",
+                "message": str(e),
+                "code": "UPSTREAM_UNAVAILABLE"
+            }
+        )
     except ValueError as e:
         logger.error("Validation error in daily timeline", error=str(e))
         raise HTTPException(
@@ -86,7 +163,9 @@ async def get_daily_timeline(
 
 @router.get(
     "/project-timeline",
-    response_model=ProjectTimelineResponse,
+    response_model=None,
+    response_class=FastJSONResponse,
+    responses={200: {"model": ProjectTimelineResponse}},
     summary="Get project timeline",
     description="Get timeline data for a specific project over a date range"
 )
@@ -94,7 +173,9 @@ async def get_project_timeline(
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
     end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
     project: str = Query(..., description="Exact project name from Clockify"),
-    timeline_service: TimelineService = Depends(get_timeline_service)
+    merge_gap_minutes: Optional[int] = Query(None, ge=0, le=MAX_MERGE_GAP_MINUTES, description="Merge blocks separated by at most this many minutes (default MERGE_GAP_MINUTES)"),
+    timeline_service: TimelineService = Depends(get_timeline_service),
+    profiler: RequestProfiler = Depends(get_request_profiler)
 ):
     """
     Получает временную шкалу для конкретного проекта за указанный период.
@@ -102,7 +183,9 @@ async def get_project_timeline(
     - **start_date**: Начальная дата в формате YYYY-MM-DD
     - **end_date**: Конечная дата в формате YYYY-MM-DD
     - **project**: Точное название проекта из Clockify
-    - **max_period**: Максимальный период 31 день
+    - **merge_gap_minutes**: Промежуток объединения соседних блоков в минутах (по умолчанию MERGE_GAP_MINUTES)
+    - **profile**: `pstats` или `collapsed` - вернуть профиль запроса (PROFILING_ENABLED и admin token)
+    - **max_period**: Максимальный период задается MAX_PERIOD_DAYS (по умолчанию 31 день)
     
     Возвращает данные по проекту, сгруппированные по дням с временными блоками.
     """
@@ -126,11 +209,23 @@ async def get_project_timeline(
         logger.info("Processing project timeline request", 
                    start_date=start_date, end_date=end_date, project=project)
         
-        # Получение данных
-        result = await timeline_service.get_project_timeline(start, end, project)
+        # Получение данных; с ?profile= профилируется вместе с сериализацией
+        with profiler:
+            result = await timeline_service.get_project_timeline(start, end, project, merge_gap_minutes)
+            response = FastJSONResponse(result)
         
-        return result
+        return profiler.response(response)
         
+    except ClockifyUnavailableError as e:
+        logger.error("Clockify API unavailable in project timeline", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Upstream unavailable",
+                "message": str(e),
+                "code": "UPSTREAM_UNAVAILABLE"
+            }
+        )
     except ValueError as e:
         error_msg = str(e)
         if "not found" in error_msg.lower():
@@ -166,6 +261,109 @@ async def get_project_timeline(
             }
         )
 
+@router.get(
+    "/team-timeline",
+    response_model=None,
+    response_class=FastJSONResponse,
+    responses={200: {"model": TeamTimelineResponse}},
+    summary="Get team timeline",
+    description="Get daily timelines for several workspace users (all active members when user_ids is omitted). "
+                "Users whose entries could not be fetched are listed in errors"
+)
+async def get_team_timeline(
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    user_ids: Optional[str] = Query(None, description="Comma-separated Clockify user ids; all active workspace members if omitted"),
+    merge_gap_minutes: Optional[int] = Query(None, ge=0, le=MAX_MERGE_GAP_MINUTES, description="Merge blocks separated by at most this many minutes (default MERGE_GAP_MINUTES)"),
+    timeline_service: TimelineService = Depends(get_timeline_service)
+):
+    """
+    Получает ежедневные шкалы нескольких пользователей рабочего пространства одним запросом.
+    
+    - **start_date**: Начальная дата в формате YYYY-MM-DD
+    - **end_date**: Конечная дата в формате YYYY-MM-DD
+    - **user_ids**: ID пользователей через запятую (по умолчанию - все активные участники; если их больше TEAM_MAX_USERS, ответ 400)
+    - **merge_gap_minutes**: Промежуток объединения соседних блоков в минутах (по умолчанию MERGE_GAP_MINUTES)
+    
+    Записи пользователей загружаются параллельно в общем лимите TEAM_REQUEST_CONCURRENCY запросов.
+    Пользователи, чьи записи получить не удалось, перечислены в errors.
+    """
+    try:
+        # Валидация дат
+        is_valid, error_msg = validate_date_range(start_date, end_date, settings.max_period_days)
+        if not is_valid:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid date range",
+                    "message": error_msg,
+                    "code": "INVALID_DATE_RANGE"
+                }
+            )
+        
+        # Список пользователей: без пустых и повторов, порядок сохраняется
+        users = None
+        if user_ids is not None:
+            users = list(dict.fromkeys(user_id.strip() for user_id in user_ids.split(",") if user_id.strip()))
+            users_error = None
+            if not users:
+                users_error = "At least one user ID is required"
+            elif len(users) > settings.team_max_users:
+                users_error = f"At most {settings.team_max_users} users per request"
+            if users_error:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "error": "Invalid user list",
+                        "message": users_error,
+                        "code": "INVALID_USER_IDS"
+                    }
+                )
+        
+        # Парсинг дат
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        
+        logger.info("Processing team timeline request",
+                   start_date=start_date, end_date=end_date, users=len(users) if users else "all")
+        
+        result = await timeline_service.get_team_timeline(start, end, users, merge_gap_minutes)
+        
+        return FastJSONResponse(result)
+        
+    except HTTPException:
+        raise
+    except ClockifyUnavailableError as e:
+        logger.error("Clockify API unavailable in team timeline", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Upstream unavailable",
+                "message": str(e),
+                "code": "UPSTREAM_UNAVAILABLE"
+            }
+        )
+    except ValueError as e:
+        logger.error("Validation error in team timeline", error=str(e))
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Invalid input",
+                "message": str(e),
+                "code": "VALIDATION_ERROR"
+            }
+        )
+    except Exception as e:
+        logger.error("Unexpected error in team timeline", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Internal server error",
+                "message": "An unexpected error occurred",
+                "code": "INTERNAL_ERROR"
+            }
+        )
+
 @router.get(
     "/projects",
     summary="List available projects",
@@ -178,7 +376,7 @@ async def list_projects(timeline_service: TimelineService = Depends(get_timeline
     Полезно для получения точных названий проектов для использования в project-timeline endpoint.
     """
     try:
-        projects = await timeline_service.clockify_client.get_projects()
+        projects = await timeline_service.clockify_client.project_catalog.get_projects()
         project_names = [project.name for project in projects]
         
         return {
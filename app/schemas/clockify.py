@@ -1,16 +1,19 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import Optional, Dict, Any, List
 
-class ClockifyTimeEntry(BaseModel):
+class ClockifyTimeEntrySlim(BaseModel):
+    """Поля временной записи, которые нужны timeline; остальные поля ответа Clockify отбрасываются"""
     id: str
     description: Optional[str] = None
     tagIds: Optional[List[str]] = None
-    userId: str
-    billable: bool
     taskId: Optional[str] = None
     projectId: Optional[str] = None
-    workspaceId: str
     timeInterval: Dict[str, Any]
+
+class ClockifyTimeEntry(ClockifyTimeEntrySlim):
+    userId: str
+    billable: bool
+    workspaceId: str
     customFieldValues: Optional[List[Any]] = None
     type: str
     kioskId: Optional[str] = None
@@ -38,3 +41,13 @@ class ClockifyProject(BaseModel):
     estimateReset: Optional[Dict[str, Any]] = None
     public: bool
     template: bool
+
+class ClockifyUser(BaseModel):
+    id: str
+    name: Optional[str] = None
+    email: Optional[str] = None
+    status: Optional[str] = None
+
+# Валидация страницы записей одним вызовом вместо ClockifyTimeEntry(**entry) на каждую запись
+time_entries_adapter = TypeAdapter(List[ClockifyTimeEntrySlim])
+full_time_entries_adapter = TypeAdapter(List[ClockifyTimeEntry])
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Literal, Optional
 from datetime import date
 
 class TimeBlock(BaseModel):
@@ -47,3 +47,30 @@ class ProjectTimelineResponse(BaseModel):
     project_name: str
     days: Dict[str, ProjectDayData]
     summary: ProjectTimelineSummary
+
+class TeamUserTimeline(BaseModel):
+    user_name: Optional[str] = None
+    days: Dict[str, DayData]
+    summary: DailySummary
+
+class TeamSummary(BaseModel):
+    period: str
+    users: int                   # Пользователи с результатом
+    failed_users: int            # Пользователи, записи которых получить не удалось
+    total_time: str              # "120h 30m"
+    project_totals: Dict[str, ProjectSummary]
+
+class TeamTimelineResponse(BaseModel):
+    users: Dict[str, TeamUserTimeline]
+    errors: Dict[str, str] = {}  # user_id -> причина; ответ частичный, если не пуст
+    summary: TeamSummary
+
+# Строки NDJSON потока /daily-timeline: дни по мере готовности, затем сводка
+class DailyTimelineDayLine(BaseModel):
+    type: Literal["day"] = "day"
+    date: str                    # "2024-10-01"
+    day: DayData
+
+class DailyTimelineSummaryLine(BaseModel):
+    type: Literal["summary"] = "summary"
+    summary: DailySummary
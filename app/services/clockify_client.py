@@ -1,24 +1,45 @@
 import httpx
 import asyncio
-from typing import List, Optional, Dict, Any
-from datetime import datetime, date
+import random
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
+from datetime import datetime, date, timezone
 import structlog
+from time import perf_counter
 from app.core.config import settings
-from app.schemas.clockify import ClockifyTimeEntry, ClockifyProject
+from app.core.metrics import UPSTREAM_DURATION, UPSTREAM_RESPONSES
+from app.core.timing import phase
+from app.schemas.clockify import (
+    ClockifyTimeEntrySlim, ClockifyProject, ClockifyUser, time_entries_adapter, full_time_entries_adapter
+)
+from app.services.http_client import http_client_manager
+from app.services.project_catalog import get_project_catalog
+from app.services.rate_limiter import upstream_rate_limiter
 from app.utils.validators import validate_api_key, validate_workspace_id, validate_user_id
+from app.utils.time_formatter import split_date_range, parse_clockify_times
 
 logger = structlog.get_logger()
 
+class ClockifyUnavailableError(ValueError):
+    """Clockify API временно недоступен (429 или 5xx) даже после повторов"""
+
+def _endpoint_label(endpoint: str) -> str:
+    """Метка endpoint для метрик без ID: /workspaces/{ws}/user/{uid}/time-entries -> time-entries"""
+    parts = endpoint.strip("/").split("/")
+    return parts[-1] if len(parts) > 2 else "workspace"
+
 class ClockifyClient:
     def __init__(self):
         self.api_key = settings.clockify_api_key
         self.workspace_id = settings.clockify_workspace_id
         self.user_id = settings.clockify_user_id
-        self.base_url = "https://api.clockify.me/api/v1"
-        self.timeout = 30.0
+        self.base_url = settings.clockify_base_url
+        self.timeout = settings.http_timeout
         
         # Validate configuration
         self._validate_config()
+        
+        self.project_catalog = get_project_catalog(self.workspace_id, self.get_projects, settings.cache_ttl_minutes)
     
     def _validate_config(self):
         """Валидирует конфигурацию клиента"""
@@ -41,58 +62,208 @@ class ClockifyClient:
             "Content-Type": "application/json"
         }
     
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Задержка перед повтором: Retry-After от Clockify или экспоненциальная с jitter"""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return max(0.0, delay) + random.uniform(0, settings.clockify_retry_base_delay)
+        
+        # Full jitter: равномерно от 0 до base * 2^attempt
+        return random.uniform(0, min(settings.clockify_retry_max_delay, settings.clockify_retry_base_delay * 2 ** attempt))
+    
     async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Выполняет HTTP запрос к Clockify API с обработкой ошибок"""
+        """Выполняет HTTP запрос к Clockify API с учетом лимита запросов, повторами и обработкой ошибок"""
         url = f"{self.base_url}{endpoint}"
         headers = self._get_headers()
+        label = _endpoint_label(endpoint)
+        
+        client = http_client_manager.get_client()
+        max_retries = settings.clockify_max_retries
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        for attempt in range(max_retries + 1):
+            await upstream_rate_limiter.acquire()
+            
+            started = perf_counter()
             try:
                 response = await client.request(
                     method=method,
                     url=url,
                     headers=headers,
+                    timeout=self.timeout,
                     **kwargs
                 )
+            except httpx.TimeoutException:
+                UPSTREAM_RESPONSES.labels(label, "timeout").inc()
+                logger.error("Request timeout", url=url)
+                raise ValueError("Request timeout. Please try again later")
+            except httpx.RequestError as e:
+                UPSTREAM_RESPONSES.labels(label, "error").inc()
+                logger.error("Request error", url=url, error=str(e))
+                raise ValueError("Failed to connect to Clockify API")
+            finally:
+                UPSTREAM_DURATION.labels(label).observe(perf_counter() - started)
+            UPSTREAM_RESPONSES.labels(label, str(response.status_code)).inc()
+            
+            if response.status_code == 401:
+                logger.error("Unauthorized request to Clockify API", status_code=401)
+                raise ValueError("Invalid API key or insufficient permissions")
+            
+            if response.status_code == 429 or response.status_code >= 500:
+                delay = self._retry_delay(response, attempt)
+                if response.status_code == 429:
+                    # Лимит общий на ключ - притормаживаем все запросы процесса, а не только этот;
+                    # дольше CLOCKIFY_RETRY_MAX_DELAY не блокируем: такой запрос и так завершится ошибкой
+                    upstream_rate_limiter.throttle(min(delay, settings.clockify_retry_max_delay))
                 
-                if response.status_code == 401:
-                    logger.error("Unauthorized request to Clockify API", status_code=401)
-                    raise ValueError("Invalid API key or insufficient permissions")
+                if attempt < max_retries and delay <= settings.clockify_retry_max_delay:
+                    upstream_rate_limiter.record_retry()
+                    logger.warning("Retrying Clockify request", status_code=response.status_code,
+                                   attempt=attempt + 1, delay=round(delay, 3))
+                    await asyncio.sleep(delay)
+                    continue
                 
                 if response.status_code == 429:
                     logger.warning("Rate limit exceeded", status_code=429)
-                    raise ValueError("Rate limit exceeded. Please try again later")
+                    raise ClockifyUnavailableError("Rate limit exceeded. Please try again later")
                 
-                if response.status_code >= 500:
-                    logger.error("Clockify API server error", status_code=response.status_code)
-                    raise ValueError("Clockify API is currently unavailable")
+                logger.error("Clockify API server error", status_code=response.status_code)
+                raise ClockifyUnavailableError("Clockify API is currently unavailable")
+            
+            response.raise_for_status()
+            return response.json()
+    
+    async def _fetch_time_entries_page(self, endpoint: str, params: Dict[str, str], page: int, page_size: int, semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """Получает одну страницу временных записей в рамках общего бюджета параллельных запросов"""
+        page_params = {**params, "page": page, "page-size": page_size}
+        async with semaphore:
+            return await self._make_request("GET", endpoint, params=page_params)
+    
+    async def _fetch_time_entries_batch(self, endpoint: str, params: Dict[str, str], pages: range, page_size: int, semaphore: asyncio.Semaphore) -> Tuple[List[List[Dict[str, Any]]], bool]:
+        """Параллельно получает пачку страниц; после первой неполной страницы отменяет запросы к следующим"""
+        tasks = {
+            asyncio.ensure_future(self._fetch_time_entries_page(endpoint, params, page, page_size, semaphore)): page
+            for page in pages
+        }
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        last_page = None
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
                 
-                response.raise_for_status()
-                return response.json()
+                for task in done:
+                    page = tasks[task]
+                    results[page] = task.result()
+                    if len(results[page]) < page_size:
+                        last_page = page if last_page is None else min(last_page, page)
                 
-            except httpx.TimeoutException:
-                logger.error("Request timeout", url=url)
-                raise ValueError("Request timeout. Please try again later")
-            except httpx.RequestError as e:
-                logger.error("Request error", url=url, error=str(e))
-                raise ValueError("Failed to connect to Clockify API")
+                if last_page is not None:
+                    # Страницы после неполной заведомо пустые - не тратим на них лимит запросов
+                    for task in [task for task in pending if tasks[task] > last_page]:
+                        task.cancel()
+                        pending.discard(task)
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        ordered = [results[page] for page in pages if page in results and (last_page is None or page <= last_page)]
+        return ordered, last_page is None
     
-    async def get_time_entries(self, start_date: date, end_date: date) -> List[ClockifyTimeEntry]:
-        """Получает временные записи за указанный период"""
-        start_str = start_date.isoformat()
-        end_str = end_date.isoformat()
+    def _request_concurrency(self) -> int:
+        """Сколько запросов к API может одновременно выполнять один вызов get_time_entries"""
+        return max(1, min(settings.clockify_request_concurrency, settings.http_max_connections))
+    
+    async def iter_time_entries(self, start_date: date, end_date: date, semaphore: Optional[asyncio.Semaphore] = None,
+                                full: bool = False, user_id: Optional[str] = None) -> AsyncIterator[ClockifyTimeEntrySlim]:
+        """Постранично получает временные записи за период и отдает их по одной.
         
-        endpoint = f"/workspaces/{self.workspace_id}/user/{self.user_id}/time-entries"
+        По умолчанию записи урезаны до полей, нужных timeline (ClockifyTimeEntrySlim); full=True отдает ClockifyTimeEntry.
+        user_id - чужой пользователь рабочего пространства (по умолчанию CLOCKIFY_USER_ID).
+        """
+        endpoint = f"/workspaces/{self.workspace_id}/user/{user_id or self.user_id}/time-entries"
         params = {
-            "start": f"{start_str}T00:00:00Z",
-            "end": f"{end_str}T23:59:59Z"
+            "start": f"{start_date.isoformat()}T00:00:00Z",
+            "end": f"{end_date.isoformat()}T23:59:59Z"
         }
+        page_size = settings.clockify_page_size
+        adapter = full_time_entries_adapter if full else time_entries_adapter
+        concurrency = self._request_concurrency()
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(concurrency)
+        
+        # Первая страница показывает, есть ли данные дальше
+        data = await self._fetch_time_entries_page(endpoint, params, 1, page_size, semaphore)
+        with phase("parse"):
+            parsed = adapter.validate_python(data)
+        for entry in parsed:
+            yield entry
+        
+        has_more = len(data) >= page_size
+        next_page = 2
+        batch_size = 1
+        
+        while has_more:
+            # Размер пачки растет вдвое до лимита параллелизма: на коротких периодах
+            # не запрашиваем заведомо пустые страницы
+            batch_size = min(batch_size * 2, concurrency)
+            pages = range(next_page, next_page + batch_size)
+            batch, has_more = await self._fetch_time_entries_batch(endpoint, params, pages, page_size, semaphore)
+            
+            for data in batch:
+                with phase("parse"):
+                    parsed = adapter.validate_python(data)
+                for entry in parsed:
+                    yield entry
+            
+            next_page += batch_size
+    
+    async def _fetch_time_entries_shard(self, start_date: date, end_date: date, semaphore: asyncio.Semaphore, full: bool,
+                                        user_id: Optional[str] = None) -> List[ClockifyTimeEntrySlim]:
+        """Получает все записи одного окна периода; страницы всех окон делят один семафор"""
+        return [entry async for entry in self.iter_time_entries(start_date, end_date, semaphore, full, user_id)]
+    
+    async def get_time_entries(self, start_date: date, end_date: date, full: bool = False, user_id: Optional[str] = None,
+                               semaphore: Optional[asyncio.Semaphore] = None) -> List[ClockifyTimeEntrySlim]:
+        """Получает временные записи за указанный период (full=True - со всеми полями ClockifyTimeEntry).
+        
+        semaphore позволяет нескольким вызовам (например, по пользователям команды) делить один бюджет запросов.
+        """
+        start_str = start_date.isoformat()
+        end_str = end_date.isoformat()
         
-        logger.info("Fetching time entries", start_date=start_str, end_date=end_str)
+        shards = split_date_range(start_date, end_date, settings.time_entries_shard_days)
+        # Один бюджет на окна и страницы: не больше CLOCKIFY_REQUEST_CONCURRENCY запросов одновременно
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._request_concurrency())
+        
+        logger.info("Fetching time entries", start_date=start_str, end_date=end_str, shards=len(shards),
+                    user_id=user_id or self.user_id)
         
         try:
-            data = await self._make_request("GET", endpoint, params=params)
-            entries = [ClockifyTimeEntry(**entry) for entry in data]
+            shard_results = await asyncio.gather(
+                *(self._fetch_time_entries_shard(shard_start, shard_end, semaphore, full, user_id) for shard_start, shard_end in shards)
+            )
+            
+            # Записи на границах окон могут прийти дважды - оставляем по одной
+            entries_by_id = {}
+            for shard_entries in shard_results:
+                for entry in shard_entries:
+                    entries_by_id.setdefault(entry.id, entry)
+            
+            # Упорядочиваем от старых к новым по времени начала
+            unique_entries = list(entries_by_id.values())
+            with phase("parse"):
+                starts = parse_clockify_times([entry.timeInterval["start"] for entry in unique_entries])
+                entries = [entry for _, entry in sorted(zip(starts, unique_entries), key=lambda pair: pair[0])]
             
             logger.info("Successfully fetched time entries", count=len(entries))
             return entries
@@ -119,15 +290,28 @@ class ClockifyClient:
             logger.error("Failed to fetch projects", error=str(e))
             raise
     
-    async def get_project_by_name(self, project_name: str) -> Optional[ClockifyProject]:
-        """Находит проект по точному названию"""
-        projects = await self.get_projects()
+    async def get_workspace_users(self) -> List[ClockifyUser]:
+        """Получает активных участников рабочего пространства (постранично)"""
+        endpoint = f"/workspaces/{self.workspace_id}/users"
+        page_size = settings.clockify_page_size
+        users = []
+        page = 1
+        
+        logger.info("Fetching workspace users")
         
-        for project in projects:
-            if project.name == project_name:
-                return project
+        while True:
+            data = await self._make_request("GET", endpoint, params={"status": "ACTIVE", "page": page, "page-size": page_size})
+            users.extend(ClockifyUser(**user) for user in data)
+            if len(data) < page_size:
+                break
+            page += 1
         
-        return None
+        logger.info("Successfully fetched workspace users", count=len(users))
+        return users
+    
+    async def get_project_by_name(self, project_name: str) -> Optional[ClockifyProject]:
+        """Находит проект по точному названию"""
+        return await self.project_catalog.get_by_name(project_name)
     
     async def test_connection(self) -> bool:
         """Тестирует соединение с Clockify API"""
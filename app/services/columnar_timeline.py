@@ -0,0 +1,181 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import structlog
+
+from app.schemas.clockify import ClockifyTimeEntrySlim
+from app.schemas.response import DayData, ProjectData, TimeBlock
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость, без нее работает обычная группировка
+    np = None
+
+logger = structlog.get_logger()
+
+SECONDS_PER_DAY = 86400
+
+
+def is_available() -> bool:
+    """Установлен ли numpy, необходимый векторной группировке"""
+    return np is not None
+
+
+def _epoch_seconds(values: List[str]) -> "np.ndarray":
+    """Переводит ISO время Clockify (UTC, с 'Z') в int64 секунды от эпохи; доли секунды отбрасываются"""
+    naive = [value[:-1] if value.endswith("Z") else value for value in values]
+    return np.array(naive, dtype="datetime64[us]").astype("datetime64[s]").astype(np.int64)
+
+
+def _clock(seconds: int) -> str:
+    """Время суток HH:MM для локальных секунд от эпохи"""
+    seconds %= SECONDS_PER_DAY
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+
+def group_by_days(entries: List[ClockifyTimeEntrySlim], project_map: Dict[str, str],
+                  timezone_offset: int, merge_gap_minutes: int, dedupe_descriptions: bool = False,
+                  date_range: Optional[Tuple[date, date]] = None) -> Dict[str, DayData]:
+    """Векторная версия TimelineService._group_by_days: колонки int64, сортировка и объединение блоков в numpy.
+
+    Результат совпадает с обычной группировкой (включая порядок дней и проектов) для времени с точностью
+    до секунды, как его отдает Clockify. Если задан date_range, куски вне этих локальных дней отбрасываются.
+    """
+    starts: List[str] = []
+    ends: List[str] = []
+    project_codes: List[int] = []
+    descriptions: List[Optional[str]] = []
+    project_names: Dict[str, int] = {}
+
+    # Единственный проход по записям в Python: собираем колонки
+    for entry in entries:
+        end = entry.timeInterval.get("end")
+        if not end:  # Пропускаем активные записи
+            continue
+
+        project_name = "Unnamed"
+        if entry.projectId and entry.projectId in project_map:
+            project_name = project_map[entry.projectId]
+
+        starts.append(entry.timeInterval["start"])
+        ends.append(end)
+        project_codes.append(project_names.setdefault(project_name, len(project_names)))
+        descriptions.append(entry.description if entry.description else None)
+
+    if not starts:
+        return {}
+
+    offset = timezone_offset * 3600
+    start = _epoch_seconds(starts) + offset
+    end = _epoch_seconds(ends) + offset
+    project = np.array(project_codes, dtype=np.int64)
+    day = start // SECONDS_PER_DAY
+
+    # Записи через полночь режутся на куски по дням: repeat по числу дней и обрезка границами дня.
+    # Куски идут подряд в порядке записей, поэтому порядок первого появления тот же, что в обычной группировке
+    spans = np.maximum((end - 1) // SECONDS_PER_DAY, day) - day + 1
+    if (spans > 1).any():
+        source = np.repeat(np.arange(len(spans)), spans)
+        day = day[source] + np.arange(len(source)) - np.repeat(np.cumsum(spans) - spans, spans)
+        start = np.maximum(start[source], day * SECONDS_PER_DAY)
+        end = np.minimum(end[source], (day + 1) * SECONDS_PER_DAY)
+        project = project[source]
+        descriptions = [descriptions[index] for index in source.tolist()]
+
+    # Куски записей, перешедших через полночь за границы запрошенного периода, не попадают в ответ
+    if date_range is not None:
+        first_day, last_day = (int(np.datetime64(value, "D").astype(np.int64)) for value in date_range)
+        keep = (day >= first_day) & (day <= last_day)
+        if not keep.all():
+            kept = np.flatnonzero(keep)
+            if not len(kept):
+                return {}
+            start, end, project, day = start[kept], end[kept], project[kept], day[kept]
+            descriptions = [descriptions[index] for index in kept.tolist()]
+
+    # Сортировка по дню, проекту и началу; lexsort стабилен, как sorted() в обычной группировке
+    order = np.lexsort((start, project, day))
+    start, end, project, day = start[order], end[order], project[order], day[order]
+
+    count = len(order)
+    group_first = np.ones(count, dtype=bool)
+    group_first[1:] = (day[1:] != day[:-1]) | (project[1:] != project[:-1])
+    group_starts = np.flatnonzero(group_first)
+    group_id = np.cumsum(group_first) - 1
+
+    # Сегментный cummax концов: сдвиг на номер группы не дает максимуму перейти через границу группы
+    base = end.min()
+    span = int(end.max() - base) + 1
+    running_end = np.maximum.accumulate((end - base) + group_id * span) - group_id * span + base
+
+    # Новый блок начинается в начале группы или если промежуток после предыдущих больше допустимого
+    block_first = group_first.copy()
+    block_first[1:] |= (start[1:] - running_end[:-1]) > merge_gap_minutes * 60
+    block_starts = np.flatnonzero(block_first)
+    block_start = start[block_starts]
+    block_end = np.maximum.reduceat(end, block_starts)
+    block_group = group_id[block_starts]
+    block_seconds = block_end - block_start
+
+    # Часы блока округляются так же, как в calculate_hours: Python round по уникальным длительностям
+    unique_seconds, inverse = np.unique(block_seconds, return_inverse=True)
+    rounded = np.array([round(seconds / 3600, 1) for seconds in unique_seconds.tolist()])
+    block_hours = rounded[inverse.reshape(-1)]
+
+    group_block_starts = np.searchsorted(block_group, np.arange(len(group_starts)))
+    group_hours = np.add.reduceat(block_hours, group_block_starts)
+
+    # Порядок как в обычной группировке: дни и проекты в порядке первого появления записи
+    first_index = np.minimum.reduceat(order, group_starts)
+    group_day = day[group_starts]
+    day_starts = np.flatnonzero(np.r_[True, group_day[1:] != group_day[:-1]])
+    day_first_index = np.repeat(np.minimum.reduceat(first_index, day_starts), np.diff(np.r_[day_starts, len(group_starts)]))
+    output_order = np.lexsort((first_index, day_first_index))
+
+    names = list(project_names)
+    sorted_descriptions = [descriptions[index] for index in order.tolist()]
+    block_bounds = np.r_[block_starts, count].tolist()
+    block_start_list = block_start.tolist()
+    block_end_list = block_end.tolist()
+    block_seconds_list = block_seconds.tolist()
+    group_bounds = np.r_[group_block_starts, len(block_starts)].tolist()
+    group_project = project[group_starts].tolist()
+    group_day_list = group_day.tolist()
+    group_hours_list = group_hours.tolist()
+
+    # Модели ответа строятся только на выходе
+    result: Dict[str, DayData] = {}
+    day_totals: Dict[str, float] = {}
+    epoch_day = np.datetime64(0, "D")
+
+    for group in output_order.tolist():
+        time_blocks = []
+        for block in range(group_bounds[group], group_bounds[group + 1]):
+            members = [text for text in sorted_descriptions[block_bounds[block]:block_bounds[block + 1]] if text]
+            if dedupe_descriptions:
+                members = list(dict.fromkeys(members))
+            seconds = block_seconds_list[block]
+            time_blocks.append(TimeBlock(
+                start_time=_clock(block_start_list[block]),
+                end_time=_clock(block_end_list[block]),
+                duration=f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}",
+                description=", ".join(members) if members else None
+            ))
+
+        day_key = str(epoch_day + group_day_list[group])
+        if day_key not in result:
+            result[day_key] = DayData(projects={}, day_total=0.0)
+            day_totals[day_key] = 0.0
+
+        project_total = group_hours_list[group]
+        result[day_key].projects[names[group_project[group]]] = ProjectData(
+            total_hours=round(project_total, 1),
+            time_blocks=time_blocks,
+            description=None
+        )
+        day_totals[day_key] += project_total
+
+    for day_key, day_total in day_totals.items():
+        result[day_key].day_total = round(day_total, 1)
+
+    logger.debug("Columnar grouping done", entries=count, blocks=len(block_starts), days=len(result))
+    return result
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+
+class DayResultCache:
+    """LRU-кэш посчитанных дней (DayData / ProjectDayData) с проверкой отпечатка исходных записей"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, fingerprint: int) -> Optional[Any]:
+        """Возвращает результат дня, если он есть и записи дня не менялись"""
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        if item[0] != fingerprint:
+            # День редактировали - пересчитываем
+            self.stale += 1
+            self.misses += 1
+            del self._items[key]
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: Hashable, fingerprint: int, value: Any):
+        """Сохраняет результат дня, вытесняя самые давно использованные"""
+        self._items[key] = (fingerprint, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._items),
+            "max_size": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions
+        }
+
+
+# Общий для процесса кэш закрытых дней
+day_result_cache = DayResultCache(settings.day_cache_max_days)
@@ -0,0 +1,204 @@
+import asyncio
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import structlog
+
+from app.core.config import settings
+from app.schemas.clockify import ClockifyTimeEntrySlim, time_entries_adapter
+from app.utils.single_flight import SingleFlight
+
+logger = structlog.get_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS time_entries (
+    id TEXT PRIMARY KEY,
+    workspace_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    project_id TEXT,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_time_entries_user_start ON time_entries (workspace_id, user_id, start_ts);
+CREATE INDEX IF NOT EXISTS idx_time_entries_project_start ON time_entries (project_id, start_ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    workspace_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    covered_from TEXT NOT NULL,
+    synced_until TEXT NOT NULL,
+    PRIMARY KEY (workspace_id, user_id)
+);
+"""
+
+
+def _to_epoch(iso_string: str) -> int:
+    """Переводит ISO время Clockify (UTC) в секунды от эпохи"""
+    return int(datetime.fromisoformat(iso_string.replace('Z', '+00:00')).timestamp())
+
+
+def _day_bounds(start_date: date, end_date: date) -> Tuple[int, int]:
+    """Границы периода в секундах UTC - те же, что в запросе к Clockify API"""
+    start = datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc)
+    end = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+class TimeEntryStore:
+    """Локальное хранилище временных записей в SQLite с инкрементальной синхронизацией по watermark"""
+
+    def __init__(self, path: str, lookback_days: int):
+        self.path = path
+        self.lookback_days = lookback_days
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+        # Одинаковые окна одновременных синхронизаций загружаются один раз, разные - параллельно
+        self._window_syncs = SingleFlight()
+        self.syncs = 0
+        self.windows_fetched = 0
+        self.entries_served = 0
+
+    def _today(self) -> date:
+        return datetime.now(timezone.utc).date()
+
+    def _read_state(self, workspace_id: str, user_id: str) -> Optional[Tuple[date, date]]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT covered_from, synced_until FROM sync_state WHERE workspace_id = ? AND user_id = ?",
+                (workspace_id, user_id)
+            ).fetchone()
+        if row is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+    def _plan_windows(self, state: Optional[Tuple[date, date]], start_date: date, end_date: date) -> Tuple[List[Tuple[date, date]], date, date]:
+        """Определяет окна для загрузки из API и новые границы покрытого периода"""
+        today = self._today()
+        one_day = timedelta(days=1)
+
+        if state is None or start_date > state[1] + one_day or end_date < state[0] - one_day:
+            # Нет пересечения с уже загруженным периодом - начинаем новое покрытие
+            return [(start_date, end_date)], start_date, min(end_date, today)
+
+        covered_from, synced_until = state
+        windows = []
+
+        if start_date < covered_from:
+            windows.append((start_date, covered_from - one_day))
+
+        # Записи после watermark и за look-back период до него могли измениться
+        refresh_from = max(synced_until - timedelta(days=self.lookback_days), covered_from)
+        if end_date >= refresh_from:
+            windows.append((refresh_from, end_date))
+
+        return windows, min(start_date, covered_from), max(synced_until, min(end_date, today))
+
+    def _replace_window(self, workspace_id: str, user_id: str, start_date: date, end_date: date, entries: List[ClockifyTimeEntrySlim]):
+        """Заменяет записи окна свежими данными из API (удаленные в Clockify записи пропадают)"""
+        start_ts, end_ts = _day_bounds(start_date, end_date)
+        rows = [
+            (
+                entry.id, workspace_id, user_id, entry.projectId,
+                _to_epoch(entry.timeInterval["start"]),
+                _to_epoch(entry.timeInterval["end"]) if entry.timeInterval.get("end") else None,
+                entry.model_dump_json()
+            )
+            for entry in entries
+        ]
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM time_entries WHERE workspace_id = ? AND user_id = ? AND start_ts BETWEEN ? AND ?",
+                (workspace_id, user_id, start_ts, end_ts)
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO time_entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _write_state(self, workspace_id: str, user_id: str, covered_from: date, synced_until: date):
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                (workspace_id, user_id, covered_from.isoformat(), synced_until.isoformat())
+            )
+
+    def _query(self, workspace_id: str, user_id: str, start_date: date, end_date: date) -> List[ClockifyTimeEntrySlim]:
+        start_ts, end_ts = _day_bounds(start_date, end_date)
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM time_entries WHERE workspace_id = ? AND user_id = ? "
+                "AND start_ts BETWEEN ? AND ? ORDER BY start_ts",
+                (workspace_id, user_id, start_ts, end_ts)
+            ).fetchall()
+        # Все строки валидируются одним вызовом; лишние поля старых записей отбрасываются
+        return time_entries_adapter.validate_json("[" + ",".join(row[0] for row in rows) + "]")
+
+    async def sync(self, client, start_date: date, end_date: date):
+        """Догружает из API только период после watermark (с look-back) и еще не покрытые дни"""
+        workspace_id, user_id = client.workspace_id, client.user_id
+
+        # Общей блокировки на запрос к API нет: конкурентная синхронизация по устаревшему состоянию
+        # в худшем случае повторно загрузит окно, а записанное покрытие всегда уже загружено
+        state = await asyncio.to_thread(self._read_state, workspace_id, user_id)
+        windows, covered_from, synced_until = self._plan_windows(state, start_date, end_date)
+
+        for window_start, window_end in windows:
+            await self._window_syncs.do(
+                (workspace_id, user_id, window_start, window_end),
+                lambda window_start=window_start, window_end=window_end: self._sync_window(client, window_start, window_end)
+            )
+
+        await asyncio.to_thread(self._write_state, workspace_id, user_id, covered_from, synced_until)
+        self.syncs += 1
+
+        logger.info("Entry store synced", user_id=user_id, windows=len(windows),
+                   covered_from=covered_from.isoformat(), synced_until=synced_until.isoformat())
+
+    async def _sync_window(self, client, window_start: date, window_end: date):
+        """Загружает окно из API и заменяет им записи окна в хранилище"""
+        entries = await client.get_time_entries(window_start, window_end)
+        await asyncio.to_thread(self._replace_window, client.workspace_id, client.user_id, window_start, window_end, entries)
+        self.windows_fetched += 1
+
+    async def get_time_entries(self, client, start_date: date, end_date: date) -> List[ClockifyTimeEntrySlim]:
+        """Синхронизирует период и отдает записи из локального хранилища, упорядоченные по началу"""
+        await self.sync(client, start_date, end_date)
+        entries = await asyncio.to_thread(self._query, client.workspace_id, client.user_id, start_date, end_date)
+        self.entries_served += len(entries)
+        return entries
+
+    def close(self):
+        with self._db_lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._db_lock:
+            rows = self._conn.execute("SELECT COUNT(*) FROM time_entries").fetchone()[0]
+        return {
+            "entries": rows,
+            "syncs": self.syncs,
+            "windows_fetched": self.windows_fetched,
+            "entries_served": self.entries_served
+        }
+
+
+_store: Optional[TimeEntryStore] = None
+
+
+def get_entry_store() -> Optional[TimeEntryStore]:
+    """Возвращает общее для процесса хранилище или None, если оно выключено настройками"""
+    global _store
+    if not settings.entry_store_enabled:
+        return None
+    if _store is None:
+        _store = TimeEntryStore(settings.entry_store_path, settings.entry_store_lookback_days)
+        logger.info("Entry store opened", path=settings.entry_store_path)
+    return _store
+
+
+def close_entry_store():
+    """Закрывает хранилище при остановке приложения"""
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
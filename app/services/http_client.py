@@ -0,0 +1,130 @@
+import httpx
+from typing import Any, Dict, List, Optional
+import structlog
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+
+def _http2_available() -> bool:
+    """Проверяет, установлен ли пакет h2, необходимый httpx для HTTP/2"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pool_connections(transport: httpx.AsyncHTTPTransport) -> List[Any]:
+    """Возвращает соединения пула httpcore или пустой список, если внутренний API изменился"""
+    pool = getattr(transport, "_pool", None)
+    try:
+        return list(getattr(pool, "connections", None) or [])
+    except Exception:
+        return []
+
+
+def _is_idle(connection: Any) -> bool:
+    is_idle = getattr(connection, "is_idle", None)
+    return bool(is_idle()) if callable(is_idle) else False
+
+
+class _PoolStatsTransport(httpx.AsyncHTTPTransport):
+    """Транспорт httpx, считающий запросы и ожидания свободного соединения в пуле"""
+
+    def __init__(self, max_connections: int, http2: bool = False, **kwargs):
+        super().__init__(http2=http2, **kwargs)
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.requests_total = 0
+        self.in_flight = 0
+        self.waits = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Приблизительная оценка: пул заполнен и свободных соединений нет, значит запрос
+        # скорее всего встанет в очередь. Для HTTP/2 запросы мультиплексируются, не считаем
+        if not self.http2:
+            connections = _pool_connections(self)
+            if len(connections) >= self.max_connections and not any(_is_idle(c) for c in connections):
+                self.waits += 1
+
+        self.requests_total += 1
+        self.in_flight += 1
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+
+class HttpClientManager:
+    """Держит один долгоживущий httpx.AsyncClient с keep-alive пулом соединений"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[_PoolStatsTransport] = None
+
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = settings.http2_enabled
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but 'h2' package is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+        self._transport = _PoolStatsTransport(
+            max_connections=settings.http_max_connections,
+            limits=limits,
+            http2=http2
+        )
+
+        logger.info("Creating pooled HTTP client",
+                   max_connections=settings.http_max_connections,
+                   max_keepalive_connections=settings.http_max_keepalive_connections,
+                   http2=http2)
+
+        # Accept-Encoding не задаем: httpx сам объявляет gzip/deflate (и br/zstd, если установлены)
+        return httpx.AsyncClient(
+            transport=self._transport,
+            timeout=settings.http_timeout
+        )
+
+    async def start(self) -> httpx.AsyncClient:
+        """Создает клиент при старте приложения"""
+        return self.get_client()
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Возвращает общий клиент, создавая его при первом обращении"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def close(self):
+        """Закрывает клиент и все соединения пула"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Pooled HTTP client closed")
+        self._client = None
+        self._transport = None
+
+    def get_pool_stats(self) -> Dict[str, int]:
+        """Возвращает статистику пула соединений; waits - приблизительная оценка, для HTTP/2 всегда 0"""
+        if self._transport is None:
+            return {"connections": 0, "in_use": 0, "idle": 0, "in_flight": 0, "requests_total": 0, "waits": 0}
+
+        connections = _pool_connections(self._transport)
+        idle = sum(1 for connection in connections if _is_idle(connection))
+
+        return {
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "in_flight": self._transport.in_flight,
+            "requests_total": self._transport.requests_total,
+            "waits": self._transport.waits
+        }
+
+
+http_client_manager = HttpClientManager()
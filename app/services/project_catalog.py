@@ -0,0 +1,103 @@
+import asyncio
+import time
+from types import MappingProxyType
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional
+import structlog
+
+from app.schemas.clockify import ClockifyProject
+
+logger = structlog.get_logger()
+
+
+class ProjectCatalog:
+    """Кэш проектов рабочего пространства с индексами id -> проект и название -> id"""
+
+    def __init__(self, loader: Callable[[], Awaitable[List[ClockifyProject]]], ttl_minutes: float):
+        self._loader = loader
+        self._ttl_minutes = ttl_minutes
+        self._projects_by_id: Dict[str, ClockifyProject] = {}
+        self._ids_by_name: Dict[str, str] = {}
+        self._names_by_id: Dict[str, str] = {}
+        self._loaded = False
+        self._expires_at = 0.0
+        self._refresh_task: Optional[asyncio.Future] = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _is_fresh(self) -> bool:
+        return self._loaded and time.monotonic() < self._expires_at
+
+    async def _refresh(self):
+        """Загружает проекты из API и перестраивает индексы"""
+        try:
+            projects = await self._loader()
+            self._projects_by_id = {project.id: project for project in projects}
+            self._ids_by_name = {project.name: project.id for project in projects}
+            self._names_by_id = {project.id: project.name for project in projects}
+            self._loaded = True
+            self._expires_at = time.monotonic() + self._ttl_minutes * 60
+            self.refreshes += 1
+            logger.info("Project catalog refreshed", projects=len(projects))
+        finally:
+            self._refresh_task = None
+
+    async def _ensure_fresh(self):
+        """Обновляет каталог по истечении TTL; конкурентные вызовы ждут одно обновление"""
+        if self._is_fresh():
+            self.hits += 1
+            return
+
+        self.misses += 1
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+
+        # shield: отмена одного из ожидающих не должна прерывать общее обновление
+        await asyncio.shield(self._refresh_task)
+
+    async def get_projects(self) -> List[ClockifyProject]:
+        """Возвращает список активных проектов"""
+        await self._ensure_fresh()
+        return list(self._projects_by_id.values())
+
+    async def get_project_names(self) -> Mapping[str, str]:
+        """Возвращает маппинг ID проекта -> название (только для чтения, каталог общий)"""
+        await self._ensure_fresh()
+        return MappingProxyType(self._names_by_id)
+
+    async def get_by_name(self, project_name: str) -> Optional[ClockifyProject]:
+        """Находит проект по точному названию"""
+        await self._ensure_fresh()
+        project_id = self._ids_by_name.get(project_name)
+        return self._projects_by_id.get(project_id) if project_id else None
+
+    def invalidate(self):
+        """Помечает каталог устаревшим, следующее обращение перезагрузит проекты"""
+        self._expires_at = 0.0
+
+    def get_stats(self) -> Dict[str, int]:
+        """Возвращает статистику обращений к каталогу"""
+        return {
+            "projects": len(self._projects_by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes
+        }
+
+
+# Каталоги общие для процесса: по одному на рабочее пространство
+_catalogs: Dict[str, ProjectCatalog] = {}
+
+
+def get_project_catalog(workspace_id: str, loader: Callable[[], Awaitable[List[ClockifyProject]]], ttl_minutes: float) -> ProjectCatalog:
+    """Возвращает общий каталог проектов рабочего пространства, создавая его при первом обращении"""
+    catalog = _catalogs.get(workspace_id)
+    if catalog is None:
+        catalog = ProjectCatalog(loader, ttl_minutes)
+        _catalogs[workspace_id] = catalog
+    return catalog
+
+
+def get_project_catalog_stats() -> Dict[str, Dict[str, int]]:
+    """Возвращает статистику всех каталогов по рабочим пространствам"""
+    return {workspace_id: catalog.get_stats() for workspace_id, catalog in _catalogs.items()}
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Any, Dict
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+
+class TokenBucket:
+    """Клиентский token bucket для запросов к Clockify API; ожидающие обслуживаются по очереди (FIFO)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Ждет свободный токен и возвращает время ожидания в секундах"""
+        started = time.monotonic()
+
+        # asyncio.Lock будит ожидающих в порядке очереди - это и дает честную очередь
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens < 1:
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    self._tokens -= 1
+                    break
+
+                await asyncio.sleep(delay)
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        if waited > 0.001:
+            self.queued += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def throttle(self, seconds: float):
+        """Приостанавливает выдачу токенов всем (после 429 от Clockify)"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self.throttled += 1
+
+    def record_retry(self):
+        self.retries += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.capacity,
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "max_wait_seconds": round(self.max_wait, 3),
+            "retries": self.retries,
+            "throttled": self.throttled
+        }
+
+
+# Лимит Clockify считается на API ключ, поэтому бюджет общий для всего процесса
+upstream_rate_limiter = TokenBucket(settings.clockify_rate_limit_per_second, settings.clockify_rate_limit_burst)
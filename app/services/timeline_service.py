@@ -1,40 +1,180 @@
-from datetime import datetime, date, timedelta
-from typing import List, Dict, Tuple, Optional
+from datetime import datetime, date, timedelta, timezone
+from typing import AsyncIterator, FrozenSet, List, Dict, Set, Tuple, Optional, Union
 from collections import defaultdict
 import asyncio
 import structlog
 
+from app.core.config import settings
+from app.core.metrics import ENTRIES_PER_REQUEST
+from app.core.timing import phase
 from app.services.clockify_client import ClockifyClient
+from app.services.entry_store import get_entry_store
+from app.services.day_cache import day_result_cache
+from app.services import columnar_timeline
 from app.schemas.response import (
     DailyTimelineResponse, ProjectTimelineResponse, 
     DayData, ProjectData, ProjectDayData, TimeBlock,
-    DailySummary, ProjectTimelineSummary, ProjectSummary
+    DailySummary, ProjectTimelineSummary, ProjectSummary,
+    DailyTimelineDayLine, DailyTimelineSummaryLine,
+    TeamTimelineResponse, TeamUserTimeline, TeamSummary
 )
-from app.schemas.clockify import ClockifyTimeEntry
+from app.schemas.clockify import ClockifyTimeEntrySlim
 from app.utils.time_formatter import (
-    parse_clockify_time, calculate_duration, calculate_hours,
-    format_time_only, merge_adjacent_blocks, format_duration,
-    format_session_duration
+    parse_clockify_epochs, format_duration,
+    format_session_duration, split_date_range
+)
+from app.utils.single_flight import SingleFlight
+from app.utils.etag import timeline_etag, etag_matches
+from app.utils.intervals import (
+    DescriptionTable, Interval, merge_intervals, day_key as epoch_day_key,
+    format_clock, format_hms, merge_blocks, split_at_midnight
 )
 
 logger = structlog.get_logger()
 
+# Общий для процесса: одинаковые конкурентные запросы выполняются один раз
+timeline_requests = SingleFlight()
+
+
+class DailySummaryBuilder:
+    """Накапливает сводку ежедневной шкалы по мере готовности дней"""
+    
+    def __init__(self):
+        self.active_days = 0
+        self.total_hours = 0.0
+        self.project_totals = defaultdict(float)
+    
+    def add_day(self, day_data: DayData):
+        self.active_days += 1
+        self.total_hours += day_data.day_total
+        for project_name, project_data in day_data.projects.items():
+            self.project_totals[project_name] += project_data.total_hours
+    
+    def build(self, start_date: date, end_date: date) -> DailySummary:
+        # Форматируем статистику проектов
+        formatted_project_totals = {}
+        for project_name, hours in self.project_totals.items():
+            formatted_project_totals[project_name] = ProjectSummary(
+                hours=round(hours, 1),
+                formatted=format_duration(hours)
+            )
+        
+        return DailySummary(
+            period=f"{start_date.isoformat()} to {end_date.isoformat()}",
+            active_days=self.active_days,
+            total_time=format_duration(self.total_hours),
+            project_totals=formatted_project_totals
+        )
+
+
+def _day_key_bounds(date_range: Optional[Tuple[date, date]]) -> Tuple[str, str]:
+    """Границы ключей дней (ISO строки сравниваются как даты); без периода - все дни"""
+    first_day, last_day = date_range or (date.min, date.max)
+    return first_day.isoformat(), last_day.isoformat()
+
+
+def _discard_prefetch(task: Optional[asyncio.Future]):
+    """Отменяет незавершенную предзагрузку; ошибку завершенной помечает полученной"""
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+
 class TimelineService:
     def __init__(self):
         self.clockify_client = ClockifyClient()
+        self._numpy_missing_logged = False
+    
+    async def warm_up(self):
+        """Прогрев при старте: открывает соединение с Clockify и загружает каталог проектов"""
+        connected = await self.clockify_client.test_connection()
+        
+        try:
+            projects = await self.clockify_client.project_catalog.get_projects()
+        except Exception as e:
+            logger.warning("Failed to prime project catalog", error=str(e))
+            projects = []
+        
+        logger.info("Timeline service warmed up", connected=connected, projects=len(projects))
+    
+    def _request_key(self, kind: str, start_date: date, end_date: date, gap_minutes: int, project_name: Optional[str] = None) -> Tuple:
+        """Нормализованный ключ запроса для объединения одинаковых вызовов"""
+        return (
+            kind,
+            self.clockify_client.workspace_id,
+            self.clockify_client.user_id,
+            start_date.isoformat(),
+            end_date.isoformat(),
+            project_name,
+            settings.timezone_offset,
+            gap_minutes,
+            settings.merge_dedupe_descriptions
+        )
+    
+    def _gap_minutes(self, merge_gap_minutes: Optional[int]) -> int:
+        """Промежуток объединения блоков: из запроса или MERGE_GAP_MINUTES по умолчанию"""
+        return settings.merge_gap_minutes if merge_gap_minutes is None else merge_gap_minutes
     
-    async def get_daily_timeline(self, start_date: date, end_date: date) -> DailyTimelineResponse:
-        """Получает ежедневную временную шкалу за указанный период"""
+    async def _fetch_entries(self, start_date: date, end_date: date) -> List[ClockifyTimeEntrySlim]:
+        """Получает записи из локального хранилища, если оно включено, иначе напрямую из API"""
+        store = get_entry_store()
+        if store is None:
+            return await self.clockify_client.get_time_entries(start_date, end_date)
+        return await store.get_time_entries(self.clockify_client, start_date, end_date)
+    
+    async def get_daily_timeline_conditional(self, start_date: date, end_date: date, merge_gap_minutes: Optional[int] = None,
+                                             if_none_match: FrozenSet[str] = frozenset()) -> Tuple[str, Optional[DailyTimelineResponse]]:
+        """Ежедневная шкала с ETag: (etag, ответ) или (etag, None), если ETag совпал с If-None-Match.
+        
+        ETag считается по загруженным записям, поэтому при совпадении группировка и сериализация не выполняются.
+        """
+        gap_minutes = self._gap_minutes(merge_gap_minutes)
+        key = self._request_key("daily", start_date, end_date, gap_minutes)
+        entries, etag = await timeline_requests.do(("entries",) + key, lambda: self._fetch_entries_with_etag(start_date, end_date, key))
+        if etag_matches(etag, if_none_match):
+            logger.info("Daily timeline not modified", start_date=start_date, end_date=end_date)
+            return etag, None
+        
+        # Одинаковые записи дают одинаковый ответ: ключ построения включает ETag
+        response = await timeline_requests.do(key + (etag,), lambda: self._build_daily_timeline(start_date, end_date, gap_minutes, entries))
+        return etag, response
+    
+    async def _fetch_entries_with_etag(self, start_date: date, end_date: date, request_key: Tuple) -> Tuple[List[ClockifyTimeEntrySlim], str]:
+        """Загружает записи и считает ETag по ним, каталогу проектов и параметрам запроса"""
+        with phase("projects"):
+            project_map = await self.clockify_client.project_catalog.get_project_names()
+        with phase("fetch"):
+            entries = await self._fetch_entries(start_date, end_date)
+        ENTRIES_PER_REQUEST.labels("daily").observe(len(entries))
+        with phase("etag"):
+            etag = timeline_etag(request_key, entries, project_map)
+        return entries, etag
+    
+    async def _build_daily_timeline(self, start_date: date, end_date: date, gap_minutes: Optional[int] = None,
+                                    entries: Optional[List[ClockifyTimeEntrySlim]] = None) -> DailyTimelineResponse:
+        """Строит ежедневную временную шкалу: загрузка записей (если они не переданы), группировка и сводка"""
         logger.info("Processing daily timeline request", start_date=start_date, end_date=end_date)
         
-        # Получаем временные записи
-        entries = await self.clockify_client.get_time_entries(start_date, end_date)
+        if entries is None:
+            # Каталог проектов нужен группировке; загружаем его заранее, чтобы фазы не смешивались
+            with phase("projects"):
+                await self.clockify_client.project_catalog.get_project_names()
+            
+            # Получаем временные записи
+            with phase("fetch"):
+                entries = await self._fetch_entries(start_date, end_date)
+            ENTRIES_PER_REQUEST.labels("daily").observe(len(entries))
         
         # Группируем по дням
-        days_data = await self._group_by_days(entries)
+        with phase("grouping"):
+            days_data = await self._group_by_days(entries, gap_minutes, (start_date, end_date))
         
         # Рассчитываем статистику
-        summary = self._calculate_daily_summary(days_data, start_date, end_date)
+        with phase("summary"):
+            summary = self._calculate_daily_summary(days_data, start_date, end_date)
         
         logger.info("Daily timeline processed successfully", 
                    active_days=summary.active_days, 
@@ -42,24 +182,82 @@ class TimelineService:
         
         return DailyTimelineResponse(days=days_data, summary=summary)
     
-    async def get_project_timeline(self, start_date: date, end_date: date, project_name: str) -> ProjectTimelineResponse:
+    async def stream_daily_timeline(self, start_date: date, end_date: date,
+                                    merge_gap_minutes: Optional[int] = None) -> AsyncIterator[Union[DailyTimelineDayLine, DailyTimelineSummaryLine]]:
+        """Отдает дни по мере готовности окно за окном, затем сводку; весь период в памяти не держится"""
+        logger.info("Streaming daily timeline", start_date=start_date, end_date=end_date)
+        gap_minutes = self._gap_minutes(merge_gap_minutes)
+        
+        project_map = await self.clockify_client.project_catalog.get_project_names()
+        shards = split_date_range(start_date, end_date, settings.time_entries_shard_days)
+        pending = defaultdict(lambda: defaultdict(list))
+        descriptions = DescriptionTable()
+        summary = DailySummaryBuilder()
+        # Записи на границах окон приходят в оба окна; в памяти держим только их id
+        seen_ids: Set[str] = set()
+        
+        # Следующее окно загружается, пока обрабатывается текущее
+        next_fetch = asyncio.ensure_future(self._fetch_entries(*shards[0]))
+        try:
+            for index, (_, shard_end) in enumerate(shards):
+                entries = await next_fetch
+                next_fetch = None
+                if index + 1 < len(shards):
+                    next_fetch = asyncio.ensure_future(self._fetch_entries(*shards[index + 1]))
+                
+                entries = [entry for entry in entries if entry.id not in seen_ids]
+                seen_ids.update(entry.id for entry in entries)
+                self._bucket_by_days(entries, project_map, descriptions, pending, (start_date, end_date))
+                
+                # Окна нарезаны по UTC: локальные дни до конца окна (с учетом пояса) уже полные
+                shard_end_local = datetime(shard_end.year, shard_end.month, shard_end.day) + timedelta(days=1, hours=settings.timezone_offset)
+                ready = sorted(day_key for day_key in pending if day_key < shard_end_local.date().isoformat())
+                for day_key in ready:
+                    day_data = self._finalize_day(day_key, pending.pop(day_key), descriptions, gap_minutes)
+                    summary.add_day(day_data)
+                    yield DailyTimelineDayLine(date=day_key, day=day_data)
+        finally:
+            _discard_prefetch(next_fetch)
+        
+        for day_key in sorted(pending):
+            day_data = self._finalize_day(day_key, pending[day_key], descriptions, gap_minutes)
+            summary.add_day(day_data)
+            yield DailyTimelineDayLine(date=day_key, day=day_data)
+        
+        yield DailyTimelineSummaryLine(summary=summary.build(start_date, end_date))
+        logger.info("Daily timeline streamed", active_days=summary.active_days)
+    
+    async def get_project_timeline(self, start_date: date, end_date: date, project_name: str,
+                                   merge_gap_minutes: Optional[int] = None) -> ProjectTimelineResponse:
         """Получает временную шкалу для конкретного проекта"""
+        gap_minutes = self._gap_minutes(merge_gap_minutes)
+        key = self._request_key("project", start_date, end_date, gap_minutes, project_name)
+        return await timeline_requests.do(key, lambda: self._build_project_timeline(start_date, end_date, project_name, gap_minutes))
+    
+    async def _build_project_timeline(self, start_date: date, end_date: date, project_name: str,
+                                      gap_minutes: Optional[int] = None) -> ProjectTimelineResponse:
+        """Строит временную шкалу проекта: проверка проекта, загрузка записей, группировка и сводка"""
         logger.info("Processing project timeline request", 
                    start_date=start_date, end_date=end_date, project=project_name)
         
         # Проверяем существование проекта
-        project = await self.clockify_client.get_project_by_name(project_name)
+        with phase("projects"):
+            project = await self.clockify_client.get_project_by_name(project_name)
         if not project:
             raise ValueError(f"Project '{project_name}' not found")
         
         # Получаем временные записи
-        entries = await self.clockify_client.get_time_entries(start_date, end_date)
+        with phase("fetch"):
+            entries = await self._fetch_entries(start_date, end_date)
+        ENTRIES_PER_REQUEST.labels("project").observe(len(entries))
         
         # Группируем по дням
-        days_data = await self._group_project_by_days(entries, project_name)
+        with phase("grouping"):
+            days_data = await self._group_project_by_days(entries, project_name, gap_minutes, (start_date, end_date))
         
         # Рассчитываем статистику
-        summary = self._calculate_project_summary(days_data, start_date, end_date)
+        with phase("summary"):
+            summary = self._calculate_project_summary(days_data, start_date, end_date)
         
         logger.info("Project timeline processed successfully", 
                    project=project_name,
@@ -72,192 +270,303 @@ class TimelineService:
             summary=summary
         )
     
-    async def _group_by_days(self, entries: List[ClockifyTimeEntry]) -> Dict[str, DayData]:
-        """Группирует записи по дням и проектам"""
-        days_data = defaultdict(lambda: defaultdict(list))
-        
-        # Получаем все проекты для маппинга ID -> название
-        projects = await self.clockify_client.get_projects()
-        project_map = {project.id: project.name for project in projects}
+    async def get_team_timeline(self, start_date: date, end_date: date, user_ids: Optional[List[str]] = None,
+                                merge_gap_minutes: Optional[int] = None) -> TeamTimelineResponse:
+        """Получает ежедневные шкалы нескольких пользователей (по умолчанию всех активных участников)"""
+        gap_minutes = self._gap_minutes(merge_gap_minutes)
+        key = self._request_key("team", start_date, end_date, gap_minutes) + (tuple(user_ids or ()),)
+        return await timeline_requests.do(key, lambda: self._build_team_timeline(start_date, end_date, user_ids, gap_minutes))
+    
+    def _team_concurrency(self) -> int:
+        """Сколько запросов к API одновременно выполняет один командный запрос (на всех пользователей)"""
+        return max(1, min(settings.team_request_concurrency, settings.http_max_connections))
+    
+    async def _build_team_timeline(self, start_date: date, end_date: date, user_ids: Optional[List[str]],
+                                   gap_minutes: int) -> TeamTimelineResponse:
+        """Загружает записи пользователей параллельно в общем бюджете запросов и группирует их.
+        
+        Ошибки отдельных пользователей попадают в errors, остальные пользователи возвращаются;
+        если не удалось никого, пробрасывается первая ошибка.
+        """
+        user_names: Dict[str, Optional[str]] = {}
+        if not user_ids:
+            members = await self.clockify_client.get_workspace_users()
+            user_ids = [member.id for member in members]
+            user_names = {member.id: member.name for member in members}
+        if len(user_ids) > settings.team_max_users:
+            raise ValueError(f"Too many users: {len(user_ids)} (max {settings.team_max_users})")
+        
+        logger.info("Processing team timeline request", start_date=start_date, end_date=end_date, users=len(user_ids))
+        project_map = await self.clockify_client.project_catalog.get_project_names()
+        
+        # Один семафор на всех пользователей, окна и страницы; лимит запросов в секунду общий для процесса
+        semaphore = asyncio.Semaphore(self._team_concurrency())
+        results = await asyncio.gather(
+            *(self.clockify_client.get_time_entries(start_date, end_date, user_id=user_id, semaphore=semaphore) for user_id in user_ids),
+            return_exceptions=True
+        )
         
-        for entry in entries:
-            if not entry.timeInterval.get("end"):  # Пропускаем активные записи
+        users: Dict[str, TeamUserTimeline] = {}
+        errors: Dict[str, str] = {}
+        first_error: Optional[Exception] = None
+        team_summary = DailySummaryBuilder()
+        
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                logger.warning("Failed to fetch team member entries", user_id=user_id, error=str(result))
+                errors[user_id] = str(result)
+                first_error = first_error or result
                 continue
             
-            start_time = parse_clockify_time(entry.timeInterval["start"])
-            end_time = parse_clockify_time(entry.timeInterval["end"])
-            
-            day_key = start_time.date().isoformat()
-            
+            ENTRIES_PER_REQUEST.labels("team").observe(len(result))
+            descriptions = DescriptionTable()
+            days_data = {
+                day_key: self._finalize_day(day_key, projects, descriptions, gap_minutes, user_id)
+                for day_key, projects in self._bucket_by_days(result, project_map, descriptions, date_range=(start_date, end_date)).items()
+            }
+            for day_data in days_data.values():
+                team_summary.add_day(day_data)
+            users[user_id] = TeamUserTimeline(
+                user_name=user_names.get(user_id),
+                days=days_data,
+                summary=self._calculate_daily_summary(days_data, start_date, end_date)
+            )
+        
+        if first_error is not None and not users:
+            raise first_error
+        
+        totals = team_summary.build(start_date, end_date)
+        summary = TeamSummary(
+            period=totals.period,
+            users=len(users),
+            failed_users=len(errors),
+            total_time=totals.total_time,
+            project_totals=totals.project_totals
+        )
+        
+        logger.info("Team timeline processed", users=len(users), failed_users=len(errors), total_time=summary.total_time)
+        return TeamTimelineResponse(users=users, errors=errors, summary=summary)
+    
+    async def _group_by_days(self, entries: List[ClockifyTimeEntrySlim], gap_minutes: Optional[int] = None,
+                             date_range: Optional[Tuple[date, date]] = None) -> Dict[str, DayData]:
+        """Группирует записи по дням и проектам (только дни из date_range, если он задан)"""
+        gap_minutes = self._gap_minutes(gap_minutes)
+        
+        # Маппинг ID -> название из каталога проектов
+        project_map = await self.clockify_client.project_catalog.get_project_names()
+        
+        if self._use_numpy_engine():
+            # Векторная группировка считает весь период разом, кэш дней не используется
+            return columnar_timeline.group_by_days(entries, project_map, settings.timezone_offset, gap_minutes,
+                                                   settings.merge_dedupe_descriptions, date_range)
+        
+        descriptions = DescriptionTable()
+        days_data = self._bucket_by_days(entries, project_map, descriptions, date_range=date_range)
+        
+        # Обрабатываем каждый день; закрытые дни берем из кэша, если их записи не менялись
+        return {day_key: self._finalize_day(day_key, projects, descriptions, gap_minutes) for day_key, projects in days_data.items()}
+    
+    def _use_numpy_engine(self) -> bool:
+        """Выбрана ли векторная группировка (TIMELINE_ENGINE=numpy) и установлен ли numpy"""
+        if settings.timeline_engine != "numpy":
+            return False
+        if not columnar_timeline.is_available():
+            if not self._numpy_missing_logged:
+                logger.warning("TIMELINE_ENGINE=numpy but numpy is not installed, falling back to python engine")
+                self._numpy_missing_logged = True
+            return False
+        return True
+    
+    def _bucket_by_days(self, entries: List[ClockifyTimeEntrySlim], project_map: Dict[str, str], descriptions: DescriptionTable,
+                        days_data: Optional[Dict[str, Dict[str, List[Interval]]]] = None,
+                        date_range: Optional[Tuple[date, date]] = None) -> Dict[str, Dict[str, List[Interval]]]:
+        """Раскладывает завершенные записи по дням и проектам (добавляя в days_data, если он передан).
+
+        Записи через полночь режутся на куски по локальным дням: итог дня зависит только от его кусков.
+        Куски вне date_range (локальные дни запроса) отбрасываются.
+        """
+        if days_data is None:
+            days_data = defaultdict(lambda: defaultdict(list))
+        first_day, last_day = _day_key_bounds(date_range)
+        
+        # Пропускаем активные записи; время всех записей разбираем одним вызовом
+        finished = [entry for entry in entries if entry.timeInterval.get("end")]
+        starts = parse_clockify_epochs([entry.timeInterval["start"] for entry in finished])
+        ends = parse_clockify_epochs([entry.timeInterval["end"] for entry in finished])
+        
+        for entry, start, end in zip(finished, starts, ends):
             # Получаем название проекта
             project_name = "Unnamed"
             if entry.projectId and entry.projectId in project_map:
                 project_name = project_map[entry.projectId]
             
-            # Сохраняем описание временной записи
-            description = entry.description if entry.description else None
-            
-            days_data[day_key][project_name].append((start_time, end_time, description))
+            # Описание храним номером в таблице описаний
+            description_id = descriptions.intern(entry.description)
+            for slice_start, slice_end in split_at_midnight(start, end):
+                day_key = epoch_day_key(slice_start)
+                if first_day <= day_key <= last_day:
+                    days_data[day_key][project_name].append(Interval(slice_start, slice_end, description_id))
+        
+        return days_data
+    
+    def _fingerprint(self, intervals: List[Interval], descriptions: DescriptionTable) -> Tuple:
+        """Отпечаток записей для кэша дня; номера описаний живут в пределах запроса, поэтому берем текст"""
+        return tuple((interval.start, interval.end, descriptions.text(interval.description_id)) for interval in intervals)
+    
+    def _finalize_day(self, day_key: str, projects: Dict[str, List[Interval]], descriptions: DescriptionTable, gap_minutes: int,
+                      user_id: Optional[str] = None) -> DayData:
+        """Считает день или берет его из кэша, если день закрыт и его записи не менялись"""
+        if not self._is_closed_day(day_key):
+            return self._build_day_data(projects, descriptions, gap_minutes)
+        
+        cache_key = self._day_cache_key("daily", day_key, gap_minutes, user_id=user_id)
+        fingerprint = hash(tuple((project_name, self._fingerprint(intervals, descriptions)) for project_name, intervals in projects.items()))
+        cached = day_result_cache.get(cache_key, fingerprint)
+        if cached is not None:
+            return cached
+        
+        day_data = self._build_day_data(projects, descriptions, gap_minutes)
+        day_result_cache.put(cache_key, fingerprint, day_data)
+        return day_data
+    
+    def _time_blocks(self, intervals: List[Interval], descriptions: DescriptionTable, gap_minutes: int) -> Tuple[List[TimeBlock], float]:
+        """Объединяет соседние интервалы и строит TimeBlock; возвращает блоки и сумму часов"""
+        time_blocks = []
+        total_hours = 0.0
         
-        # Обрабатываем каждый день
-        result = {}
-        for day_key, projects in days_data.items():
-            day_projects = {}
-            day_total = 0.0
+        for merged in merge_intervals(intervals, gap_minutes * 60, settings.merge_dedupe_descriptions):
+            seconds = merged.seconds
+            total_hours += round(seconds / 3600, 1)
             
-            for project_name, time_blocks in projects.items():
-                # Объединяем соседние блоки (но сохраняем описания)
-                merged_blocks = self._merge_adjacent_blocks_with_descriptions(time_blocks)
-                
-                # Создаем TimeBlock объекты
-                formatted_blocks = []
-                project_total = 0.0
-                
-                for start, end, description in merged_blocks:
-                    duration_str = calculate_duration(start, end)
-                    hours = calculate_hours(start, end)
-                    project_total += hours
-                    
-                    formatted_blocks.append(TimeBlock(
-                        start_time=format_time_only(start),
-                        end_time=format_time_only(end),
-                        duration=duration_str,
-                        description=description
-                    ))
-                
-                day_projects[project_name] = ProjectData(
-                    total_hours=round(project_total, 1),
-                    time_blocks=formatted_blocks,
-                    description=None  # Убираем описание проекта, оставляем только описание временных блоков
-                )
-                day_total += project_total
+            # Строки и модели ответа создаются только здесь
+            time_blocks.append(TimeBlock(
+                start_time=format_clock(merged.start),
+                end_time=format_clock(merged.end),
+                duration=format_hms(seconds),
+                description=descriptions.join(merged.description_ids)
+            ))
+        
+        return time_blocks, total_hours
+    
+    def _build_day_data(self, projects: Dict[str, List[Interval]], descriptions: DescriptionTable, gap_minutes: int) -> DayData:
+        """Считает один день: объединяет блоки каждого проекта и суммирует часы"""
+        day_projects = {}
+        day_total = 0.0
+        
+        for project_name, intervals in projects.items():
+            # Объединяем соседние блоки (но сохраняем описания)
+            time_blocks, project_total = self._time_blocks(intervals, descriptions, gap_minutes)
             
-            result[day_key] = DayData(
-                projects=day_projects,
-                day_total=round(day_total, 1)
+            day_projects[project_name] = ProjectData(
+                total_hours=round(project_total, 1),
+                time_blocks=time_blocks,
+                description=None  # Убираем описание проекта, оставляем только описание временных блоков
             )
+            day_total += project_total
         
-        return result
+        return DayData(
+            projects=day_projects,
+            day_total=round(day_total, 1)
+        )
     
-    def _merge_adjacent_blocks_with_descriptions(self, blocks: List[Tuple[datetime, datetime, Optional[str]]]) -> List[Tuple[datetime, datetime, Optional[str]]]:
-        """Объединяет соседние временные блоки с сохранением описаний"""
-        if not blocks:
-            return []
-        
-        # Sort by start time
-        sorted_blocks = sorted(blocks, key=lambda x: x[0])
-        merged = [sorted_blocks[0]]
-        
-        for current_start, current_end, current_desc in sorted_blocks[1:]:
-            last_start, last_end, last_desc = merged[-1]
-            
-            # Check if gap is less than 5 minutes
-            gap = (current_start - last_end).total_seconds() / 60
-            if gap <= 5:
-                # Merge blocks - объединяем описания если они есть
-                merged_description = None
-                if last_desc and current_desc:
-                    merged_description = f"{last_desc}, {current_desc}"
-                elif last_desc:
-                    merged_description = last_desc
-                elif current_desc:
-                    merged_description = current_desc
-                
-                merged[-1] = (last_start, max(last_end, current_end), merged_description)
-            else:
-                merged.append((current_start, current_end, current_desc))
-        
-        return merged
+    def _closed_until(self) -> date:
+        """Последний закрытый день - достаточно старый, чтобы его записи почти не менялись"""
+        local_today = (datetime.now(timezone.utc) + timedelta(hours=settings.timezone_offset)).date()
+        return local_today - timedelta(days=settings.day_cache_closed_after_days)
+    
+    def _is_closed_day(self, day_key: str) -> bool:
+        """Закрытый день можно брать из кэша дней"""
+        return settings.day_cache_enabled and day_key <= self._closed_until().isoformat()
+    
+    def cache_control(self, end_date: date) -> Optional[str]:
+        """Cache-Control ответа: для периода из одних закрытых дней можно задать отдельные директивы"""
+        if settings.timeline_cache_control_closed and end_date <= self._closed_until():
+            return settings.timeline_cache_control_closed
+        return settings.timeline_cache_control or None
+    
+    def _day_cache_key(self, kind: str, day_key: str, gap_minutes: int, project_name: Optional[str] = None,
+                       user_id: Optional[str] = None) -> Tuple:
+        """Ключ кэша дня: день, пользователь, часовой пояс и настройки объединения блоков"""
+        return (
+            kind,
+            self.clockify_client.workspace_id,
+            user_id or self.clockify_client.user_id,
+            project_name,
+            day_key,
+            settings.timezone_offset,
+            gap_minutes,
+            settings.merge_dedupe_descriptions
+        )
+    
+    def _merge_adjacent_blocks_with_descriptions(self, blocks: List[Tuple[datetime, datetime, Optional[str]]],
+                                                 gap_minutes: Optional[int] = None) -> List[Tuple[datetime, datetime, Optional[str]]]:
+        """Объединяет соседние временные блоки с сохранением описаний (кортежи datetime; сам сервис работает с Interval)"""
+        return merge_blocks(blocks, self._gap_minutes(gap_minutes), settings.merge_dedupe_descriptions)
     
-    async def _group_project_by_days(self, entries: List[ClockifyTimeEntry], project_name: str) -> Dict[str, ProjectDayData]:
-        """Группирует записи проекта по дням"""
+    async def _group_project_by_days(self, entries: List[ClockifyTimeEntrySlim], project_name: str,
+                                     gap_minutes: Optional[int] = None,
+                                     date_range: Optional[Tuple[date, date]] = None) -> Dict[str, ProjectDayData]:
+        """Группирует записи проекта по дням (только дни из date_range, если он задан)"""
+        gap_minutes = self._gap_minutes(gap_minutes)
         days_data = defaultdict(list)
+        first_day, last_day = _day_key_bounds(date_range)
         
-        # Получаем все проекты для маппинга ID -> название
-        projects = await self.clockify_client.get_projects()
-        project_map = {project.id: project.name for project in projects}
-        
-        # Находим ID проекта по названию
-        project_id = None
-        for pid, pname in project_map.items():
-            if pname == project_name:
-                project_id = pid
-                break
-        
-        if not project_id:
+        # Находим ID проекта по названию через каталог проектов
+        project = await self.clockify_client.project_catalog.get_by_name(project_name)
+        if not project:
             return {}
-        
-        for entry in entries:
-            if not entry.timeInterval.get("end"):  # Пропускаем активные записи
-                continue
-            
-            if entry.projectId != project_id:  # Фильтруем только нужный проект
-                continue
-            
-            start_time = parse_clockify_time(entry.timeInterval["start"])
-            end_time = parse_clockify_time(entry.timeInterval["end"])
-            
-            day_key = start_time.date().isoformat()
-            description = entry.description if entry.description else None
-            days_data[day_key].append((start_time, end_time, description))
-        
-        # Обрабатываем каждый день
+        project_id = project.id
+        
+        # Только завершенные записи нужного проекта
+        finished = [entry for entry in entries if entry.projectId == project_id and entry.timeInterval.get("end")]
+        starts = parse_clockify_epochs([entry.timeInterval["start"] for entry in finished])
+        ends = parse_clockify_epochs([entry.timeInterval["end"] for entry in finished])
+        descriptions = DescriptionTable()
+        
+        for entry, start, end in zip(finished, starts, ends):
+            # Записи через полночь делятся между днями
+            description_id = descriptions.intern(entry.description)
+            for slice_start, slice_end in split_at_midnight(start, end):
+                day_key = epoch_day_key(slice_start)
+                if first_day <= day_key <= last_day:
+                    days_data[day_key].append(Interval(slice_start, slice_end, description_id))
+        
+        # Обрабатываем каждый день; закрытые дни берем из кэша, если их записи не менялись
         result = {}
-        for day_key, time_blocks in days_data.items():
-            # Объединяем соседние блоки с сохранением описаний
-            merged_blocks = self._merge_adjacent_blocks_with_descriptions(time_blocks)
-            
-            # Создаем TimeBlock объекты
-            formatted_blocks = []
-            day_total = 0.0
+        for day_key, intervals in days_data.items():
+            cache_key = None
+            if self._is_closed_day(day_key):
+                cache_key = self._day_cache_key("project", day_key, gap_minutes, project_name)
+                fingerprint = hash(self._fingerprint(intervals, descriptions))
+                cached = day_result_cache.get(cache_key, fingerprint)
+                if cached is not None:
+                    result[day_key] = cached
+                    continue
             
-            for start, end, description in merged_blocks:
-                duration_str = calculate_duration(start, end)
-                hours = calculate_hours(start, end)
-                day_total += hours
-                
-                formatted_blocks.append(TimeBlock(
-                    start_time=format_time_only(start),
-                    end_time=format_time_only(end),
-                    duration=duration_str,
-                    description=description
-                ))
-            
-            result[day_key] = ProjectDayData(
-                total_hours=round(day_total, 1),
-                time_blocks=formatted_blocks
-            )
+            result[day_key] = self._build_project_day_data(intervals, descriptions, gap_minutes)
+            if cache_key is not None:
+                day_result_cache.put(cache_key, fingerprint, result[day_key])
         
         return result
     
+    def _build_project_day_data(self, intervals: List[Interval], descriptions: DescriptionTable, gap_minutes: int) -> ProjectDayData:
+        """Считает один день проекта: объединяет блоки и суммирует часы"""
+        # Объединяем соседние блоки с сохранением описаний
+        time_blocks, day_total = self._time_blocks(intervals, descriptions, gap_minutes)
+        
+        return ProjectDayData(
+            total_hours=round(day_total, 1),
+            time_blocks=time_blocks
+        )
+    
     def _calculate_daily_summary(self, days_data: Dict[str, DayData], start_date: date, end_date: date) -> DailySummary:
         """Рассчитывает сводку для ежедневной временной шкалы"""
-        active_days = len(days_data)
-        period_str = f"{start_date.isoformat()} to {end_date.isoformat()}"
-        
-        # Собираем статистику по проектам
-        project_totals = defaultdict(float)
-        total_hours = 0.0
-        
+        summary = DailySummaryBuilder()
         for day_data in days_data.values():
-            total_hours += day_data.day_total
-            for project_name, project_data in day_data.projects.items():
-                project_totals[project_name] += project_data.total_hours
-        
-        # Форматируем статистику проектов
-        formatted_project_totals = {}
-        for project_name, hours in project_totals.items():
-            formatted_project_totals[project_name] = ProjectSummary(
-                hours=round(hours, 1),
-                formatted=format_duration(hours)
-            )
-        
-        return DailySummary(
-            period=period_str,
-            active_days=active_days,
-            total_time=format_duration(total_hours),
-            project_totals=formatted_project_totals
-        )
+            summary.add_day(day_data)
+        return summary.build(start_date, end_date)
     
     def _calculate_project_summary(self, days_data: Dict[str, ProjectDayData], start_date: date, end_date: date) -> ProjectTimelineSummary:
         """Рассчитывает сводку для временной шкалы проекта"""
@@ -0,0 +1,34 @@
+import hashlib
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from app.schemas.clockify import ClockifyTimeEntrySlim
+
+# Меняется вместе с форматом ответа, чтобы старые ETag не совпали с телом нового формата
+ETAG_VERSION = 1
+
+
+def timeline_etag(params: Iterable, entries: Iterable[ClockifyTimeEntrySlim], project_map: Dict[str, str]) -> str:
+    """Сильный ETag по параметрам запроса, каталогу проектов и полям записей, от которых зависит ответ.
+
+    Считается по исходным записям до группировки; blake2b не зависит от PYTHONHASHSEED,
+    поэтому ETag одинаков во всех процессах сервиса.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((ETAG_VERSION, *params)).encode())
+    digest.update(repr(sorted(project_map.items())).encode())
+    digest.update("\x1e".join(
+        f"{entry.id}\x1f{entry.projectId}\x1f{entry.timeInterval.get('start')}\x1f{entry.timeInterval.get('end')}\x1f{entry.description}"
+        for entry in entries
+    ).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def parse_if_none_match(header: Optional[str]) -> FrozenSet[str]:
+    """Значения If-None-Match без префикса W/ (для этого заголовка сравнение слабое); "*" сохраняется"""
+    if not header:
+        return frozenset()
+    return frozenset(tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip())
+
+
+def etag_matches(etag: str, if_none_match: FrozenSet[str]) -> bool:
+    return etag in if_none_match or "*" in if_none_match
@@ -0,0 +1,179 @@
+from datetime import date, datetime, timedelta
+from itertools import islice
+from operator import le
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+SECONDS_PER_DAY = 86400
+_EPOCH_DATE = date(1970, 1, 1)
+
+# Номер описания для блоков без описания
+NO_DESCRIPTION = None
+
+
+class DescriptionTable:
+    """Интернирует описания записей: интервалы хранят номер строки, а не саму строку"""
+
+    __slots__ = ("_ids", "texts")
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.texts: List[str] = []
+
+    def intern(self, text: Optional[str]) -> Optional[int]:
+        if not text:
+            return NO_DESCRIPTION
+        description_id = self._ids.get(text)
+        if description_id is None:
+            description_id = self._ids[text] = len(self.texts)
+            self.texts.append(text)
+        return description_id
+
+    def text(self, description_id: Optional[int]) -> Optional[str]:
+        return self.texts[description_id] if description_id is not NO_DESCRIPTION else None
+
+    def join(self, description_ids: List[int]) -> Optional[str]:
+        """Склеивает описания объединенного блока через запятую"""
+        if not description_ids:
+            return None
+        texts = self.texts
+        return ", ".join([texts[description_id] for description_id in description_ids])
+
+
+class Interval:
+    """Временной блок записи: локальные секунды от эпохи и номер описания в DescriptionTable"""
+
+    __slots__ = ("start", "end", "description_id")
+
+    def __init__(self, start: int, end: int, description_id: Optional[int] = NO_DESCRIPTION):
+        self.start = start
+        self.end = end
+        self.description_id = description_id
+
+    def __repr__(self) -> str:
+        return f"Interval({self.start}, {self.end}, {self.description_id})"
+
+
+class MergedInterval:
+    """Результат объединения соседних интервалов: границы и метки (описания) в порядке блоков"""
+
+    __slots__ = ("start", "end", "description_ids")
+
+    def __init__(self, start: Any, end: Any, description_ids: List[Hashable]):
+        self.start = start
+        self.end = end
+        self.description_ids = description_ids
+
+    @property
+    def seconds(self) -> int:
+        return self.end - self.start
+
+
+def _is_sorted(values: Sequence[Any]) -> bool:
+    return all(map(le, values, islice(values, 1, None)))
+
+
+def sweep_merge(starts: Sequence[Any], ends: Sequence[Any], labels: Sequence[Optional[Hashable]],
+                gap: Any, dedupe: bool = False) -> List[MergedInterval]:
+    """Sweep-line объединение отрезков, между которыми не больше gap.
+
+    Работает с любыми упорядоченными границами (секунды или datetime с gap-timedelta). Метки
+    (описания) копятся списком в порядке начала; None пропускается, при dedupe повторы внутри
+    блока отбрасываются. Уже отсортированный вход (Clockify отдает записи по времени) не сортируется.
+    """
+    count = len(starts)
+    if _is_sorted(starts):
+        order = range(count)
+    else:
+        order = sorted(range(count), key=starts.__getitem__)
+
+    merged: List[MergedInterval] = []
+    current: Optional[MergedInterval] = None
+    seen = None
+
+    for index in order:
+        start = starts[index]
+        end = ends[index]
+        if current is not None and start - current.end <= gap:
+            if end > current.end:
+                current.end = end
+        else:
+            current = MergedInterval(start, end, [])
+            merged.append(current)
+            if dedupe:
+                seen = set()
+
+        label = labels[index]
+        if label is None:
+            continue
+        if dedupe:
+            if label in seen:
+                continue
+            seen.add(label)
+        current.description_ids.append(label)
+
+    return merged
+
+
+def merge_intervals(intervals: List[Interval], gap_seconds: int, dedupe: bool = False) -> List[MergedInterval]:
+    """Объединяет Interval, между которыми не больше gap_seconds; описания копятся номерами"""
+    return sweep_merge(
+        [interval.start for interval in intervals],
+        [interval.end for interval in intervals],
+        [interval.description_id for interval in intervals],
+        gap_seconds,
+        dedupe
+    )
+
+
+def merge_blocks(blocks: List[Tuple[datetime, datetime, Optional[str]]], gap_minutes: int,
+                 dedupe: bool = False) -> List[Tuple[datetime, datetime, Optional[str]]]:
+    """То же объединение для блоков-кортежей (начало, конец, описание); описания склеиваются через запятую"""
+    merged = sweep_merge(
+        [block[0] for block in blocks],
+        [block[1] for block in blocks],
+        [block[2] or None for block in blocks],
+        timedelta(minutes=gap_minutes),
+        dedupe
+    )
+    return [(block.start, block.end, ", ".join(block.description_ids) or None) for block in merged]
+
+
+def split_at_midnight(start: int, end: int) -> Sequence[Tuple[int, int]]:
+    """Режет интервал (локальные секунды от эпохи) по полуночи на куски внутри одного дня.
+
+    Интервал в пределах дня возвращается как есть; конец куска совпадает с началом следующего дня.
+    """
+    midnight = start - start % SECONDS_PER_DAY + SECONDS_PER_DAY
+    if end <= midnight:
+        return ((start, end),)
+
+    slices = []
+    while end > midnight:
+        slices.append((start, midnight))
+        start = midnight
+        midnight += SECONDS_PER_DAY
+    slices.append((start, end))
+    return slices
+
+
+_day_keys: Dict[int, str] = {}
+
+
+def day_key(epoch_seconds: int) -> str:
+    """Дата ('2024-10-01') для локальных секунд от эпохи"""
+    day_number = epoch_seconds // SECONDS_PER_DAY
+    key = _day_keys.get(day_number)
+    if key is None:
+        key = _day_keys[day_number] = (_EPOCH_DATE + timedelta(days=day_number)).isoformat()
+    return key
+
+
+def format_clock(epoch_seconds: int) -> str:
+    """Время суток в формате HH:MM"""
+    seconds = epoch_seconds % SECONDS_PER_DAY
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+
+def format_hms(seconds: int) -> str:
+    """Длительность в формате HH:MM:SS"""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import structlog
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Объединяет конкурентные вызовы с одинаковым ключом в одно вычисление"""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _finish(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Помечаем исключение полученным, даже если все ожидающие были отменены
+        if not flight.cancelled():
+            flight.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Выполняет func один раз на ключ; конкурентные вызовы с тем же ключом получают общий результат"""
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            logger.debug("Coalesced in-flight request", key=str(key))
+        else:
+            self.leaders += 1
+            flight = asyncio.ensure_future(func())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda finished: self._finish(key, finished))
+
+        # shield: отключение одного клиента не должно отменять вычисление для остальных
+        return await asyncio.shield(flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики выполненных и объединенных вызовов"""
+        return {
+            "in_flight": len(self._flights),
+            "executed": self.leaders,
+            "coalesced": self.coalesced
+        }
@@ -1,7 +1,8 @@
-from datetime import datetime, timedelta
-from typing import List, Tuple
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Tuple
 import structlog
 from app.core.config import settings
+from app.utils.intervals import sweep_merge
 
 logger = structlog.get_logger()
 
@@ -11,23 +12,89 @@ def format_duration(hours: float) -> str:
     m = int((hours - h) * 60)
     return f"{h}h {m}m"
 
+def _accepts_z_suffix() -> bool:
+    """Понимает ли datetime.fromisoformat суффикс 'Z' (Python 3.11+)"""
+    try:
+        datetime.fromisoformat("2024-01-01T00:00:00Z")
+    except ValueError:
+        return False
+    return True
+
+_NATIVE_Z = _accepts_z_suffix()
+_fromisoformat = datetime.fromisoformat
+
+class ClockifyTimeParser:
+    """Разбор времени Clockify ('2024-10-01T06:55:00Z', в том числе с долями секунды) в локальное время.
+    
+    Смещение часового пояса считается один раз при создании, а не на каждую строку.
+    """
+    
+    __slots__ = ("offset_hours", "_offset", "_offset_seconds")
+    
+    def __init__(self, offset_hours: int):
+        self.offset_hours = offset_hours
+        self._offset = timedelta(hours=offset_hours)
+        self._offset_seconds = offset_hours * 3600
+    
+    def _parse_utc(self, iso_string: str) -> datetime:
+        if not _NATIVE_Z and iso_string[-1:] == "Z":
+            iso_string = iso_string[:-1] + "+00:00"
+        return _fromisoformat(iso_string)
+    
+    def parse(self, iso_string: str) -> datetime:
+        try:
+            return self._parse_utc(iso_string) + self._offset
+        except (ValueError, TypeError) as e:
+            logger.error("Failed to parse time", time_string=iso_string, error=str(e))
+            raise ValueError(f"Invalid time format: {iso_string}")
+    
+    def parse_many(self, iso_strings: List[str]) -> List[datetime]:
+        """Разбирает список строк за один проход"""
+        offset = self._offset
+        try:
+            if _NATIVE_Z:
+                return [_fromisoformat(value) + offset for value in iso_strings]
+            parse_utc = self._parse_utc
+            return [parse_utc(value) + offset for value in iso_strings]
+        except (ValueError, TypeError):
+            # Находим и логируем первую некорректную строку
+            for value in iso_strings:
+                self.parse(value)
+            raise
+    
+    def epoch_many(self, iso_strings: List[str]) -> List[int]:
+        """Разбирает список строк в локальные секунды от эпохи (доли секунды отбрасываются)"""
+        offset = self._offset_seconds
+        try:
+            parse_utc = _fromisoformat if _NATIVE_Z else self._parse_utc
+            return [int(parse_utc(value).timestamp()) + offset for value in iso_strings]
+        except (ValueError, TypeError):
+            for value in iso_strings:
+                self.parse(value)
+            raise
+
+_parsers: Dict[int, ClockifyTimeParser] = {}
+
+def get_clockify_time_parser() -> ClockifyTimeParser:
+    """Парсер для текущего TIMEZONE_OFFSET (создается один раз на значение смещения)"""
+    offset_hours = settings.timezone_offset
+    parser = _parsers.get(offset_hours)
+    if parser is None:
+        parser = _parsers[offset_hours] = ClockifyTimeParser(offset_hours)
+    return parser
+
 def parse_clockify_time(iso_string: str) -> datetime:
     """Парсит ISO строку времени из Clockify API и конвертирует в локальный часовой пояс"""
-    try:
-        # Handle both with and without microseconds
-        if '.' in iso_string:
-            dt = datetime.fromisoformat(iso_string.replace('Z', '+00:00'))
-        else:
-            dt = datetime.fromisoformat(iso_string.replace('Z', '+00:00'))
-        
-        # Конвертируем из UTC в локальный часовой пояс
-        # Если TIMEZONE_OFFSET=3, то добавляем 3 часа к UTC чтобы получить локальное время GMT+3
-        local_dt = dt + timedelta(hours=settings.timezone_offset)
-        
-        return local_dt
-    except ValueError as e:
-        logger.error("Failed to parse time", time_string=iso_string, error=str(e))
-        raise ValueError(f"Invalid time format: {iso_string}")
+    # Если TIMEZONE_OFFSET=3, то добавляем 3 часа к UTC чтобы получить локальное время GMT+3
+    return get_clockify_time_parser().parse(iso_string)
+
+def parse_clockify_times(iso_strings: List[str]) -> List[datetime]:
+    """Парсит список ISO строк времени Clockify в локальное время одним вызовом"""
+    return get_clockify_time_parser().parse_many(iso_strings)
+
+def parse_clockify_epochs(iso_strings: List[str]) -> List[int]:
+    """Парсит список ISO строк времени Clockify в локальные секунды от эпохи"""
+    return get_clockify_time_parser().epoch_many(iso_strings)
 
 def calculate_duration(start: datetime, end: datetime) -> str:
     """Рассчитывает длительность между двумя временными точками в формате HH:MM:SS"""
@@ -49,27 +116,30 @@ def format_time_only(dt: datetime) -> str:
     """Форматирует время в формат HH:MM"""
     return dt.strftime("%H:%M")
 
-def merge_adjacent_blocks(blocks: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
-    """Объединяет соседние временные блоки (gap < 5 минут)"""
-    if not blocks:
-        return []
-    
-    # Sort by start time
-    sorted_blocks = sorted(blocks, key=lambda x: x[0])
-    merged = [sorted_blocks[0]]
+def merge_adjacent_blocks(blocks: List[Tuple[datetime, datetime]], gap_minutes: Optional[int] = None) -> List[Tuple[datetime, datetime]]:
+    """Объединяет соседние временные блоки (промежуток не больше MERGE_GAP_MINUTES)"""
+    if gap_minutes is None:
+        gap_minutes = settings.merge_gap_minutes
+    merged = sweep_merge(
+        [block[0] for block in blocks],
+        [block[1] for block in blocks],
+        [None] * len(blocks),
+        timedelta(minutes=gap_minutes)
+    )
+    return [(block.start, block.end) for block in merged]
+
+def split_date_range(start_date: date, end_date: date, shard_days: int) -> List[Tuple[date, date]]:
+    """Разбивает период на последовательные окна не длиннее shard_days дней"""
+    shard_days = max(1, shard_days)
+    shards = []
     
-    for current_start, current_end in sorted_blocks[1:]:
-        last_start, last_end = merged[-1]
-        
-        # Check if gap is less than 5 minutes
-        gap = (current_start - last_end).total_seconds() / 60
-        if gap <= 5:
-            # Merge blocks
-            merged[-1] = (last_start, max(last_end, current_end))
-        else:
-            merged.append((current_start, current_end))
+    shard_start = start_date
+    while shard_start <= end_date:
+        shard_end = min(shard_start + timedelta(days=shard_days - 1), end_date)
+        shards.append((shard_start, shard_end))
+        shard_start = shard_end + timedelta(days=1)
     
-    return merged
+    return shards
 
 def format_session_duration(hours: float) -> str:
     """Форматирует длительность сессии в формат HH:MM:SS"""
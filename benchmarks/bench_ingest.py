@@ -0,0 +1,80 @@
+"""Бенчмарк разбора страницы временных записей Clockify.
+
+Сравнивает прежний путь ([ClockifyTimeEntry(**entry) for entry in data]) с валидацией списка одним
+вызовом TypeAdapter - полной моделью и урезанной ClockifyTimeEntrySlim.
+
+    python -m benchmarks.bench_ingest --count 10000
+"""
+import argparse
+import os
+import random
+import time
+
+# Настройки приложения требуют учетных данных Clockify; для бенчмарка подходят любые
+os.environ.setdefault("CLOCKIFY_API_KEY", "benchmark-key")
+os.environ.setdefault("CLOCKIFY_WORKSPACE_ID", "benchmark-workspace")
+os.environ.setdefault("CLOCKIFY_USER_ID", "benchmark-user")
+
+from app.schemas.clockify import ClockifyTimeEntry, time_entries_adapter, full_time_entries_adapter  # noqa: E402
+
+
+def make_raw_entries(count: int, seed: int = 1):
+    """Записи в том виде, в каком их отдает Clockify API, со всеми полями, которые timeline не использует"""
+    rng = random.Random(seed)
+    entries = []
+    for index in range(count):
+        entries.append({
+            "id": f"{index:024x}",
+            "description": rng.choice(["Code review", "Planning", "", "Support ticket #" + str(index)]),
+            "tagIds": [f"tag{rng.randrange(10)}"],
+            "userId": "user123",
+            "billable": rng.random() < 0.5,
+            "taskId": None,
+            "projectId": f"project{rng.randrange(20)}",
+            "workspaceId": "workspace123",
+            "timeInterval": {
+                "start": "2024-10-01T06:55:00Z",
+                "end": "2024-10-01T07:55:00Z",
+                "duration": "PT1H"
+            },
+            "customFieldValues": [{"customFieldId": "cf1", "value": "x", "name": "Field"}],
+            "type": "REGULAR",
+            "kioskId": None,
+            "hourlyRate": {"amount": 5000, "currency": "USD"},
+            "costRate": {"amount": 3000, "currency": "USD"},
+            "isLocked": False
+        })
+    return entries
+
+
+def best_of(repeats: int, func) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest of Clockify time entries")
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    data = make_raw_entries(args.count)
+
+    results = {
+        "per-entry ClockifyTimeEntry": best_of(args.repeats, lambda: [ClockifyTimeEntry(**entry) for entry in data]),
+        "TypeAdapter full": best_of(args.repeats, lambda: full_time_entries_adapter.validate_python(data)),
+        "TypeAdapter slim": best_of(args.repeats, lambda: time_entries_adapter.validate_python(data)),
+    }
+
+    baseline = results["per-entry ClockifyTimeEntry"]
+    print(f"{args.count} entries, best of {args.repeats}")
+    for name, seconds in results.items():
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms  {seconds / args.count * 1e6:6.2f} us/entry  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Микро-бенчмарк разбора времени Clockify.
+
+Сравнивает прежнюю реализацию parse_clockify_time (replace + fromisoformat + timedelta на каждую строку)
+с текущей функцией и пакетным parse_clockify_times.
+
+    python -m benchmarks.bench_time_parsing --count 100000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+# Настройки приложения требуют учетных данных Clockify; для бенчмарка подходят любые
+os.environ.setdefault("CLOCKIFY_API_KEY", "benchmark-key")
+os.environ.setdefault("CLOCKIFY_WORKSPACE_ID", "benchmark-workspace")
+os.environ.setdefault("CLOCKIFY_USER_ID", "benchmark-user")
+
+from app.core.config import settings  # noqa: E402
+from app.utils.time_formatter import parse_clockify_time, parse_clockify_times  # noqa: E402
+
+
+def legacy_parse_clockify_time(iso_string: str) -> datetime:
+    """Реализация parse_clockify_time до введения ClockifyTimeParser"""
+    if '.' in iso_string:
+        dt = datetime.fromisoformat(iso_string.replace('Z', '+00:00'))
+    else:
+        dt = datetime.fromisoformat(iso_string.replace('Z', '+00:00'))
+    return dt + timedelta(hours=settings.timezone_offset)
+
+
+def make_timestamps(count: int, seed: int = 1):
+    """Случайные метки времени в форматах Clockify: без долей секунды и с миллисекундами"""
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    values = []
+    for _ in range(count):
+        moment = base + timedelta(seconds=rng.randrange(366 * 86400))
+        if rng.random() < 0.2:
+            values.append(moment.strftime("%Y-%m-%dT%H:%M:%S") + f".{rng.randrange(1000):03d}Z")
+        else:
+            values.append(moment.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    return values
+
+
+def best_of(repeats: int, func) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Clockify timestamp parsing")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    values = make_timestamps(args.count)
+    assert parse_clockify_times(values) == [legacy_parse_clockify_time(value) for value in values]
+
+    results = {
+        "legacy": best_of(args.repeats, lambda: [legacy_parse_clockify_time(value) for value in values]),
+        "parse_clockify_time": best_of(args.repeats, lambda: [parse_clockify_time(value) for value in values]),
+        "parse_clockify_times": best_of(args.repeats, lambda: parse_clockify_times(values)),
+    }
+
+    print(f"{args.count} timestamps, best of {args.repeats}")
+    for name, seconds in results.items():
+        speedup = results["legacy"] / seconds
+        print(f"  {name:<22} {seconds * 1000:8.1f} ms  {seconds / args.count * 1e9:6.0f} ns/item  x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Бенчмарк этапов timeline на синтетических данных с сохранением и сравнением baseline.
+
+Каждый этап меряется отдельно (лучшее из --repeats) на наборах от 10^3 до 10^6 записей:
+группировка по дням (обычная и numpy, если установлен), группировка проекта, объединение блоков,
+сводки и сериализация ответа. Кэш дней выключен, чтобы мерить расчет, а не попадания.
+
+    python -m benchmarks.bench_timeline --sizes 1000 10000 100000 --save benchmarks/baseline.json
+    python -m benchmarks.bench_timeline --sizes 1000 10000 100000 --compare benchmarks/baseline.json
+
+С --compare этапы, ставшие медленнее baseline больше чем в --threshold раз, помечаются REGRESSION,
+а код возврата становится 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Настройки приложения требуют учетных данных Clockify; для бенчмарка подходят любые
+os.environ.setdefault("CLOCKIFY_API_KEY", "benchmark-key")
+os.environ.setdefault("CLOCKIFY_WORKSPACE_ID", "benchmark-workspace")
+os.environ.setdefault("CLOCKIFY_USER_ID", "benchmark-user")
+os.environ.setdefault("DAY_CACHE_ENABLED", "false")
+os.environ.setdefault("TIMELINE_ENGINE", "python")
+
+from app.core.config import settings  # noqa: E402
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.schemas.clockify import ClockifyProject, time_entries_adapter  # noqa: E402
+from app.schemas.response import DailyTimelineResponse, ProjectTimelineResponse  # noqa: E402
+from app.services import columnar_timeline  # noqa: E402
+from app.services.project_catalog import ProjectCatalog  # noqa: E402
+from app.services.timeline_service import TimelineService  # noqa: E402
+from app.utils.intervals import Interval, merge_intervals  # noqa: E402
+from app.utils.time_formatter import parse_clockify_epochs  # noqa: E402
+from benchmarks.synthetic import generate_time_entries, make_projects  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def best_of(repeats: int, func: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def make_service(projects: List[Dict[str, Any]]) -> TimelineService:
+    """Сервис с каталогом синтетических проектов: к Clockify API бенчмарк не обращается"""
+    service = TimelineService()
+    catalog_projects = [ClockifyProject(**project) for project in projects]
+
+    async def load_projects():
+        return catalog_projects
+
+    service.clockify_client.project_catalog = ProjectCatalog(load_projects, ttl_minutes=60)
+    return service
+
+
+def run_suite(sizes: List[int], repeats: int = 3, users: int = 1, projects: int = 10, entries_per_day: int = 12,
+              midnight_share: float = 0.02, seed: int = 1) -> Dict[str, Any]:
+    """Меряет этапы на каждом размере; возвращает {"meta": ..., "results": {этап: {размер: секунды}}}"""
+    project_rows = make_projects(projects, seed)
+    project_name = project_rows[0]["name"]
+    service = make_service(project_rows)
+    gap_minutes = settings.merge_gap_minutes
+    start_date = date(2024, 1, 1)
+    loop = asyncio.new_event_loop()
+    results: Dict[str, Dict[str, float]] = {}
+
+    def record(stage: str, size: int, func: Callable[[], Any]):
+        results.setdefault(stage, {})[str(size)] = best_of(repeats, func)
+
+    try:
+        for size in sizes:
+            raw = generate_time_entries(size, users=users, projects=projects, entries_per_day=entries_per_day,
+                                        midnight_share=midnight_share, seed=seed)
+            entries = time_entries_adapter.validate_python(raw)
+            end_date = datetime.fromisoformat(raw[-1]["timeInterval"]["start"][:10]).date()
+
+            record("group_by_days", size, lambda: loop.run_until_complete(service._group_by_days(entries, gap_minutes)))
+            if columnar_timeline.is_available():
+                project_map = loop.run_until_complete(service.clockify_client.project_catalog.get_project_names())
+                record("group_by_days_numpy", size, lambda: columnar_timeline.group_by_days(
+                    entries, project_map, settings.timezone_offset, gap_minutes, settings.merge_dedupe_descriptions
+                ))
+            record("group_project_by_days", size, lambda: loop.run_until_complete(
+                service._group_project_by_days(entries, project_name, gap_minutes)
+            ))
+
+            starts = parse_clockify_epochs([entry.timeInterval["start"] for entry in entries])
+            ends = parse_clockify_epochs([entry.timeInterval["end"] for entry in entries])
+            intervals = [Interval(start, end, index % 50) for index, (start, end) in enumerate(zip(starts, ends))]
+            record("merge_intervals", size, lambda: merge_intervals(intervals, gap_minutes * 60))
+
+            days = loop.run_until_complete(service._group_by_days(entries, gap_minutes))
+            project_days = loop.run_until_complete(service._group_project_by_days(entries, project_name, gap_minutes))
+            record("daily_summary", size, lambda: service._calculate_daily_summary(days, start_date, end_date))
+            record("project_summary", size, lambda: service._calculate_project_summary(project_days, start_date, end_date))
+
+            daily = DailyTimelineResponse(days=days, summary=service._calculate_daily_summary(days, start_date, end_date))
+            project = ProjectTimelineResponse(
+                project_name=project_name, days=project_days,
+                summary=service._calculate_project_summary(project_days, start_date, end_date)
+            )
+            record("serialize_daily", size, lambda: FastJSONResponse(daily))
+            record("serialize_project", size, lambda: FastJSONResponse(project))
+    finally:
+        loop.close()
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "dataset": {"users": users, "projects": projects, "entries_per_day": entries_per_day,
+                        "midnight_share": midnight_share, "seed": seed}
+        },
+        "results": results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Сравнивает общие этапы и размеры; ratio > threshold - регрессия"""
+    rows = []
+    for stage, timings in current["results"].items():
+        for size, seconds in timings.items():
+            base = baseline["results"].get(stage, {}).get(size)
+            if base:
+                rows.append({"stage": stage, "size": size, "baseline": base, "current": seconds,
+                             "ratio": seconds / base, "regression": seconds / base > threshold})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark timeline pipeline stages on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--entries-per-day", type=int, default=12)
+    parser.add_argument("--midnight-share", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="Записать результаты в JSON (baseline)")
+    parser.add_argument("--compare", help="Сравнить с сохраненным baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Допустимое замедление относительно baseline")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.repeats, args.users, args.projects, args.entries_per_day,
+                       args.midnight_share, args.seed)
+
+    print(f"best of {args.repeats}, seconds")
+    for stage, timings in report["results"].items():
+        cells = "  ".join(f"{int(size):>8}: {seconds:9.4f}" for size, seconds in timings.items())
+        print(f"  {stage:<22} {cells}")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        rows = compare(report, baseline, args.threshold)
+        print(f"compared with {args.compare} (threshold x{args.threshold})")
+        for row in rows:
+            mark = "REGRESSION" if row["regression"] else ""
+            print(f"  {row['stage']:<22} {int(row['size']):>8}  x{row['ratio']:.2f}  {mark}")
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
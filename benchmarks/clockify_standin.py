@@ -0,0 +1,177 @@
+"""Локальная замена Clockify API для нагрузочных экспериментов и замеров задержек.
+
+Отдает те же endpoints, что использует ClockifyClient, по синтетическому набору из benchmarks.synthetic:
+настоящая пагинация, фильтр записей по периоду, задержка с jitter и инъекция 429 (с Retry-After) и 5xx.
+Один и тот же seed дает одинаковые данные и одинаковую последовательность ошибок.
+
+    STANDIN_ENTRIES=50000 STANDIN_LATENCY_MS=80 STANDIN_ERROR_RATE_429=0.02 \\
+        uvicorn benchmarks.clockify_standin:app --port 8081
+
+    CLOCKIFY_BASE_URL=http://127.0.0.1:8081/api/v1 uvicorn app.main:app
+
+Запросы к записям пользователя, которого нет в наборе, отдают пустой список. Чтобы у сервиса были
+данные, добавьте его CLOCKIFY_USER_ID в STANDIN_USER_IDS. Счетчики запросов и ошибок - GET /standin/stats.
+"""
+import asyncio
+import bisect
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Header, Query
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic import generate_time_entries, make_projects, make_users
+
+
+@dataclass
+class StandinConfig:
+    entries: int = 10_000
+    users: int = 1
+    user_ids: Optional[List[str]] = None  # Свои ID пользователей вместо синтетических
+    projects: int = 10
+    entries_per_day: int = 12
+    midnight_share: float = 0.02
+    start: date = date(2024, 1, 1)
+    seed: int = 1
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate_429: float = 0.0
+    error_rate_5xx: float = 0.0
+    retry_after: float = 1.0  # Значение заголовка Retry-After у 429, секунды
+    max_page_size: int = 5000
+
+    @classmethod
+    def from_env(cls) -> "StandinConfig":
+        env = os.environ.get
+        user_ids = [user_id.strip() for user_id in env("STANDIN_USER_IDS", "").split(",") if user_id.strip()]
+        return cls(
+            entries=int(env("STANDIN_ENTRIES", cls.entries)),
+            users=int(env("STANDIN_USERS", cls.users)),
+            user_ids=user_ids or None,
+            projects=int(env("STANDIN_PROJECTS", cls.projects)),
+            entries_per_day=int(env("STANDIN_ENTRIES_PER_DAY", cls.entries_per_day)),
+            midnight_share=float(env("STANDIN_MIDNIGHT_SHARE", cls.midnight_share)),
+            start=date.fromisoformat(env("STANDIN_START", cls.start.isoformat())),
+            seed=int(env("STANDIN_SEED", cls.seed)),
+            latency_ms=float(env("STANDIN_LATENCY_MS", cls.latency_ms)),
+            jitter_ms=float(env("STANDIN_JITTER_MS", cls.jitter_ms)),
+            error_rate_429=float(env("STANDIN_ERROR_RATE_429", cls.error_rate_429)),
+            error_rate_5xx=float(env("STANDIN_ERROR_RATE_5XX", cls.error_rate_5xx)),
+            retry_after=float(env("STANDIN_RETRY_AFTER", cls.retry_after))
+        )
+
+
+@dataclass
+class StandinStats:
+    requests: int = 0
+    throttled: int = 0
+    server_errors: int = 0
+    by_endpoint: Dict[str, int] = field(default_factory=dict)
+
+
+def _error(status_code: int, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"message": message, "code": status_code}, status_code=status_code, headers=headers)
+
+
+def create_standin_app(config: Optional[StandinConfig] = None) -> FastAPI:
+    """Собирает ASGI-приложение с данными и поведением по config"""
+    config = config or StandinConfig()
+    rng = random.Random(config.seed)
+    users = make_users(config.users)
+    if config.user_ids:
+        users = [{"id": user_id, "name": user_id, "email": None, "status": "ACTIVE"} for user_id in config.user_ids]
+    projects = make_projects(config.projects, config.seed)
+    entries = generate_time_entries(
+        config.entries, projects=config.projects, entries_per_day=config.entries_per_day,
+        midnight_share=config.midnight_share, start=config.start, seed=config.seed,
+        user_ids=[user["id"] for user in users]
+    )
+
+    # Записи пользователя по возрастанию начала: период выбирается бисекцией по строкам ISO (формат один)
+    entries_by_user: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        entries_by_user.setdefault(entry["userId"], []).append(entry)
+    starts_by_user = {user_id: [entry["timeInterval"]["start"] for entry in rows] for user_id, rows in entries_by_user.items()}
+
+    stats = StandinStats()
+    app = FastAPI(title="Clockify API stand-in")
+    app.state.config = config
+    app.state.stats = stats
+
+    async def simulate(endpoint: str, api_key: Optional[str]) -> Optional[JSONResponse]:
+        """Задержка и инъекция ошибок; возвращает ответ-ошибку или None"""
+        stats.requests += 1
+        stats.by_endpoint[endpoint] = stats.by_endpoint.get(endpoint, 0) + 1
+
+        delay = config.latency_ms + rng.uniform(0, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if not api_key:
+            return _error(401, "Full authentication is required to access this resource")
+        roll = rng.random()
+        if roll < config.error_rate_429:
+            stats.throttled += 1
+            return _error(429, "Too many requests", {"Retry-After": f"{config.retry_after:g}"})
+        if roll < config.error_rate_429 + config.error_rate_5xx:
+            stats.server_errors += 1
+            return _error(503, "Service unavailable")
+        return None
+
+    def page_of(rows: List[Any], page: int, page_size: int) -> List[Any]:
+        page_size = min(page_size, config.max_page_size)
+        return rows[(page - 1) * page_size:page * page_size]
+
+    @app.get("/api/v1/workspaces/{workspace_id}")
+    async def get_workspace(workspace_id: str, x_api_key: Optional[str] = Header(None)):
+        error = await simulate("workspace", x_api_key)
+        return error or {"id": workspace_id, "name": "Stand-in workspace"}
+
+    @app.get("/api/v1/workspaces/{workspace_id}/projects")
+    async def get_projects(workspace_id: str, x_api_key: Optional[str] = Header(None)):
+        error = await simulate("projects", x_api_key)
+        return error or [{**project, "workspaceId": workspace_id} for project in projects]
+
+    @app.get("/api/v1/workspaces/{workspace_id}/users")
+    async def get_users(workspace_id: str, x_api_key: Optional[str] = Header(None),
+                        page: int = Query(1, ge=1), page_size: int = Query(50, ge=1, alias="page-size")):
+        error = await simulate("users", x_api_key)
+        return error or page_of(users, page, page_size)
+
+    @app.get("/api/v1/workspaces/{workspace_id}/user/{user_id}/time-entries")
+    async def get_time_entries(workspace_id: str, user_id: str, x_api_key: Optional[str] = Header(None),
+                               start: Optional[str] = None, end: Optional[str] = None,
+                               page: int = Query(1, ge=1), page_size: int = Query(50, ge=1, alias="page-size")):
+        error = await simulate("time-entries", x_api_key)
+        if error:
+            return error
+
+        rows = entries_by_user.get(user_id, [])
+        starts = starts_by_user.get(user_id, [])
+        low = bisect.bisect_left(starts, start) if start else 0
+        high = bisect.bisect_right(starts, end) if end else len(starts)
+        # Как Clockify: сначала новые записи
+        selected = rows[low:high][::-1]
+        return page_of(selected, page, page_size)
+
+    @app.get("/standin/stats")
+    async def get_stats():
+        return {
+            "requests": stats.requests,
+            "throttled": stats.throttled,
+            "server_errors": stats.server_errors,
+            "by_endpoint": stats.by_endpoint
+        }
+
+    return app
+
+
+def __getattr__(name: str):
+    """uvicorn benchmarks.clockify_standin:app - приложение с параметрами из STANDIN_* создается при первом обращении"""
+    if name == "app":
+        globals()["app"] = create_standin_app(StandinConfig.from_env())
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,273 @@
+"""Нагрузочный тест endpoints сервиса против локальной замены Clockify API.
+
+Поднимает benchmarks.clockify_standin и app.main:app (uvicorn, по процессу на каждый), затем
+гоняет смесь запросов к /api/v1/daily-timeline, /project-timeline и /projects с заданным
+параллелизмом. Отчет в JSON: пропускная способность, p50/p95/p99 задержки, доля ошибок по
+маршрутам и число запросов к Clockify на один запрос к сервису.
+
+    python -m benchmarks.loadtest --concurrency 32 --requests 2000 --mix daily=6,project=3,projects=1 \\
+        --output loadtest.json
+
+Настройки сервиса (кэши, пул, хранилище записей) передаются через окружение как обычно, например
+DAY_CACHE_ENABLED=false или ENTRY_STORE_ENABLED=true. С --app-url и --standin-url тест идет против
+уже запущенных процессов.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.synthetic import make_projects
+
+ROUTES = {
+    "daily": "/api/v1/daily-timeline",
+    "project": "/api/v1/project-timeline",
+    "projects": "/api/v1/projects"
+}
+
+STANDIN_USER_ID = "loadtest-user"
+
+
+@dataclass
+class LoadPlan:
+    mix: Dict[str, int]
+    data_start: date
+    data_days: int
+    period_days: int = 7
+    projects: int = 10
+    seed: int = 1
+
+    def requests(self, count: int) -> List[Tuple[str, str, Dict[str, str]]]:
+        """Заранее строит последовательность запросов (маршрут, путь, параметры) по смеси и seed"""
+        rng = random.Random(self.seed)
+        kinds = [kind for kind, weight in self.mix.items() for _ in range(weight)]
+        project_names = [project["name"] for project in make_projects(self.projects, self.seed)]
+        plan = []
+        for _ in range(count):
+            kind = rng.choice(kinds)
+            start = self.data_start + timedelta(days=rng.randrange(max(1, self.data_days - self.period_days)))
+            params = {"start_date": start.isoformat(), "end_date": (start + timedelta(days=self.period_days - 1)).isoformat()}
+            if kind == "project":
+                params["project"] = rng.choice(project_names)
+            elif kind == "projects":
+                params = {}
+            plan.append((kind, ROUTES[kind], params))
+        return plan
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """'daily=6,project=3,projects=1' -> веса маршрутов"""
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ROUTES:
+            raise ValueError(f"Unknown route '{kind}', expected one of: {', '.join(ROUTES)}")
+        mix[kind] = int(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Request mix must have at least one positive weight")
+    return mix
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    """Перцентиль по ближайшему рангу для уже отсортированных значений"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(share * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _latency_stats(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / count * 1000, 2) if count else 0.0,
+            "p50": round(percentile(values, 0.50) * 1000, 2),
+            "p95": round(percentile(values, 0.95) * 1000, 2),
+            "p99": round(percentile(values, 0.99) * 1000, 2),
+            "max": round(values[-1] * 1000, 2) if count else 0.0
+        }
+    }
+
+
+async def _standin_stats(standin: Optional[httpx.AsyncClient]) -> Optional[Dict[str, Any]]:
+    if standin is None:
+        return None
+    response = await standin.get("/standin/stats")
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_load(client: httpx.AsyncClient, requests: List[Tuple[str, str, Dict[str, str]]], concurrency: int,
+                   standin: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+    """Выполняет запросы concurrency воркерами и собирает отчет; standin - клиент к замене API для счетчиков"""
+    queue = iter(requests)
+    latencies: Dict[str, List[float]] = {kind: [] for kind, _, _ in requests}
+    errors: Dict[str, int] = {kind: 0 for kind in latencies}
+    statuses: Dict[str, int] = {}
+
+    async def worker():
+        for kind, path, params in queue:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies[kind].append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if not status.startswith("2"):
+                errors[kind] += 1
+
+    before = await _standin_stats(standin)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    after = await _standin_stats(standin)
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    report = {
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": _latency_stats(all_latencies, sum(errors.values()), elapsed),
+        "routes": {kind: _latency_stats(latencies[kind], errors[kind], elapsed) for kind in latencies},
+        "statuses": statuses,
+        "upstream": None
+    }
+    if before is not None and after is not None:
+        upstream_requests = after["requests"] - before["requests"]
+        report["upstream"] = {
+            "requests": upstream_requests,
+            "per_request": round(upstream_requests / len(all_latencies), 3) if all_latencies else 0.0,
+            "throttled": after["throttled"] - before["throttled"],
+            "server_errors": after["server_errors"] - before["server_errors"]
+        }
+    return report
+
+
+def _wait_ready(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready in {timeout} seconds")
+
+
+@contextmanager
+def _serve(module_app: str, port: int, env: Dict[str, str], ready_path: str, timeout: float) -> Iterator[str]:
+    """Запускает uvicorn с приложением в отдельном процессе и ждет готовности"""
+    url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", module_app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL  # В stdout идет только отчет
+    )
+    try:
+        _wait_ready(url + ready_path, timeout)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def _drive(args, plan: LoadPlan, app_url: str, standin_url: Optional[str]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        standin = httpx.AsyncClient(base_url=standin_url, timeout=args.timeout) if standin_url else None
+        try:
+            if args.warmup:
+                await run_load(client, plan.requests(args.warmup), args.concurrency)
+            return await run_load(client, plan.requests(args.requests), args.concurrency, standin)
+        finally:
+            if standin is not None:
+                await standin.aclose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the timeline API against a local Clockify stand-in")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50, help="Запросов до замера (не входят в отчет)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("daily=6,project=3,projects=1"))
+    parser.add_argument("--period-days", type=int, default=7)
+    parser.add_argument("--entries", type=int, default=20000, help="Записей в наборе замены API")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Задержка замены API")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--app-port", type=int, default=8090)
+    parser.add_argument("--standin-port", type=int, default=8091)
+    parser.add_argument("--app-url", help="Уже запущенный сервис (процессы не поднимаются)")
+    parser.add_argument("--standin-url", help="Уже запущенная замена API (для счетчиков запросов к Clockify)")
+    parser.add_argument("--output", help="Файл для JSON отчета (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    entries_per_day = 12
+    plan = LoadPlan(mix=args.mix, data_start=date(2024, 1, 1), data_days=max(1, args.entries // entries_per_day),
+                    period_days=args.period_days, seed=args.seed)
+    standin_env = {
+        "STANDIN_ENTRIES": str(args.entries),
+        "STANDIN_ENTRIES_PER_DAY": str(entries_per_day),
+        "STANDIN_USER_IDS": STANDIN_USER_ID,
+        "STANDIN_LATENCY_MS": str(args.latency_ms),
+        "STANDIN_JITTER_MS": str(args.jitter_ms),
+        "STANDIN_ERROR_RATE_429": str(args.error_rate_429),
+        "STANDIN_ERROR_RATE_5XX": str(args.error_rate_5xx),
+        "STANDIN_SEED": str(args.seed)
+    }
+
+    if args.app_url:
+        report = asyncio.run(_drive(args, plan, args.app_url, args.standin_url))
+    else:
+        with _serve("benchmarks.clockify_standin:app", args.standin_port, standin_env, "/standin/stats", args.timeout) as standin_url:
+            app_env = {
+                "CLOCKIFY_BASE_URL": f"{standin_url}/api/v1",
+                "CLOCKIFY_API_KEY": os.environ.get("CLOCKIFY_API_KEY", "loadtest-api-key"),
+                "CLOCKIFY_WORKSPACE_ID": os.environ.get("CLOCKIFY_WORKSPACE_ID", "loadtest-workspace"),
+                "CLOCKIFY_USER_ID": STANDIN_USER_ID,
+                "MAX_PERIOD_DAYS": str(max(args.period_days, 31))
+            }
+            with _serve("app.main:app", args.app_port, app_env, "/health", args.timeout) as app_url:
+                report = asyncio.run(_drive(args, plan, app_url, standin_url))
+
+    report["config"] = {
+        "mix": args.mix, "requests": args.requests, "warmup": args.warmup, "period_days": args.period_days,
+        "entries": args.entries, "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+        "error_rate_429": args.error_rate_429, "error_rate_5xx": args.error_rate_5xx, "seed": args.seed
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
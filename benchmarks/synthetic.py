@@ -0,0 +1,123 @@
+"""Синтетические данные Clockify для бенчмарков и нагрузочных тестов.
+
+Записи генерируются в том виде, в каком их отдает Clockify API (словари со всеми полями): рабочие дни
+с короткими перерывами, пересечениями, пустыми описаниями и вечерними сессиями через полночь.
+Один и тот же seed дает один и тот же набор данных.
+"""
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+WORKSPACE_ID = "workspace000000000000001"
+
+_WORDS = (
+    "review", "planning", "sync", "bugfix", "release", "design", "support", "ticket", "api", "timeline",
+    "refactor", "tests", "deploy", "docs", "meeting", "research", "client", "backend", "frontend", "metrics"
+)
+
+# Промежутки между записями подряд (сек): стык, короткие перерывы около границы объединения, обед
+_GAPS = (0, 0, 60, 120, 299, 300, 301, 900, 3600)
+
+
+def _object_id(prefix: str, index: int) -> str:
+    """Идентификатор в формате Clockify (24 hex-символа)"""
+    return f"{prefix}{index:0{24 - len(prefix)}x}"
+
+
+def _description(rng: random.Random, length: Tuple[int, int]) -> str:
+    target = rng.randint(*length)
+    words = []
+    while sum(len(word) + 1 for word in words) < target:
+        words.append(rng.choice(_WORDS))
+    return " ".join(words)[:max(target, 1)].capitalize()
+
+
+def make_projects(count: int = 10, seed: int = 1) -> List[Dict[str, Any]]:
+    """Активные проекты рабочего пространства в формате /projects"""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": _object_id("a0", index),
+            "name": f"Project {index:03d}",
+            "workspaceId": WORKSPACE_ID,
+            "billable": rng.random() < 0.5,
+            "color": "#%06x" % rng.randrange(0x1000000),
+            "archived": False,
+            "public": True,
+            "template": False
+        }
+        for index in range(count)
+    ]
+
+
+def make_users(count: int = 1) -> List[Dict[str, Any]]:
+    """Активные участники рабочего пространства в формате /users"""
+    return [
+        {"id": _object_id("b0", index), "name": f"User {index:03d}", "email": f"user{index}@example.com", "status": "ACTIVE"}
+        for index in range(count)
+    ]
+
+
+def generate_time_entries(total: int, users: int = 1, projects: int = 10, entries_per_day: int = 12,
+                          description_length: Tuple[int, int] = (10, 60), midnight_share: float = 0.02,
+                          start: date = date(2024, 1, 1), seed: int = 1,
+                          user_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Генерирует total завершенных записей, поровну на users пользователей.
+
+    Каждый пользователь работает entries_per_day записей в день подряд с небольшими перерывами;
+    доля midnight_share записей - вечерние сессии, переходящие через полночь (UTC). Описания берутся
+    из пула повторяющихся фраз длиной description_length символов, часть записей без описания
+    и без проекта. Результат упорядочен по пользователю и времени начала.
+    """
+    rng = random.Random(seed)
+    user_ids = user_ids or [user["id"] for user in make_users(users)]
+    project_ids = [project["id"] for project in make_projects(projects, seed)]
+    # Пул описаний: как в реальных данных, фразы повторяются
+    phrases = [_description(rng, description_length) for _ in range(max(20, total // 50))]
+
+    entries = []
+    per_user = [total // len(user_ids) + (1 if index < total % len(user_ids) else 0) for index in range(len(user_ids))]
+    for user_id, count in zip(user_ids, per_user):
+        day = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+        moment = day
+        made = 0
+        while made < count:
+            # День начинается утром, но не раньше конца ночной сессии накануне
+            moment = max(moment, day + timedelta(hours=6, minutes=rng.randrange(0, 180)))
+            for _ in range(min(entries_per_day, count - made)):
+                if rng.random() < midnight_share:
+                    # Вечерняя сессия: начало 21:00-23:30, длительность 1-5 часов
+                    moment = max(moment, day + timedelta(hours=21, minutes=rng.randrange(0, 150)))
+                    duration = timedelta(seconds=rng.randrange(3600, 5 * 3600))
+                else:
+                    duration = timedelta(seconds=rng.choice((180, 600, 1500, 2700, 3599, 5400, 7200)))
+                entry_start = moment
+                entry_end = entry_start + duration
+
+                entries.append({
+                    "id": _object_id("c", len(entries)),
+                    "description": rng.choice(phrases) if rng.random() < 0.85 else rng.choice(("", None)),
+                    "tagIds": None,
+                    "userId": user_id,
+                    "billable": rng.random() < 0.5,
+                    "taskId": None,
+                    "projectId": rng.choice(project_ids) if rng.random() < 0.95 else None,
+                    "workspaceId": WORKSPACE_ID,
+                    "timeInterval": {
+                        "start": entry_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "end": entry_end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "duration": f"PT{int(duration.total_seconds())}S"
+                    },
+                    "customFieldValues": [],
+                    "type": "REGULAR",
+                    "kioskId": None,
+                    "hourlyRate": None,
+                    "costRate": None,
+                    "isLocked": False
+                })
+                made += 1
+                # Иногда следующая запись начинается внутри предыдущей (правки вручную)
+                overlap = timedelta(seconds=rng.randrange(0, min(600, int(duration.total_seconds())))) if rng.random() < 0.05 else timedelta(0)
+                moment = entry_end + timedelta(seconds=rng.choice(_GAPS)) - overlap
+            day += timedelta(days=1)
+    return entries
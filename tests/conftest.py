@@ -12,6 +12,21 @@ def client():
     return TestClient(app)
 
 
+def make_entry(entry_id, start, end, project_id="project123", description=None):
+    """Завершенная запись пользователя user123 с заданным временем (UTC, как отдает Clockify)"""
+    return ClockifyTimeEntry(
+        id=entry_id,
+        description=description,
+        userId="user123",
+        billable=True,
+        projectId=project_id,
+        workspaceId="workspace123",
+        timeInterval={"start": start, "end": end},
+        type="REGULAR",
+        isLocked=False
+    )
+
+
 @pytest.fixture
 def mock_time_entries():
     """Mock time entries for testing"""
@@ -70,7 +85,7 @@ def mock_projects():
 def mock_timeline_service():
     """Mock timeline service for testing"""
     service = AsyncMock()
-    service.get_daily_timeline.return_value = {
+    service.get_daily_timeline_conditional.return_value = '"etag"', {
         "days": {
             "2024-10-01": {
                 "projects": {
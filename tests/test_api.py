@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
@@ -8,10 +9,10 @@ from app.schemas.clockify import ClockifyTimeEntry, ClockifyProject
 
 class TestAPIEndpoints:
     
-    @patch('app.services.timeline_service.TimelineService.get_daily_timeline')
+    @patch('app.services.timeline_service.TimelineService.get_daily_timeline_conditional')
     def test_daily_timeline_success(self, mock_get_timeline, client, mock_time_entries, mock_projects):
         # Mock the service response
-        mock_get_timeline.return_value = {
+        mock_get_timeline.return_value = '"etag"', {
             "days": {
                 "2024-10-01": {
                     "projects": {
@@ -51,6 +52,41 @@ class TestAPIEndpoints:
         assert "summary" in data
         assert "2024-10-01" in data["days"]
     
+    def test_daily_timeline_server_timing(self, client):
+        """Тест что фазы обработки и сериализация попадают в заголовок Server-Timing"""
+        from app.core.timing import phase
+
+        async def build(*args, **kwargs):
+            with phase("grouping"):
+                pass
+            return '"etag"', {"days": {}, "summary": {"period": "2024-10-01 to 2024-10-01", "active_days": 0,
+                                                    "total_time": "0h 0m", "project_totals": {}}}
+
+        with patch('app.services.timeline_service.TimelineService.get_daily_timeline_conditional', side_effect=build):
+            response = client.get("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01")
+
+        assert response.status_code == 200
+        names = [metric.split(";")[0] for metric in response.headers["server-timing"].split(", ")]
+        assert names == ["grouping", "serialization", "total"]
+    
+    @patch('app.services.timeline_service.TimelineService.get_daily_timeline_conditional')
+    def test_daily_timeline_not_modified(self, mock_get_timeline, client, mock_timeline_service):
+        """Тест ETag и ответа 304 на совпавший If-None-Match"""
+        mock_get_timeline.return_value = '"abc"', mock_timeline_service.get_daily_timeline_conditional.return_value[1]
+        url = "/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01"
+        
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"abc"'
+        assert response.headers["cache-control"] == "private, no-cache"
+        
+        mock_get_timeline.return_value = '"abc"', None
+        response = client.get(url, headers={"If-None-Match": 'W/"abc"'})
+        assert response.status_code == 304
+        assert response.headers["etag"] == '"abc"'
+        assert response.content == b""
+        assert mock_get_timeline.call_args.kwargs["if_none_match"] == {'"abc"'}
+    
     def test_daily_timeline_invalid_date_format(self, client):
         response = client.get("/api/v1/daily-timeline?start_date=invalid-date&end_date=2024-10-01")
         assert response.status_code == 400
@@ -112,6 +148,103 @@ class TestAPIEndpoints:
         data = response.json()
         assert data["detail"]["code"] == "PROJECT_NOT_FOUND"
     
+    @patch('app.services.timeline_service.TimelineService.get_daily_timeline_conditional')
+    def test_daily_timeline_merge_gap_param(self, mock_get_timeline, client, mock_timeline_service):
+        mock_get_timeline.return_value = mock_timeline_service.get_daily_timeline_conditional.return_value
+        
+        response = client.get("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01&merge_gap_minutes=15")
+        assert response.status_code == 200
+        assert mock_get_timeline.call_args.args[-1] == 15
+        
+        response = client.get("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01&merge_gap_minutes=-1")
+        assert response.status_code == 422
+    
+    @patch('app.services.timeline_service.TimelineService.get_daily_timeline_conditional')
+    def test_daily_timeline_upstream_unavailable(self, mock_get_timeline, client):
+        from app.services.clockify_client import ClockifyUnavailableError
+        mock_get_timeline.side_effect = ClockifyUnavailableError("Rate limit exceeded. Please try again later")
+        
+        response = client.get("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01")
+        assert response.status_code == 503
+        assert response.json()["detail"]["code"] == "UPSTREAM_UNAVAILABLE"
+    
+    @patch('app.services.timeline_service.TimelineService.get_daily_timeline_conditional')
+    def test_daily_timeline_model_serialized_once(self, mock_get_timeline, client, mock_timeline_service):
+        from app.schemas.response import DailyTimelineResponse
+        model = DailyTimelineResponse(**mock_timeline_service.get_daily_timeline_conditional.return_value[1])
+        mock_get_timeline.return_value = '"etag"', model
+        
+        # serialize_response - путь FastAPI с валидацией по response_model и jsonable_encoder
+        with patch('fastapi.routing.serialize_response') as serialize_response:
+            response = client.get("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == model.model_dump()
+        serialize_response.assert_not_called()
+    
+    @patch('app.services.timeline_service.TimelineService.stream_daily_timeline')
+    def test_daily_timeline_ndjson_stream(self, mock_stream, client):
+        from app.schemas.response import DailyTimelineDayLine, DailyTimelineSummaryLine, DayData, DailySummary
+        
+        async def lines(start_date, end_date, merge_gap_minutes=None):
+            yield DailyTimelineDayLine(date="2024-10-01", day=DayData(projects={}, day_total=0.0))
+            yield DailyTimelineSummaryLine(summary=DailySummary(
+                period="2024-10-01 to 2024-10-01", active_days=1, total_time="0h 0m", project_totals={}
+            ))
+        mock_stream.side_effect = lines
+        
+        for url, headers in [
+            ("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01&stream=ndjson", {}),
+            ("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01", {"Accept": "application/x-ndjson"})
+        ]:
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            
+            rows = [json.loads(row) for row in response.text.splitlines()]
+            assert [row["type"] for row in rows] == ["day", "summary"]
+            assert rows[0]["date"] == "2024-10-01"
+            assert rows[1]["summary"]["active_days"] == 1
+    
+    @patch('app.services.timeline_service.TimelineService.stream_daily_timeline')
+    def test_daily_timeline_ndjson_error_before_first_line(self, mock_stream, client):
+        from app.services.clockify_client import ClockifyUnavailableError
+        
+        async def lines(start_date, end_date, merge_gap_minutes=None):
+            raise ClockifyUnavailableError("Clockify API is currently unavailable")
+            yield
+        mock_stream.side_effect = lines
+        
+        response = client.get("/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01&stream=ndjson")
+        assert response.status_code == 503
+    
+    @patch('app.services.timeline_service.TimelineService.get_team_timeline')
+    def test_team_timeline_user_ids(self, mock_get_timeline, client):
+        mock_get_timeline.return_value = {
+            "users": {},
+            "errors": {"u2": "Clockify API is currently unavailable"},
+            "summary": {"period": "2024-10-01 to 2024-10-01", "users": 0, "failed_users": 1,
+                        "total_time": "0h 0m", "project_totals": {}}
+        }
+        
+        response = client.get("/api/v1/team-timeline?start_date=2024-10-01&end_date=2024-10-01&user_ids=u1, u2,u1")
+        assert response.status_code == 200
+        assert response.json()["errors"] == {"u2": "Clockify API is currently unavailable"}
+        assert mock_get_timeline.call_args.args[2] == ["u1", "u2"]
+        
+        response = client.get("/api/v1/team-timeline?start_date=2024-10-01&end_date=2024-10-01")
+        assert mock_get_timeline.call_args.args[2] is None
+        
+        response = client.get("/api/v1/team-timeline?start_date=2024-10-01&end_date=2024-10-01&user_ids=,")
+        assert response.status_code == 400
+        assert response.json()["detail"]["code"] == "INVALID_USER_IDS"
+        
+        with patch('app.routers.timeline.settings.team_max_users', 2):
+            response = client.get("/api/v1/team-timeline?start_date=2024-10-01&end_date=2024-10-01&user_ids=u1,u2,u3")
+        assert response.status_code == 400
+        assert response.json()["detail"]["message"] == "At most 2 users per request"
+    
     def test_list_projects_success(self, client):
         # Этот тест может падать если нет реальных проектов в Clockify
         # Поэтому просто проверяем что endpoint отвечает
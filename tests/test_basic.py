@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 from datetime import datetime, date
 from app.utils.time_formatter import (
     format_duration, 
@@ -7,9 +8,13 @@ from app.utils.time_formatter import (
     calculate_hours,
     format_time_only,
     merge_adjacent_blocks,
-    format_session_duration
+    format_session_duration,
+    split_date_range,
+    parse_clockify_times,
+    ClockifyTimeParser
 )
 from app.utils.validators import validate_date_range, validate_project_name
+from app.utils.single_flight import SingleFlight
 from app.services.timeline_service import TimelineService
 
 
@@ -38,6 +43,25 @@ class TestTimeFormatter:
         assert parsed_ms.hour == 9  # 06:55 UTC + 3 часа = 09:55 GMT+3
         assert parsed_ms.minute == 55
     
+    def test_parse_clockify_times_batch(self):
+        # Пакетный разбор совпадает с поштучным
+        values = ["2024-10-01T06:55:00Z", "2024-10-01T23:30:00.500Z", "2024-12-31T22:00:00Z"]
+        assert parse_clockify_times(values) == [parse_clockify_time(value) for value in values]
+        assert parse_clockify_times([]) == []
+    
+    def test_clockify_time_parser_offset(self):
+        parser = ClockifyTimeParser(-5)
+        parsed = parser.parse("2024-10-01T02:00:00Z")
+        assert parsed.date() == date(2024, 9, 30)
+        assert parsed.hour == 21
+        assert parser.parse_many(["2024-10-01T02:00:00Z"]) == [parsed]
+    
+    def test_parse_clockify_time_invalid(self):
+        with pytest.raises(ValueError, match="Invalid time format"):
+            parse_clockify_time("not-a-time")
+        with pytest.raises(ValueError, match="Invalid time format: bad"):
+            parse_clockify_times(["2024-10-01T06:55:00Z", "bad"])
+    
     def test_calculate_duration(self):
         start = datetime(2024, 10, 1, 10, 30)
         end = datetime(2024, 10, 1, 12, 15)
@@ -74,6 +98,18 @@ class TestTimeFormatter:
         merged = merge_adjacent_blocks(blocks)
         assert len(merged) == 2  # Первые два объединятся, третий останется отдельно
         assert merged[0][1] == datetime(2024, 10, 1, 11, 0)  # Конец объединенного блока
+    
+    def test_split_date_range(self):
+        # 10 дней окнами по 4 дня: 4 + 4 + 2
+        shards = split_date_range(date(2024, 10, 1), date(2024, 10, 10), 4)
+        assert shards == [
+            (date(2024, 10, 1), date(2024, 10, 4)),
+            (date(2024, 10, 5), date(2024, 10, 8)),
+            (date(2024, 10, 9), date(2024, 10, 10))
+        ]
+        
+        # Один день - одно окно
+        assert split_date_range(date(2024, 10, 1), date(2024, 10, 1), 7) == [(date(2024, 10, 1), date(2024, 10, 1))]
 
 
 class TestValidators:
@@ -111,6 +147,65 @@ class TestValidators:
         assert "long" in error
 
 
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        flights = SingleFlight()
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+        
+        results = await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+        
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert flights.get_stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+    
+    @pytest.mark.asyncio
+    async def test_different_keys_and_sequential_calls(self):
+        flights = SingleFlight()
+        
+        async def compute():
+            return 1
+        
+        await asyncio.gather(flights.do("a", compute), flights.do("b", compute))
+        await flights.do("a", compute)
+        
+        # Завершенный вызов не кэшируется: повторный запрос выполняется заново
+        assert flights.get_stats()["executed"] == 3
+        assert flights.get_stats()["coalesced"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_error_is_shared(self):
+        flights = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("Clockify API is currently unavailable")
+        
+        results = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+        
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flights.get_stats()["in_flight"] == 0
+
+
+class TestSettings:
+    def test_page_size_limit(self):
+        from pydantic import ValidationError
+        from app.core.config import Settings, CLOCKIFY_MAX_PAGE_SIZE
+        
+        base = dict(clockify_api_key="test_key_123456789", clockify_workspace_id="ws", clockify_user_id="user")
+        assert Settings(**base, clockify_page_size=CLOCKIFY_MAX_PAGE_SIZE).clockify_page_size == CLOCKIFY_MAX_PAGE_SIZE
+        
+        with pytest.raises(ValidationError):
+            Settings(**base, clockify_page_size=CLOCKIFY_MAX_PAGE_SIZE + 1)
+        with pytest.raises(ValidationError):
+            Settings(**base, clockify_page_size=0)
+
+
 class TestTimelineService:
     @pytest.fixture
     def timeline_service(self):
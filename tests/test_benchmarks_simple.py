@@ -0,0 +1,38 @@
+import pytest
+from app.schemas.clockify import full_time_entries_adapter
+from benchmarks.synthetic import generate_time_entries, make_users
+from benchmarks.bench_timeline import run_suite, compare
+
+
+class TestSyntheticData:
+
+    def test_deterministic_and_valid(self):
+        """Тест что набор воспроизводим по seed и проходит валидацию моделей Clockify"""
+        entries = generate_time_entries(500, users=3, midnight_share=0.1, seed=7)
+
+        assert entries == generate_time_entries(500, users=3, midnight_share=0.1, seed=7)
+        assert len(full_time_entries_adapter.validate_python(entries)) == 500
+        assert {entry["userId"] for entry in entries} == {user["id"] for user in make_users(3)}
+        # Вечерние сессии переходят через полночь
+        assert any(entry["timeInterval"]["start"][:10] != entry["timeInterval"]["end"][:10] for entry in entries)
+
+    def test_ordered_by_user_and_start(self):
+        entries = generate_time_entries(300, users=2)
+
+        keys = [(entry["userId"], entry["timeInterval"]["start"]) for entry in entries]
+        assert keys == sorted(keys)
+
+
+class TestTimelineBenchmark:
+
+    def test_suite_and_compare(self):
+        """Тест прогона этапов на маленьком наборе и поиска регрессий относительно baseline"""
+        report = run_suite([200], repeats=1)
+
+        for stage in ("group_by_days", "group_project_by_days", "merge_intervals",
+                      "daily_summary", "project_summary", "serialize_daily", "serialize_project"):
+            assert report["results"][stage]["200"] >= 0
+
+        baseline = {"results": {"group_by_days": {"200": report["results"]["group_by_days"]["200"] / 10}}}
+        rows = compare(report, baseline, threshold=1.25)
+        assert [(row["stage"], row["regression"]) for row in rows] == [("group_by_days", True)]
@@ -1,6 +1,37 @@
 import pytest
-from unittest.mock import patch, MagicMock
-from app.services.clockify_client import ClockifyClient
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+import httpx
+from datetime import date
+from app.services.clockify_client import ClockifyClient, ClockifyUnavailableError
+from app.services.rate_limiter import TokenBucket
+from app.schemas.clockify import ClockifyTimeEntry, ClockifyTimeEntrySlim
+
+
+def make_raw_entry(entry_id, start="2024-10-01T06:55:00Z", end="2024-10-01T07:55:00Z"):
+    """Сырая временная запись в формате Clockify API"""
+    return {
+        "id": entry_id,
+        "description": f"Task {entry_id}",
+        "userId": "test_user",
+        "billable": True,
+        "projectId": "project123",
+        "workspaceId": "test_workspace",
+        "timeInterval": {"start": start, "end": end, "duration": "PT1H"},
+        "type": "REGULAR",
+        "isLocked": False
+    }
+
+
+def make_paged_responder(total, page_size):
+    """Эмулирует постраничную выдачу Clockify API для total записей"""
+    entries = [make_raw_entry(str(i)) for i in range(total)]
+    
+    async def respond(method, endpoint, params=None, **kwargs):
+        page = params["page"]
+        return entries[(page - 1) * page_size:page * page_size]
+    
+    return respond
 
 
 class TestClockifyClientSimple:
@@ -11,6 +42,8 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_base_url = "https://api.clockify.me/api/v1"
             
             client = ClockifyClient()
             
@@ -26,6 +59,7 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
             
             client = ClockifyClient()
             
@@ -47,6 +81,8 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_base_url = "https://api.clockify.me/api/v1"
             
             client = ClockifyClient()
             
@@ -64,6 +100,7 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
             
             # Проверяем что клиент создается без ошибок
             client = ClockifyClient()
@@ -80,6 +117,7 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
             
             client = ClockifyClient()
             
@@ -93,6 +131,8 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_base_url = "https://api.clockify.me/api/v1"
+            mock_settings.http_timeout = 30.0
             
             client = ClockifyClient()
             
@@ -106,6 +146,8 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_base_url = "https://api.clockify.me/api/v1"
+            mock_settings.http_timeout = 30.0
             
             client = ClockifyClient()
             
@@ -119,6 +161,8 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_base_url = "https://api.clockify.me/api/v1"
+            mock_settings.http_timeout = 30.0
             
             client = ClockifyClient()
             
@@ -132,6 +176,8 @@ class TestClockifyClientSimple:
             mock_settings.clockify_api_key = "test_key_123456789"  # Длинный ключ для валидации
             mock_settings.clockify_workspace_id = "test_workspace"
             mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_base_url = "https://api.clockify.me/api/v1"
+            mock_settings.http_timeout = 30.0
             
             client = ClockifyClient()
             
@@ -139,6 +185,330 @@ class TestClockifyClientSimple:
             time_entries_url = f"{client.base_url}/workspaces/{client.workspace_id}/user/{client.user_id}/time-entries"
             assert time_entries_url == "https://api.clockify.me/api/v1/workspaces/test_workspace/user/test_user/time-entries"
 
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_single_page(self):
+        """Тест что неполная первая страница не вызывает дозагрузку"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_page_size = 10
+            mock_settings.clockify_request_concurrency = 3
+            mock_settings.http_max_connections = 20
+            mock_settings.time_entries_shard_days = 7
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=make_paged_responder(7, 10))
+            
+            entries = await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 1))
+            
+            assert len(entries) == 7
+            assert client._make_request.call_count == 1
+            params = client._make_request.call_args.kwargs["params"]
+            assert params["page"] == 1
+            assert params["page-size"] == 10
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_slim_and_full(self):
+        """Тест что по умолчанию записи урезаны до полей timeline, а full=True отдает полную модель"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_page_size = 10
+            mock_settings.clockify_request_concurrency = 3
+            mock_settings.http_max_connections = 20
+            mock_settings.time_entries_shard_days = 7
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=make_paged_responder(3, 10))
+            
+            slim = await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 1))
+            full = await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 1), full=True)
+            
+            assert type(slim[0]) is ClockifyTimeEntrySlim
+            assert not hasattr(slim[0], "userId")
+            assert slim[0].description == "Task 0"
+            assert slim[0].timeInterval["start"] == "2024-10-01T06:55:00Z"
+            assert isinstance(full[0], ClockifyTimeEntry)
+            assert full[0].userId == "test_user"
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_multiple_pages(self):
+        """Тест что все страницы загружаются и порядок записей сохраняется"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_page_size = 10
+            mock_settings.clockify_request_concurrency = 2
+            mock_settings.http_max_connections = 20
+            mock_settings.time_entries_shard_days = 7
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=make_paged_responder(45, 10))
+            
+            entries = await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 1))
+            
+            assert [entry.id for entry in entries] == [str(i) for i in range(45)]
+            # Страница 1, затем пачки (2, 3) и (4, 5)
+            assert client._make_request.call_count == 5
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_exact_page_boundary(self):
+        """Тест что при полной последней странице лишние пустые страницы не ломают результат"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_page_size = 10
+            mock_settings.clockify_request_concurrency = 4
+            mock_settings.http_max_connections = 20
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=make_paged_responder(20, 10))
+            
+            entries = [entry async for entry in client.iter_time_entries(date(2024, 10, 1), date(2024, 10, 1))]
+            
+            assert len(entries) == 20
+            # Страница 1, затем пачка (2, 3): страница 3 пустая, дальше не идем
+            assert client._make_request.call_count == 3
+
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_sharded_dedupe_and_order(self):
+        """Тест что окна запрашиваются отдельно, дубликаты убираются, порядок по времени"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_page_size = 100
+            mock_settings.clockify_request_concurrency = 2
+            mock_settings.http_max_connections = 20
+            mock_settings.time_entries_shard_days = 1
+            
+            by_day = {
+                "2024-10-01": [make_raw_entry("a", "2024-10-01T10:00:00Z", "2024-10-01T11:00:00Z"),
+                               make_raw_entry("edge", "2024-10-01T23:30:00Z", "2024-10-02T00:30:00Z")],
+                "2024-10-02": [make_raw_entry("b", "2024-10-02T09:00:00Z", "2024-10-02T10:00:00Z"),
+                               make_raw_entry("edge", "2024-10-01T23:30:00Z", "2024-10-02T00:30:00Z")],
+                "2024-10-03": [make_raw_entry("c", "2024-10-03T08:00:00Z", "2024-10-03T09:00:00Z")]
+            }
+            
+            async def respond(method, endpoint, params=None, **kwargs):
+                # Clockify отдает записи от новых к старым
+                return list(reversed(by_day[params["start"][:10]]))
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=respond)
+            
+            entries = await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 3))
+            
+            assert [entry.id for entry in entries] == ["a", "edge", "b", "c"]
+            assert client._make_request.call_count == 3
+
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_cancels_pages_after_short_page(self):
+        """Тест что после неполной страницы запросы к следующим страницам отменяются"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_page_size = 10
+            mock_settings.clockify_request_concurrency = 4
+            mock_settings.http_max_connections = 20
+            
+            entries = [make_raw_entry(str(i)) for i in range(35)]
+            finished_pages = []
+            
+            async def respond(method, endpoint, params=None, **kwargs):
+                page = params["page"]
+                # Дальние страницы отвечают медленнее
+                await asyncio.sleep(0.05 if page > 4 else 0)
+                finished_pages.append(page)
+                return entries[(page - 1) * 10:page * 10]
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=respond)
+            
+            result = [entry async for entry in client.iter_time_entries(date(2024, 10, 1), date(2024, 10, 1))]
+            
+            assert [entry.id for entry in result] == [str(i) for i in range(35)]
+            # Пачки (2, 3) и (4, 5, 6, 7): страница 4 неполная, 5-7 отменены до ответа
+            assert 5 not in finished_pages
+            assert max(finished_pages) == 4
+
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_shared_concurrency_budget(self):
+        """Тест что окна и страницы вместе не превышают общий лимит параллельных запросов"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_page_size = 2
+            mock_settings.clockify_request_concurrency = 3
+            mock_settings.http_max_connections = 20
+            mock_settings.time_entries_shard_days = 1
+            
+            in_flight = 0
+            max_in_flight = 0
+            
+            async def respond(method, endpoint, params=None, **kwargs):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                day = params["start"][:10]
+                page = params["page"]
+                # В каждом дне 5 записей - по 3 страницы на окно
+                ids = [f"{day}-{i}" for i in range(5)][(page - 1) * 2:page * 2]
+                return [make_raw_entry(entry_id, f"{day}T10:00:0{i}Z", f"{day}T11:00:00Z") for i, entry_id in enumerate(ids)]
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=respond)
+            
+            entries = await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 7))
+            
+            assert len(entries) == 35
+            assert max_in_flight <= 3
+    
+    @pytest.mark.asyncio
+    async def test_other_user_entries_and_workspace_users(self):
+        """Тест загрузки записей другого пользователя и постраничного списка участников"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_page_size = 2
+            mock_settings.clockify_request_concurrency = 3
+            mock_settings.http_max_connections = 20
+            mock_settings.time_entries_shard_days = 7
+            
+            members = [{"id": f"user{i}", "name": f"User {i}", "status": "ACTIVE"} for i in range(3)]
+            
+            async def respond(method, endpoint, params=None, **kwargs):
+                if endpoint.endswith("/users"):
+                    return members[(params["page"] - 1) * 2:params["page"] * 2]
+                return [make_raw_entry("1")]
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(side_effect=respond)
+            
+            await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 1), user_id="other_user")
+            assert client._make_request.call_args.args[1] == "/workspaces/test_workspace/user/other_user/time-entries"
+            
+            users = await client.get_workspace_users()
+            assert [user.id for user in users] == ["user0", "user1", "user2"]
+            assert client._make_request.call_args.kwargs["params"]["status"] == "ACTIVE"
+    
+    @pytest.mark.asyncio
+    async def test_get_time_entries_orders_by_parsed_time(self):
+        """Тест что порядок определяется временем, а не строкой (с микросекундами и без)"""
+        with patch('app.services.clockify_client.settings') as mock_settings:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.clockify_page_size = 100
+            mock_settings.clockify_request_concurrency = 2
+            mock_settings.http_max_connections = 20
+            mock_settings.time_entries_shard_days = 7
+            
+            raw = [
+                make_raw_entry("later", "2024-10-01T06:55:00.500Z", "2024-10-01T07:55:00Z"),
+                make_raw_entry("earlier", "2024-10-01T06:55:00Z", "2024-10-01T07:55:00Z")
+            ]
+            
+            client = ClockifyClient()
+            client._make_request = AsyncMock(return_value=raw)
+            
+            entries = await client.get_time_entries(date(2024, 10, 1), date(2024, 10, 1))
+            
+            assert [entry.id for entry in entries] == ["earlier", "later"]
+
+
+
+def make_response(status_code, json_data=None, headers=None):
+    return httpx.Response(status_code, json=json_data, headers=headers,
+                          request=httpx.Request("GET", "https://api.clockify.me/api/v1/test"))
+
+
+class TestClockifyClientRetries:
+    
+    @pytest.fixture
+    def client_with_responses(self):
+        """Клиент с подмененным HTTP клиентом, отдающим заданные ответы, и собственным лимитером.
+        
+        Возвращает (client, http_client, bucket, settings); настройки повторов можно менять в тесте.
+        """
+        with patch('app.services.clockify_client.settings') as mock_settings, \
+                patch('app.services.clockify_client.http_client_manager') as mock_manager, \
+                patch('app.services.clockify_client.upstream_rate_limiter', TokenBucket(rate=1000, capacity=1000)) as bucket:
+            mock_settings.clockify_api_key = "test_key_123456789"
+            mock_settings.clockify_workspace_id = "test_workspace"
+            mock_settings.clockify_user_id = "test_user"
+            mock_settings.http_timeout = 30.0
+            mock_settings.clockify_max_retries = 3
+            mock_settings.clockify_retry_base_delay = 0.001
+            mock_settings.clockify_retry_max_delay = 1.0
+            
+            def build(responses):
+                http_client = MagicMock()
+                http_client.request = AsyncMock(side_effect=responses)
+                mock_manager.get_client.return_value = http_client
+                return ClockifyClient(), http_client, bucket, mock_settings
+            
+            yield build
+    
+    @pytest.mark.asyncio
+    async def test_retry_after_429(self, client_with_responses):
+        """Тест что 429 повторяется с учетом Retry-After"""
+        client, http_client, bucket, _ = client_with_responses([
+            make_response(429, headers={"Retry-After": "0"}),
+            make_response(200, json_data={"ok": True})
+        ])
+        
+        result = await client._make_request("GET", "/test")
+        
+        assert result == {"ok": True}
+        assert http_client.request.call_count == 2
+        assert bucket.get_stats()["retries"] == 1
+        assert bucket.get_stats()["throttled"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_server_error_retries_exhausted(self, client_with_responses):
+        """Тест что после исчерпания повторов 5xx превращается в ClockifyUnavailableError"""
+        client, http_client, _, mock_settings = client_with_responses([make_response(503)] * 3)
+        mock_settings.clockify_max_retries = 2
+        
+        with pytest.raises(ClockifyUnavailableError):
+            await client._make_request("GET", "/test")
+        
+        assert http_client.request.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_long_retry_after_not_awaited(self, client_with_responses):
+        """Тест что Retry-After больше лимита не ждем и не блокируем им следующие запросы"""
+        client, http_client, _, mock_settings = client_with_responses([
+            make_response(429, headers={"Retry-After": "120"}),
+            make_response(200, json_data={"ok": True})
+        ])
+        mock_settings.clockify_retry_max_delay = 0.05
+        
+        with pytest.raises(ClockifyUnavailableError, match="Rate limit"):
+            await client._make_request("GET", "/test")
+        
+        assert http_client.request.call_count == 1
+        # Лимитер притормозил процесс не дольше CLOCKIFY_RETRY_MAX_DELAY, а не на 120 секунд
+        assert await asyncio.wait_for(client._make_request("GET", "/test"), timeout=1.0) == {"ok": True}
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,79 @@
+import pytest
+import httpx
+from datetime import date
+from unittest.mock import patch
+from app.core.config import settings
+from app.services.clockify_client import ClockifyClient
+from app.services.rate_limiter import TokenBucket
+from benchmarks.clockify_standin import StandinConfig, create_standin_app
+
+
+def standin_client(app):
+    """Настоящий ClockifyClient, направленный на локальную замену API через ASGI транспорт"""
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    patches = [
+        patch.object(settings, 'clockify_user_id', "standin_user"),
+        patch.object(settings, 'clockify_base_url', "http://standin/api/v1"),
+        patch.object(settings, 'clockify_page_size', 50),
+        patch.object(settings, 'time_entries_shard_days', 7),
+        patch.object(settings, 'clockify_max_retries', 10),
+        patch.object(settings, 'clockify_retry_base_delay', 0.001),
+        patch('app.services.clockify_client.http_client_manager.get_client', return_value=http_client),
+        patch('app.services.clockify_client.upstream_rate_limiter', TokenBucket(rate=10000, capacity=10000))
+    ]
+    return http_client, patches
+
+
+class TestClockifyStandin:
+    
+    @pytest.mark.asyncio
+    async def test_paginated_time_entries(self):
+        """Тест что клиент постранично забирает у замены API все записи периода"""
+        app = create_standin_app(StandinConfig(entries=300, user_ids=["standin_user"], midnight_share=0.1))
+        http_client, patches = standin_client(app)
+        
+        for active in patches:
+            active.start()
+        try:
+            client = ClockifyClient()
+            assert client.base_url == "http://standin/api/v1"
+            entries = await client.get_time_entries(date(2024, 1, 1), date(2024, 1, 31))
+            other = await client.get_time_entries(date(2024, 1, 1), date(2024, 1, 31), user_id="nobody")
+        finally:
+            for active in patches:
+                active.stop()
+            await http_client.aclose()
+        
+        assert len(entries) == 300
+        starts = [entry.timeInterval["start"] for entry in entries]
+        assert starts == sorted(starts)
+        assert other == []
+        assert app.state.stats.by_endpoint["time-entries"] > 5  # по несколько страниц на окно
+    
+    @pytest.mark.asyncio
+    async def test_injected_rate_limit_is_retried(self):
+        """Тест что 429 с Retry-After от замены API повторяются и запрос в итоге проходит"""
+        app = create_standin_app(StandinConfig(entries=10, error_rate_429=0.5, retry_after=0, seed=3))
+        http_client, patches = standin_client(app)
+        
+        for active in patches:
+            active.start()
+        try:
+            client = ClockifyClient()
+            for _ in range(5):
+                assert await client.test_connection()
+        finally:
+            for active in patches:
+                active.stop()
+            await http_client.aclose()
+        
+        stats = app.state.stats
+        assert stats.throttled > 0
+        assert stats.requests == stats.throttled + 5
+    
+    def test_base_url_setting_validated(self):
+        from app.core.config import Settings
+        
+        assert Settings(clockify_base_url="http://127.0.0.1:8081/api/v1/").clockify_base_url == "http://127.0.0.1:8081/api/v1"
+        with pytest.raises(ValueError):
+            Settings(clockify_base_url="127.0.0.1:8081")
@@ -0,0 +1,116 @@
+import pytest
+import random
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock
+from app.core.config import settings
+from app.schemas.clockify import ClockifyTimeEntry
+from app.services import columnar_timeline
+from app.services.timeline_service import TimelineService
+
+
+def make_entries(count, seed=42):
+    """Случайные записи: короткие промежутки, пересечения, записи через полночь, пустые описания и неизвестные проекты"""
+    rng = random.Random(seed)
+    moment = datetime(2024, 3, 1, 5, 0, tzinfo=timezone.utc)
+    entries = []
+    for index in range(count):
+        moment += timedelta(seconds=rng.choice([0, 60, 180, 300, 301, 900, 7200, 50000]))
+        duration = timedelta(seconds=rng.choice([180, 540, 1800, 3599, 5400, 10800, 100000]))
+        entries.append(ClockifyTimeEntry(
+            id=str(index),
+            description=rng.choice(["Review", "Calls", "", None, "Design"]),
+            userId="user123",
+            billable=True,
+            projectId=rng.choice(["p1", "p2", "p3", None, "archived"]),
+            workspaceId="workspace123",
+            timeInterval={
+                "start": moment.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "end": (moment + duration).strftime("%Y-%m-%dT%H:%M:%SZ")
+            },
+            type="REGULAR",
+            isLocked=False
+        ))
+    # Clockify может вернуть записи не по порядку, а активная запись без end пропускается
+    rng.shuffle(entries)
+    entries.append(ClockifyTimeEntry(
+        id="running", userId="user123", billable=True, workspaceId="workspace123",
+        timeInterval={"start": "2024-03-02T10:00:00Z"}, type="REGULAR", isLocked=False
+    ))
+    return entries
+
+
+PROJECT_MAP = {"p1": "Alpha", "p2": "Beta", "p3": "Gamma"}
+
+
+class TestColumnarTimelineSimple:
+    
+    @pytest.mark.asyncio
+    async def test_matches_python_engine(self):
+        """Тест что векторная группировка совпадает с обычной, включая порядок дней и проектов"""
+        pytest.importorskip("numpy")
+        entries = make_entries(2000)
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch.object(settings, 'day_cache_enabled', False), \
+                patch.object(settings, 'timeline_engine', 'python'):
+            mock_client_class.return_value.project_catalog.get_project_names = AsyncMock(return_value=PROJECT_MAP)
+            expected = await TimelineService()._group_by_days(entries)
+        
+        result = columnar_timeline.group_by_days(entries, PROJECT_MAP, settings.timezone_offset, settings.merge_gap_minutes)
+        
+        assert list(result) == list(expected)
+        for day_key in expected:
+            assert list(result[day_key].projects) == list(expected[day_key].projects)
+        assert result == expected
+    
+    def test_date_range_drops_outside_slices(self):
+        """Тест что куски записей через полночь вне периода отбрасываются"""
+        pytest.importorskip("numpy")
+        entry = ClockifyTimeEntry(
+            id="1", description="Release", userId="u", billable=True, projectId="p1", workspaceId="w",
+            timeInterval={"start": "2024-10-01T19:00:00Z", "end": "2024-10-02T00:00:00Z"}, type="REGULAR", isLocked=False
+        )
+        
+        result = columnar_timeline.group_by_days([entry], PROJECT_MAP, 3, settings.merge_gap_minutes,
+                                                 date_range=(date(2024, 10, 1), date(2024, 10, 1)))
+        
+        assert list(result) == ["2024-10-01"]
+        assert result["2024-10-01"].day_total == 2.0
+        assert columnar_timeline.group_by_days([entry], PROJECT_MAP, 3, settings.merge_gap_minutes,
+                                               date_range=(date(2024, 10, 3), date(2024, 10, 4))) == {}
+        
+    def test_empty_entries(self):
+        """Тест пустого списка записей"""
+        pytest.importorskip("numpy")
+        assert columnar_timeline.group_by_days([], PROJECT_MAP, 3, settings.merge_gap_minutes) == {}
+    
+    @pytest.mark.asyncio
+    async def test_service_uses_selected_engine(self):
+        """Тест что TIMELINE_ENGINE=numpy переключает группировку сервиса"""
+        pytest.importorskip("numpy")
+        entries = make_entries(50)
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch.object(settings, 'timeline_engine', 'numpy'), \
+                patch('app.services.timeline_service.columnar_timeline.group_by_days', wraps=columnar_timeline.group_by_days) as engine:
+            mock_client_class.return_value.project_catalog.get_project_names = AsyncMock(return_value=PROJECT_MAP)
+            await TimelineService()._group_by_days(entries)
+            
+            engine.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_without_numpy(self):
+        """Тест что без numpy сервис работает на обычной группировке"""
+        entries = make_entries(20)
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch.object(settings, 'timeline_engine', 'numpy'), \
+                patch.object(columnar_timeline, 'np', None):
+            mock_client_class.return_value.project_catalog.get_project_names = AsyncMock(return_value=PROJECT_MAP)
+            result = await TimelineService()._group_by_days(entries)
+        
+        assert result
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
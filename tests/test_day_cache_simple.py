@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.services.day_cache import DayResultCache
+from app.services.timeline_service import TimelineService
+from tests.conftest import make_entry
+
+
+@pytest.fixture
+def service():
+    with patch('app.services.timeline_service.ClockifyClient') as mock_client_class:
+        client = mock_client_class.return_value
+        client.workspace_id = "workspace123"
+        client.user_id = "user123"
+        client.project_catalog.get_project_names = AsyncMock(return_value={"project123": "Test Project"})
+        yield TimelineService()
+
+
+@pytest.fixture
+def cache():
+    cache = DayResultCache(max_entries=100)
+    with patch('app.services.timeline_service.day_result_cache', cache):
+        yield cache
+
+
+class TestDayResultCache:
+    
+    def test_lru_eviction(self):
+        """Тест вытеснения самых давно использованных дней"""
+        cache = DayResultCache(max_entries=2)
+        cache.put("a", 1, "A")
+        cache.put("b", 1, "B")
+        assert cache.get("a", 1) == "A"  # "a" становится самым свежим
+        cache.put("c", 1, "C")
+        
+        assert cache.get("b", 1) is None
+        assert cache.get("a", 1) == "A"
+        assert cache.get_stats()["evictions"] == 1
+    
+    def test_fingerprint_mismatch_is_miss(self):
+        """Тест что измененные записи дня дают промах"""
+        cache = DayResultCache(max_entries=2)
+        cache.put("a", 1, "A")
+        
+        assert cache.get("a", 2) is None
+        assert cache.get_stats()["stale"] == 1
+        assert cache.get_stats()["size"] == 0
+
+
+class TestTimelineDayCaching:
+    
+    @pytest.mark.asyncio
+    async def test_closed_day_served_from_cache(self, service, cache):
+        """Тест что закрытый день считается один раз"""
+        entries = [make_entry("1", "2024-10-01T06:55:00Z", "2024-10-01T07:55:00Z")]
+        
+        first = await service._group_by_days(entries)
+        second = await service._group_by_days(entries)
+        
+        assert second["2024-10-01"] is first["2024-10-01"]
+        assert cache.get_stats()["hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_edited_closed_day_recomputed(self, service, cache):
+        """Тест что правка записи закрытого дня пересчитывает день"""
+        await service._group_by_days([make_entry("1", "2024-10-01T06:55:00Z", "2024-10-01T07:55:00Z")])
+        result = await service._group_by_days([make_entry("1", "2024-10-01T06:55:00Z", "2024-10-01T08:55:00Z")])
+        
+        assert result["2024-10-01"].day_total == 2.0
+        assert cache.get_stats()["stale"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_today_not_cached(self, service, cache):
+        """Тест что сегодняшний день всегда пересчитывается"""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        start = (now - timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        end = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+        
+        await service._group_by_days([make_entry("1", start, end)])
+        await service._group_by_days([make_entry("1", start, end)])
+        
+        assert cache.get_stats()["size"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_project_days_cached(self, service, cache):
+        """Тест кэширования дней временной шкалы проекта"""
+        project = MagicMock()
+        project.id = "project123"
+        service.clockify_client.project_catalog.get_by_name = AsyncMock(return_value=project)
+        entries = [make_entry("1", "2024-10-01T06:55:00Z", "2024-10-01T07:55:00Z")]
+        
+        first = await service._group_project_by_days(entries, "Test Project")
+        second = await service._group_project_by_days(entries, "Test Project")
+        
+        assert second["2024-10-01"] is first["2024-10-01"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,130 @@
+import pytest
+import asyncio
+from datetime import date
+from app.services.entry_store import TimeEntryStore
+from tests.conftest import make_entry
+
+
+class FakeClient:
+    """Клиент Clockify, отдающий записи из списка и запоминающий запрошенные окна"""
+    
+    def __init__(self, entries):
+        self.workspace_id = "workspace123"
+        self.user_id = "user123"
+        self.entries = entries
+        self.windows = []
+    
+    async def get_time_entries(self, start_date, end_date):
+        self.windows.append((start_date, end_date))
+        return [
+            entry for entry in self.entries
+            if start_date.isoformat() <= entry.timeInterval["start"][:10] <= end_date.isoformat()
+        ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TimeEntryStore(str(tmp_path / "entries.db"), lookback_days=2)
+    store._today = lambda: date(2024, 10, 20)
+    yield store
+    store.close()
+
+
+class TestTimeEntryStoreSimple:
+    
+    @pytest.mark.asyncio
+    async def test_first_sync_fetches_whole_range(self, store):
+        """Тест что первый запрос загружает весь период и отдает записи по порядку"""
+        client = FakeClient([
+            make_entry("2", "2024-10-02T10:00:00Z", "2024-10-02T11:00:00Z"),
+            make_entry("1", "2024-10-01T10:00:00Z", "2024-10-01T11:00:00Z")
+        ])
+        
+        entries = await store.get_time_entries(client, date(2024, 10, 1), date(2024, 10, 5))
+        
+        assert [entry.id for entry in entries] == ["1", "2"]
+        assert client.windows == [(date(2024, 10, 1), date(2024, 10, 5))]
+    
+    @pytest.mark.asyncio
+    async def test_repeated_query_fetches_only_lookback(self, store):
+        """Тест что повторный запрос загружает только период после watermark с look-back"""
+        client = FakeClient([make_entry("1", "2024-10-01T10:00:00Z", "2024-10-01T11:00:00Z")])
+        
+        await store.get_time_entries(client, date(2024, 10, 1), date(2024, 10, 15))
+        client.windows.clear()
+        
+        entries = await store.get_time_entries(client, date(2024, 10, 1), date(2024, 10, 15))
+        
+        assert [entry.id for entry in entries] == ["1"]
+        # watermark 15 октября минус 2 дня look-back
+        assert client.windows == [(date(2024, 10, 13), date(2024, 10, 15))]
+    
+    @pytest.mark.asyncio
+    async def test_backfill_before_covered_range(self, store):
+        """Тест что более ранний период догружается отдельным окном"""
+        client = FakeClient([
+            make_entry("old", "2024-09-20T10:00:00Z", "2024-09-20T11:00:00Z"),
+            make_entry("new", "2024-10-05T10:00:00Z", "2024-10-05T11:00:00Z")
+        ])
+        
+        await store.get_time_entries(client, date(2024, 10, 1), date(2024, 10, 10))
+        client.windows.clear()
+        
+        entries = await store.get_time_entries(client, date(2024, 9, 15), date(2024, 10, 3))
+        
+        assert [entry.id for entry in entries] == ["old"]
+        assert client.windows == [(date(2024, 9, 15), date(2024, 9, 30))]
+    
+    @pytest.mark.asyncio
+    async def test_deleted_and_edited_entries_refreshed(self, store):
+        """Тест что в окне look-back удаленные записи пропадают, а измененные обновляются"""
+        client = FakeClient([
+            make_entry("keep", "2024-10-19T10:00:00Z", "2024-10-19T11:00:00Z"),
+            make_entry("gone", "2024-10-19T12:00:00Z", "2024-10-19T13:00:00Z")
+        ])
+        await store.get_time_entries(client, date(2024, 10, 15), date(2024, 10, 20))
+        
+        client.entries = [make_entry("keep", "2024-10-19T10:00:00Z", "2024-10-19T12:00:00Z")]
+        entries = await store.get_time_entries(client, date(2024, 10, 15), date(2024, 10, 20))
+        
+        assert [entry.id for entry in entries] == ["keep"]
+        assert entries[0].timeInterval["end"] == "2024-10-19T12:00:00Z"
+    
+    @pytest.mark.asyncio
+    async def test_disjoint_range_starts_new_coverage(self, store):
+        """Тест что непересекающийся период загружается целиком"""
+        client = FakeClient([])
+        
+        await store.get_time_entries(client, date(2024, 1, 1), date(2024, 1, 10))
+        client.windows.clear()
+        await store.get_time_entries(client, date(2024, 10, 1), date(2024, 10, 10))
+        
+        assert client.windows == [(date(2024, 10, 1), date(2024, 10, 10))]
+        assert store.get_stats()["syncs"] == 2
+
+    
+    @pytest.mark.asyncio
+    async def test_slow_window_does_not_block_other_syncs(self, store):
+        """Тест что долгий запрос к API не держит другие синхронизации, а одинаковое окно грузится один раз"""
+        client = FakeClient([make_entry("1", "2024-10-01T10:00:00Z", "2024-10-01T11:00:00Z")])
+        release = asyncio.Event()
+        fetch = client.get_time_entries
+        
+        async def get_time_entries(start_date, end_date):
+            if start_date == date(2024, 1, 1):
+                await release.wait()
+            return await fetch(start_date, end_date)
+        
+        client.get_time_entries = get_time_entries
+        slow = [asyncio.ensure_future(store.get_time_entries(client, date(2024, 1, 1), date(2024, 1, 10))) for _ in range(2)]
+        
+        entries = await asyncio.wait_for(store.get_time_entries(client, date(2024, 10, 1), date(2024, 10, 5)), 1)
+        release.set()
+        await asyncio.gather(*slow)
+        
+        assert [entry.id for entry in entries] == ["1"]
+        assert client.windows.count((date(2024, 1, 1), date(2024, 1, 10))) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,52 @@
+import pytest
+import asyncio
+from app.services.http_client import HttpClientManager
+
+
+class TestHttpClientManagerSimple:
+    
+    def test_client_is_reused(self):
+        """Тест что клиент создается один раз и переиспользуется"""
+        manager = HttpClientManager()
+        
+        first = manager.get_client()
+        second = manager.get_client()
+        
+        assert first is second
+        assert "gzip" in first.headers["Accept-Encoding"]
+        asyncio.run(manager.close())
+    
+    def test_close_resets_client(self):
+        """Тест что после закрытия создается новый клиент"""
+        manager = HttpClientManager()
+        
+        first = manager.get_client()
+        asyncio.run(manager.close())
+        
+        assert first.is_closed
+        assert manager.get_client() is not first
+        asyncio.run(manager.close())
+    
+    def test_pool_stats_before_start(self):
+        """Тест статистики пула до создания клиента"""
+        manager = HttpClientManager()
+        
+        stats = manager.get_pool_stats()
+        assert stats["connections"] == 0
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 0
+        assert stats["waits"] == 0
+    
+    def test_pool_stats_after_start(self):
+        """Тест статистики пула после создания клиента"""
+        manager = HttpClientManager()
+        asyncio.run(manager.start())
+        
+        stats = manager.get_pool_stats()
+        assert set(stats) == {"connections", "in_use", "idle", "in_flight", "requests_total", "waits"}
+        assert stats["requests_total"] == 0
+        asyncio.run(manager.close())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
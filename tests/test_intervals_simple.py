@@ -0,0 +1,112 @@
+import pytest
+from datetime import datetime
+from app.utils.intervals import (
+    DescriptionTable, Interval, merge_intervals, merge_blocks, sweep_merge,
+    split_at_midnight, day_key, format_clock, format_hms, NO_DESCRIPTION
+)
+
+
+class TestDescriptionTable:
+    
+    def test_intern_reuses_ids(self):
+        table = DescriptionTable()
+        
+        first = table.intern("Review")
+        assert table.intern("Calls") != first
+        assert table.intern("Review") == first
+        assert table.text(first) == "Review"
+    
+    def test_empty_description(self):
+        table = DescriptionTable()
+        
+        assert table.intern(None) == NO_DESCRIPTION
+        assert table.intern("") == NO_DESCRIPTION
+        assert table.text(NO_DESCRIPTION) is None
+        assert table.join([]) is None
+
+
+class TestMergeIntervals:
+    
+    def test_merge_with_descriptions(self):
+        table = DescriptionTable()
+        intervals = [
+            Interval(3600, 5400, table.intern("Task 1")),
+            Interval(5520, 7200, table.intern("Task 2")),  # gap 2 мин
+            Interval(7800, 9000, table.intern("Task 3"))   # gap 10 мин
+        ]
+        
+        merged = merge_intervals(intervals, 300)
+        
+        assert [(block.start, block.end) for block in merged] == [(3600, 7200), (7800, 9000)]
+        assert table.join(merged[0].description_ids) == "Task 1, Task 2"
+        assert table.join(merged[1].description_ids) == "Task 3"
+    
+    def test_unsorted_and_nested(self):
+        table = DescriptionTable()
+        intervals = [
+            Interval(5000, 5100),
+            Interval(1000, 6000, table.intern("Long")),
+            Interval(2000, 3000)  # внутри предыдущего
+        ]
+        
+        merged = merge_intervals(intervals, 0)
+        
+        assert len(merged) == 1
+        assert (merged[0].start, merged[0].end, merged[0].seconds) == (1000, 6000, 5000)
+        assert table.join(merged[0].description_ids) == "Long"
+    
+    def test_empty(self):
+        assert merge_intervals([], 300) == []
+    
+    def test_gap_and_dedupe(self):
+        starts, ends, labels = [0, 400, 1000], [300, 900, 1200], ["Review", "Review", None]
+        
+        assert len(sweep_merge(starts, ends, labels, 0)) == 3
+        merged = sweep_merge(starts, ends, labels, 100)
+        assert [(block.start, block.end) for block in merged] == [(0, 1200)]
+        assert merged[0].description_ids == ["Review", "Review"]
+        assert sweep_merge(starts, ends, labels, 100, dedupe=True)[0].description_ids == ["Review"]
+    
+    def test_merge_blocks_tuples(self):
+        blocks = [
+            (datetime(2024, 1, 1, 11, 0), datetime(2024, 1, 1, 12, 0), "Calls"),
+            (datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 1, 10, 0), "Task"),
+            (datetime(2024, 1, 1, 10, 3), datetime(2024, 1, 1, 10, 30), "")
+        ]
+        
+        assert merge_blocks(blocks, 5) == [
+            (datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 1, 10, 30), "Task"),
+            (datetime(2024, 1, 1, 11, 0), datetime(2024, 1, 1, 12, 0), "Calls")
+        ]
+        assert len(merge_blocks(blocks, 30)) == 1
+        assert merge_blocks(blocks, 30)[0][2] == "Task, Calls"
+
+
+class TestSplitAtMidnight:
+    
+    def test_within_day(self):
+        assert list(split_at_midnight(3600, 7200)) == [(3600, 7200)]
+        assert list(split_at_midnight(79200, 86400)) == [(79200, 86400)]  # конец ровно в полночь
+    
+    def test_across_days(self):
+        # 22:00 первого дня - 03:00 третьего
+        assert split_at_midnight(79200, 2 * 86400 + 10800) == [
+            (79200, 86400), (86400, 2 * 86400), (2 * 86400, 2 * 86400 + 10800)
+        ]
+
+
+class TestEpochFormatting:
+    
+    def test_day_key(self):
+        assert day_key(0) == "1970-01-01"
+        assert day_key(1727740800 + 86399) == "2024-10-01"
+        assert day_key(1727740800 + 86400) == "2024-10-02"
+    
+    def test_format_clock_and_hms(self):
+        assert format_clock(1727740800 + 9 * 3600 + 55 * 60) == "09:55"
+        assert format_hms(3600 + 125) == "01:02:05"
+        assert format_hms(30 * 3600) == "30:00:00"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
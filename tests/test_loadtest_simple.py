@@ -0,0 +1,58 @@
+import pytest
+import httpx
+from datetime import date
+from fastapi import FastAPI, Response
+from benchmarks.clockify_standin import StandinConfig, create_standin_app
+from benchmarks.loadtest import LoadPlan, parse_mix, percentile, run_load
+
+
+class TestLoadTest:
+    
+    def test_parse_mix_and_plan(self):
+        mix = parse_mix("daily=3,projects=1")
+        assert mix == {"daily": 3, "projects": 1}
+        with pytest.raises(ValueError):
+            parse_mix("weekly=1")
+        
+        requests = LoadPlan(mix=mix, data_start=date(2024, 1, 1), data_days=30).requests(50)
+        assert requests == LoadPlan(mix=mix, data_start=date(2024, 1, 1), data_days=30).requests(50)
+        assert {kind for kind, _, _ in requests} == {"daily", "projects"}
+        daily_params = next(params for kind, _, params in requests if kind == "daily")
+        assert (date.fromisoformat(daily_params["end_date"]) - date.fromisoformat(daily_params["start_date"])).days == 6
+    
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+        
+        assert percentile(values, 0.50) == 50.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile([], 0.95) == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_run_load_report(self):
+        """Тест отчета: задержки и ошибки по маршрутам, запросы к замене API на один запрос"""
+        standin_app = create_standin_app(StandinConfig(entries=10))
+        standin = httpx.AsyncClient(transport=httpx.ASGITransport(app=standin_app), base_url="http://standin")
+        app = FastAPI()
+        
+        @app.get("/api/v1/daily-timeline")
+        async def daily():
+            # Каждый запрос к сервису - два запроса к Clockify
+            for _ in range(2):
+                await standin.get("/api/v1/workspaces/ws", headers={"X-Api-Key": "key"})
+            return {"days": {}}
+        
+        @app.get("/api/v1/projects")
+        async def projects():
+            return Response(status_code=500)
+        
+        requests = LoadPlan(mix={"daily": 1, "projects": 1}, data_start=date(2024, 1, 1), data_days=30).requests(40)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+            report = await run_load(client, requests, concurrency=4, standin=standin)
+        await standin.aclose()
+        
+        daily_count = sum(1 for kind, _, _ in requests if kind == "daily")
+        assert report["overall"]["requests"] == 40
+        assert report["routes"]["daily"]["errors"] == 0
+        assert report["routes"]["projects"]["error_rate"] == 1.0
+        assert report["upstream"]["requests"] == 2 * daily_count
+        assert report["overall"]["latency_ms"]["p50"] <= report["overall"]["latency_ms"]["p99"]
@@ -1,6 +1,8 @@
 import pytest
+from unittest.mock import patch, AsyncMock
 from fastapi.testclient import TestClient
 from app.main import app
+from app.routers.timeline import get_timeline_service
 
 
 class TestMainAppSimple:
@@ -27,6 +29,66 @@ class TestMainAppSimple:
         assert data["status"] == "healthy"
         assert data["service"] == "clockify-agent"
     
+    def test_stats_endpoint(self, client):
+        """Тест endpoint статистики"""
+        response = client.get("/stats")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert "http_pool" in data
+        assert "in_use" in data["http_pool"]
+        assert "idle" in data["http_pool"]
+        assert "waits" in data["http_pool"]
+        assert "project_catalog" in data
+        assert "coalesced" in data["timeline_coalescing"]
+    
+    def test_stats_endpoint_requires_admin_token(self, client):
+        """Тест что при заданном ADMIN_TOKEN статистика закрыта"""
+        with patch('app.core.security.settings') as mock_settings:
+            mock_settings.admin_token = "secret-token"
+            
+            assert client.get("/stats").status_code == 403
+            assert client.get("/stats", headers={"X-Admin-Token": "wrong"}).status_code == 403
+            
+            response = client.get("/stats", headers={"X-Admin-Token": "secret-token"})
+            assert response.status_code == 200
+            assert "http_pool" in response.json()
+    
+    def test_metrics_endpoint(self, client):
+        """Тест что /metrics отдает латентность по шаблону маршрута и счетчики кэшей"""
+        client.get("/health")
+        client.get("/no-such-path")
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert '# TYPE clockify_agent_request_duration_seconds histogram' in body
+        assert 'clockify_agent_requests_total{method="GET",route="/health",status="200"}' in body
+        assert 'route="unmatched",status="404"' in body
+        assert "clockify_agent_day_cache_hits_total" in body
+        assert "clockify_agent_timeline_requests_coalesced_total" in body
+    
+    def test_metrics_endpoint_requires_admin_token(self, client):
+        """Тест что /metrics закрыт тем же ADMIN_TOKEN, что и /stats"""
+        with patch('app.core.security.settings') as mock_settings:
+            mock_settings.admin_token = "secret-token"
+            
+            assert client.get("/metrics").status_code == 403
+            assert client.get("/metrics", headers={"X-Admin-Token": "secret-token"}).status_code == 200
+    
+    def test_timeline_service_is_shared(self):
+        """Тест что сервис временной шкалы создается один раз на процесс"""
+        assert get_timeline_service() is get_timeline_service()
+    
+    def test_lifespan_warm_up(self):
+        """Тест что при старте приложения выполняется прогрев сервиса"""
+        with patch('app.services.timeline_service.TimelineService.warm_up', new_callable=AsyncMock) as mock_warm_up:
+            with TestClient(app) as client:
+                assert client.get("/health").status_code == 200
+            
+            mock_warm_up.assert_awaited_once()
+    
     def test_docs_endpoint(self, client):
         """Тест Swagger UI endpoint"""
         response = client.get("/docs")
@@ -61,6 +123,15 @@ class TestMainAppSimple:
         assert "get" in paths["/api/v1/project-timeline"]
         assert "get" in paths["/api/v1/projects"]
     
+    def test_timeline_response_schemas_documented(self, client):
+        """Тест что без response_model схемы ответов timeline остаются в OpenAPI"""
+        paths = client.get("/openapi.json").json()["paths"]
+        
+        daily = paths["/api/v1/daily-timeline"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        project = paths["/api/v1/project-timeline"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert daily["$ref"].endswith("/DailyTimelineResponse")
+        assert project["$ref"].endswith("/ProjectTimelineResponse")
+    
     def test_app_info(self, client):
         """Тест информации о приложении"""
         response = client.get("/openapi.json")
@@ -0,0 +1,52 @@
+import pytest
+from app.core.metrics import MetricsRegistry
+from app.services.clockify_client import _endpoint_label
+
+
+class TestMetricsRegistry:
+
+    def test_counter_and_histogram_rendering(self):
+        """Тест текстового формата: кумулятивные корзины, sum/count и экранирование меток"""
+        registry = MetricsRegistry()
+        requests = registry.counter("test_requests_total", "Requests", ("route",))
+        latency = registry.histogram("test_latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+
+        requests.labels('/a"b').inc()
+        requests.labels('/a"b').inc(2)
+        for value in (0.05, 0.5, 5.0):
+            latency.labels("/x").observe(value)
+
+        lines = registry.render().splitlines()
+        assert "# TYPE test_requests_total counter" in lines
+        assert 'test_requests_total{route="/a\\"b"} 3' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="1"} 2' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+        assert 'test_latency_seconds_sum{route="/x"} 5.55' in lines
+        assert 'test_latency_seconds_count{route="/x"} 3' in lines
+
+    def test_timer_and_label_count(self):
+        registry = MetricsRegistry()
+        phase = registry.histogram("test_phase_seconds", "Phase", ("phase",))
+
+        with phase.labels("grouping").time():
+            pass
+
+        assert phase.labels("grouping").count == 1
+        with pytest.raises(ValueError):
+            phase.labels("grouping", "extra")
+
+    def test_collectors(self):
+        """Тест что коллекторы вызываются при каждом сборе"""
+        registry = MetricsRegistry()
+        hits = [0]
+        registry.register_collector(lambda: [("test_cache_hits_total", "counter", "Hits", [({"cache": "day"}, hits[0])])])
+
+        hits[0] = 7
+        assert 'test_cache_hits_total{cache="day"} 7' in registry.render()
+
+    def test_upstream_endpoint_label(self):
+        """Тест что метка endpoint Clockify не содержит ID"""
+        assert _endpoint_label("/workspaces/ws1") == "workspace"
+        assert _endpoint_label("/workspaces/ws1/projects") == "projects"
+        assert _endpoint_label("/workspaces/ws1/user/u1/time-entries") == "time-entries"
@@ -0,0 +1,125 @@
+import marshal
+import pytest
+from contextlib import contextmanager
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.profiling import RequestProfiler, StackSampler
+
+DAILY_URL = "/api/v1/daily-timeline?start_date=2024-10-01&end_date=2024-10-01"
+
+EMPTY_TIMELINE = {
+    "days": {},
+    "summary": {"period": "2024-10-01 to 2024-10-01", "active_days": 0, "total_time": "0h 0m", "project_totals": {}}
+}
+
+
+ADMIN_TOKEN = "secret-token"
+ADMIN_HEADERS = {"X-Admin-Token": ADMIN_TOKEN}
+
+
+def _profiling_settings(output_dir=None, admin_token=ADMIN_TOKEN):
+    mock_settings = MagicMock()
+    mock_settings.profiling_enabled = True
+    mock_settings.profiling_output_dir = output_dir
+    mock_settings.profiling_sample_interval_ms = 1.0
+    mock_settings.admin_token = admin_token
+    return mock_settings
+
+
+@contextmanager
+def profiling_enabled(output_dir=None):
+    """Включает профилирование и задает ADMIN_TOKEN для проверки заголовка"""
+    with patch('app.core.profiling.settings', _profiling_settings(output_dir)), \
+         patch('app.core.security.settings') as security_settings:
+        security_settings.admin_token = ADMIN_TOKEN
+        yield
+
+
+class TestRequestProfiling:
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.fixture(autouse=True)
+    def timeline(self):
+        with patch('app.services.timeline_service.TimelineService.get_daily_timeline_conditional',
+                   return_value=('"etag"', EMPTY_TIMELINE)):
+            yield
+
+    def test_without_flag_returns_timeline(self, client):
+        response = client.get(DAILY_URL)
+
+        assert response.status_code == 200
+        assert response.json()["summary"]["active_days"] == 0
+
+    def test_disabled_by_default(self, client):
+        """Тест что без PROFILING_ENABLED флаг профилирования отклоняется"""
+        response = client.get(DAILY_URL + "&profile=pstats")
+
+        assert response.status_code == 403
+        assert response.json()["detail"]["code"] == "PROFILING_DISABLED"
+
+    def test_requires_admin_token(self, client):
+        with profiling_enabled():
+            assert client.get(DAILY_URL, headers={"X-Profile": "pstats"}).status_code == 403
+            response = client.get(DAILY_URL, headers={"X-Profile": "pstats", **ADMIN_HEADERS})
+            assert response.status_code == 200
+
+    def test_refused_without_configured_admin_token(self, client):
+        """Тест что без ADMIN_TOKEN профилирование недоступно, даже если оно включено"""
+        with patch('app.core.profiling.settings', _profiling_settings(admin_token=None)):
+            response = client.get(DAILY_URL + "&profile=pstats")
+
+        assert response.status_code == 403
+        assert response.json()["detail"]["code"] == "ADMIN_TOKEN_NOT_CONFIGURED"
+
+    def test_pstats_download(self, client):
+        """Тест что профиль cProfile отдается файлом вместо ответа"""
+        with profiling_enabled():
+            response = client.get(DAILY_URL + "&profile=pstats", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert 'filename="daily-timeline-' in response.headers["content-disposition"]
+        stats = marshal.loads(response.content)
+        assert any(function == "render" for _, _, function in stats)
+
+    def test_invalid_header_format(self, client):
+        with profiling_enabled():
+            response = client.get(DAILY_URL, headers={"X-Profile": "flamegraph", **ADMIN_HEADERS})
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["code"] == "INVALID_PROFILE_FORMAT"
+
+    def test_collapsed_written_to_directory(self, client, tmp_path):
+        """Тест что с PROFILING_OUTPUT_DIR профиль пишется в файл, а ответ остается обычным"""
+        with profiling_enabled(str(tmp_path)):
+            response = client.get(DAILY_URL + "&profile=collapsed", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        assert response.json()["summary"]["active_days"] == 0
+        filename = response.headers["x-profile-file"]
+        assert filename.endswith(".collapsed")
+        assert (tmp_path / filename).exists()
+
+
+class TestStackSampler:
+
+    def test_collapsed_format(self):
+        """Тест что стеки записываются от корня к листу со счетчиком"""
+        sampler = StackSampler(thread_id=0, interval=0.001)
+        sampler.stacks["main (app.py:1);work (app.py:5)"] += 3
+
+        assert sampler.collapsed() == b"main (app.py:1);work (app.py:5) 3\n"
+
+    def test_inactive_profiler_is_noop(self):
+        profiler = RequestProfiler()
+        response = MagicMock()
+
+        with profiler:
+            pass
+
+        assert profiler.artifact is None
+        assert profiler.response(response) is response
@@ -0,0 +1,142 @@
+import pytest
+import asyncio
+from unittest.mock import patch, AsyncMock
+from app.services.project_catalog import ProjectCatalog, get_project_catalog_stats
+from app.services.timeline_service import TimelineService
+from app.services.clockify_client import ClockifyClient
+from app.schemas.clockify import ClockifyProject
+
+
+def make_project(project_id, name):
+    return ClockifyProject(
+        id=project_id,
+        name=name,
+        workspaceId="workspace123",
+        billable=True,
+        color="#FF0000",
+        archived=False,
+        public=True,
+        template=False
+    )
+
+
+class CountingLoader:
+    """Загрузчик проектов, считающий обращения к API"""
+    
+    def __init__(self, projects, delay=0.01):
+        self.projects = projects
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.projects
+
+
+class TestProjectCatalogSimple:
+    
+    @pytest.mark.asyncio
+    async def test_lookups(self):
+        """Тест индексов по id и названию"""
+        loader = CountingLoader([make_project("p1", "Job"), make_project("p2", "Study")])
+        catalog = ProjectCatalog(loader, ttl_minutes=5)
+        
+        assert (await catalog.get_by_name("Study")).id == "p2"
+        assert await catalog.get_by_name("Missing") is None
+        assert dict(await catalog.get_project_names()) == {"p1": "Job", "p2": "Study"}
+        assert len(await catalog.get_projects()) == 2
+        assert loader.calls == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_refresh(self):
+        """Тест что конкурентные вызовы ждут одно обновление"""
+        loader = CountingLoader([make_project("p1", "Job")])
+        catalog = ProjectCatalog(loader, ttl_minutes=5)
+        
+        results = await asyncio.gather(*(catalog.get_by_name("Job") for _ in range(10)))
+        
+        assert all(project.id == "p1" for project in results)
+        assert loader.calls == 1
+        assert catalog.get_stats()["refreshes"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_refresh_after_ttl(self):
+        """Тест обновления каталога после истечения TTL"""
+        # Без задержки: подмененные часы останавливают и таймеры event loop
+        loader = CountingLoader([make_project("p1", "Job")], delay=0)
+        catalog = ProjectCatalog(loader, ttl_minutes=1)
+        
+        with patch('app.services.project_catalog.time.monotonic', return_value=1000.0):
+            await catalog.get_projects()
+            await catalog.get_projects()
+        assert loader.calls == 1
+        
+        with patch('app.services.project_catalog.time.monotonic', return_value=1061.0):
+            await catalog.get_projects()
+        assert loader.calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        """Тест принудительного устаревания каталога"""
+        loader = CountingLoader([make_project("p1", "Job")])
+        catalog = ProjectCatalog(loader, ttl_minutes=5)
+        
+        await catalog.get_projects()
+        catalog.invalidate()
+        await catalog.get_projects()
+        
+        assert loader.calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_failed_refresh_is_retried(self):
+        """Тест что ошибка загрузки не оставляет каталог в зависшем состоянии"""
+        calls = []
+        
+        async def failing_loader():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError("Clockify API is currently unavailable")
+            return [make_project("p1", "Job")]
+        
+        catalog = ProjectCatalog(failing_loader, ttl_minutes=5)
+        
+        with pytest.raises(ValueError):
+            await catalog.get_projects()
+        
+        assert len(await catalog.get_projects()) == 1
+
+    
+    @pytest.mark.asyncio
+    async def test_project_names_are_read_only(self):
+        """Тест что общий маппинг нельзя испортить снаружи"""
+        catalog = ProjectCatalog(CountingLoader([make_project("p1", "Job")]), ttl_minutes=5)
+        
+        names = await catalog.get_project_names()
+        with pytest.raises(TypeError):
+            names["p1"] = "Broken"
+        
+        assert (await catalog.get_project_names())["p1"] == "Job"
+    
+    @pytest.mark.asyncio
+    async def test_catalog_shared_between_services(self):
+        """Тест что разные экземпляры TimelineService используют одно обновление каталога"""
+        loader = AsyncMock(return_value=[make_project("p1", "Job")])
+        
+        with patch('app.services.project_catalog._catalogs', {}), \
+                patch.object(ClockifyClient, 'get_projects', loader):
+            first = TimelineService()
+            second = TimelineService()
+            
+            assert first.clockify_client.project_catalog is second.clockify_client.project_catalog
+            assert (await first.clockify_client.get_project_by_name("Job")).id == "p1"
+            assert (await second.clockify_client.get_project_by_name("Job")).id == "p1"
+            assert loader.call_count == 1
+            
+            stats = get_project_catalog_stats()
+            assert stats[first.clockify_client.workspace_id]["refreshes"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
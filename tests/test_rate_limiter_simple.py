@@ -0,0 +1,61 @@
+import pytest
+import asyncio
+import time
+from app.services.rate_limiter import TokenBucket
+
+
+class TestTokenBucketSimple:
+    
+    @pytest.mark.asyncio
+    async def test_burst_without_waiting(self):
+        """Тест что запросы в пределах burst не ждут"""
+        bucket = TokenBucket(rate=10, capacity=5)
+        
+        waits = [await bucket.acquire() for _ in range(5)]
+        
+        assert max(waits) < 0.01
+        assert bucket.get_stats()["queued"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_waits_when_budget_exhausted(self):
+        """Тест что после исчерпания бюджета запросы ждут пополнения"""
+        bucket = TokenBucket(rate=100, capacity=1)
+        
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+        
+        # 3 токена пополняются за ~30 мс
+        assert time.monotonic() - started >= 0.025
+        stats = bucket.get_stats()
+        assert stats["acquired"] == 4
+        assert stats["queued"] >= 1
+        assert stats["max_wait_seconds"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_fifo_order(self):
+        """Тест что ожидающие обслуживаются в порядке очереди"""
+        bucket = TokenBucket(rate=200, capacity=1)
+        order = []
+        
+        async def worker(index):
+            await bucket.acquire()
+            order.append(index)
+        
+        await asyncio.gather(*(worker(i) for i in range(5)))
+        
+        assert order == [0, 1, 2, 3, 4]
+    
+    @pytest.mark.asyncio
+    async def test_throttle_blocks_all(self):
+        """Тест что после 429 выдача токенов приостанавливается"""
+        bucket = TokenBucket(rate=1000, capacity=10)
+        bucket.throttle(0.03)
+        
+        waited = await bucket.acquire()
+        
+        assert waited >= 0.025
+        assert bucket.get_stats()["throttled"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
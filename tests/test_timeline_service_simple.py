@@ -1,7 +1,11 @@
 import pytest
-from unittest.mock import patch, MagicMock
-from datetime import date, datetime
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+from datetime import date, datetime, timedelta
+from app.core.config import settings
 from app.services.timeline_service import TimelineService
+from tests.conftest import make_entry
+from app.utils.etag import parse_if_none_match
 
 
 class TestTimelineServiceSimple:
@@ -135,14 +139,14 @@ class TestTimelineServiceSimple:
             service = TimelineService()
             
             # Проверяем что основные методы существуют
-            assert hasattr(service, 'get_daily_timeline')
+            assert hasattr(service, 'get_daily_timeline_conditional')
             assert hasattr(service, 'get_project_timeline')
             assert hasattr(service, '_merge_adjacent_blocks_with_descriptions')
             assert hasattr(service, '_calculate_daily_summary')
             assert hasattr(service, '_calculate_project_summary')
             
             # Проверяем что методы являются callable
-            assert callable(service.get_daily_timeline)
+            assert callable(service.get_daily_timeline_conditional)
             assert callable(service.get_project_timeline)
             assert callable(service._merge_adjacent_blocks_with_descriptions)
             assert callable(service._calculate_daily_summary)
@@ -164,6 +168,260 @@ class TestTimelineServiceSimple:
             assert hasattr(mock_client, 'get_projects')
             assert hasattr(mock_client, 'get_project_by_name')
 
+    
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_requests_coalesced(self):
+        """Тест что одинаковые конкурентные запросы выполняются один раз"""
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class:
+            mock_client_class.return_value.workspace_id = "workspace123"
+            mock_client_class.return_value.user_id = "user123"
+            service = TimelineService()
+            fetches = []
+            builds = []
+            
+            async def fetch(start_date, end_date, request_key):
+                fetches.append((start_date, end_date))
+                await asyncio.sleep(0.01)
+                return [], f'"{end_date}"'
+            
+            async def build(start_date, end_date, gap_minutes, entries):
+                builds.append((start_date, end_date))
+                await asyncio.sleep(0.01)
+                return {"days": {}}
+            
+            service._fetch_entries_with_etag = fetch
+            service._build_daily_timeline = build
+            
+            results = await asyncio.gather(
+                *(service.get_daily_timeline_conditional(date(2024, 1, 1), date(2024, 1, 7)) for _ in range(5)),
+                service.get_daily_timeline_conditional(date(2024, 1, 1), date(2024, 1, 8))
+            )
+            
+            assert len(fetches) == 2
+            assert len(builds) == 2
+            assert results[0][1] is results[4][1]
+
+    
+    @pytest.mark.asyncio
+    async def test_warm_up(self):
+        """Тест прогрева: проверка соединения и загрузка каталога проектов"""
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class:
+            client = mock_client_class.return_value
+            client.test_connection = AsyncMock(return_value=True)
+            client.project_catalog.get_projects = AsyncMock(return_value=[])
+            
+            await TimelineService().warm_up()
+            
+            client.test_connection.assert_awaited_once()
+            client.project_catalog.get_projects.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_tolerates_catalog_failure(self):
+        """Тест что ошибка загрузки каталога не ломает старт"""
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class:
+            client = mock_client_class.return_value
+            client.test_connection = AsyncMock(return_value=False)
+            client.project_catalog.get_projects = AsyncMock(side_effect=ValueError("Failed to connect to Clockify API"))
+            
+            await TimelineService().warm_up()
+
+    
+    @pytest.mark.asyncio
+    async def test_stream_daily_timeline_matches_full_response(self):
+        """Тест что поток отдает те же дни и сводку, что и обычный ответ"""
+        shard_entries = {
+            date(2024, 10, 1): [
+                make_entry("1", "2024-10-01T08:00:00Z", "2024-10-01T09:00:00Z", description="Morning"),
+                # 22:00 UTC - уже 2 октября по локальному времени (UTC+3)
+                make_entry("2", "2024-10-01T22:00:00Z", "2024-10-01T23:00:00Z", description="Night")
+            ],
+            date(2024, 10, 2): [
+                # Запись на границе окон приходит и во второе окно
+                make_entry("2", "2024-10-01T22:00:00Z", "2024-10-01T23:00:00Z", description="Night"),
+                make_entry("3", "2024-10-02T09:00:00Z", "2024-10-02T10:30:00Z", project_id="other")
+            ],
+            date(2024, 10, 3): []
+        }
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch('app.services.timeline_service.settings') as mock_settings:
+            mock_settings.time_entries_shard_days = 1
+            mock_settings.timezone_offset = 3
+            mock_settings.day_cache_enabled = False
+            mock_settings.day_cache_closed_after_days = 1
+            client = mock_client_class.return_value
+            client.project_catalog.get_project_names = AsyncMock(return_value={"project123": "Test Project"})
+            
+            service = TimelineService()
+            fetched = []
+            
+            async def fetch(start_date, end_date):
+                fetched.append((start_date, end_date))
+                if start_date == end_date:
+                    return shard_entries[start_date]
+                return list({entry.id: entry for day in sorted(shard_entries) for entry in shard_entries[day]}.values())
+            
+            service._fetch_entries = fetch
+            
+            lines = [line async for line in service.stream_daily_timeline(date(2024, 10, 1), date(2024, 10, 3))]
+            full = await service._build_daily_timeline(date(2024, 10, 1), date(2024, 10, 3))
+            
+            assert [line.type for line in lines] == ["day", "day", "summary"]
+            assert [line.date for line in lines[:-1]] == ["2024-10-01", "2024-10-02"]
+            assert {line.date: line.day for line in lines[:-1]} == full.days
+            assert lines[-1].summary == full.summary
+            # Окна загружаются по одному, весь период - только для полного ответа
+            assert fetched[:3] == [(date(2024, 10, day), date(2024, 10, day)) for day in (1, 2, 3)]
+
+    
+    @pytest.mark.asyncio
+    async def test_entry_across_midnight_split_between_days(self):
+        """Тест что запись 22:00-03:00 делится между днями, а не целиком уходит в первый"""
+        entries = [make_entry("1", "2024-10-01T19:00:00Z", "2024-10-02T00:00:00Z", description="Release")]
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch.object(settings, 'timezone_offset', 3), \
+                patch.object(settings, 'day_cache_enabled', False), \
+                patch.object(settings, 'timeline_engine', 'python'):
+            client = mock_client_class.return_value
+            client.project_catalog.get_project_names = AsyncMock(return_value={"project123": "Test Project"})
+            client.project_catalog.get_by_name = AsyncMock(return_value=MagicMock(id="project123"))
+            service = TimelineService()
+            
+            days = await service._group_by_days(entries)
+            project_days = await service._group_project_by_days(entries, "Test Project")
+        
+        assert list(days) == ["2024-10-01", "2024-10-02"]
+        first, second = (days[day].projects["Test Project"] for day in days)
+        assert (first.time_blocks[0].start_time, first.time_blocks[0].end_time, first.total_hours) == ("22:00", "00:00", 2.0)
+        assert (second.time_blocks[0].start_time, second.time_blocks[0].end_time, second.total_hours) == ("00:00", "03:00", 3.0)
+        assert second.time_blocks[0].description == "Release"
+        assert {day: data.total_hours for day, data in project_days.items()} == {"2024-10-01": 2.0, "2024-10-02": 3.0}
+
+
+    @pytest.mark.asyncio
+    async def test_midnight_slice_outside_range_dropped(self):
+        """Тест что кусок записи 22:00-03:00 после конца периода не попадает в ответ и сводку"""
+        entries = [make_entry("1", "2024-10-01T19:00:00Z", "2024-10-02T00:00:00Z", description="Release")]
+        period = (date(2024, 10, 1), date(2024, 10, 1))
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch('app.services.timeline_service.get_entry_store', return_value=None), \
+                patch.object(settings, 'timezone_offset', 3), \
+                patch.object(settings, 'day_cache_enabled', False), \
+                patch.object(settings, 'timeline_engine', 'python'):
+            client = mock_client_class.return_value
+            client.project_catalog.get_project_names = AsyncMock(return_value={"project123": "Test Project"})
+            client.project_catalog.get_by_name = AsyncMock(return_value=MagicMock(id="project123"))
+            client.get_project_by_name = AsyncMock(return_value=MagicMock(id="project123"))
+            client.get_time_entries = AsyncMock(return_value=entries)
+            service = TimelineService()
+        
+            daily = await service._build_daily_timeline(*period)
+            project = await service._build_project_timeline(*period, "Test Project")
+            lines = [line async for line in service.stream_daily_timeline(*period)]
+        
+        assert list(daily.days) == ["2024-10-01"]
+        assert daily.days["2024-10-01"].day_total == 2.0
+        assert (daily.summary.active_days, daily.summary.total_time) == (1, "2h 0m")
+        assert list(project.days) == ["2024-10-01"]
+        assert project.summary.active_days == 1
+        assert [line.date for line in lines[:-1]] == ["2024-10-01"]
+        assert lines[-1].summary == daily.summary
+
+    
+    @pytest.mark.asyncio
+    async def test_team_timeline_partial_results(self):
+        """Тест командной шкалы: общий семафор на всех пользователей и частичный ответ при ошибке"""
+        from app.services.clockify_client import ClockifyUnavailableError
+        entries = {
+            "alice": [make_entry("1", "2024-10-01T06:00:00Z", "2024-10-01T08:00:00Z", description="Review")],
+            "bob": [make_entry("2", "2024-10-01T07:00:00Z", "2024-10-01T08:00:00Z", project_id="other")]
+        }
+        semaphores = set()
+        
+        async def get_time_entries(start_date, end_date, user_id=None, semaphore=None):
+            semaphores.add(semaphore)
+            if user_id == "carol":
+                raise ClockifyUnavailableError("Clockify API is currently unavailable")
+            return entries[user_id]
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch.object(settings, 'timezone_offset', 3), \
+                patch.object(settings, 'day_cache_enabled', False), \
+                patch.object(settings, 'timeline_engine', 'python'):
+            client = mock_client_class.return_value
+            client.project_catalog.get_project_names = AsyncMock(return_value={"project123": "Test Project"})
+            client.get_time_entries = AsyncMock(side_effect=get_time_entries)
+            service = TimelineService()
+            
+            result = await service._build_team_timeline(date(2024, 10, 1), date(2024, 10, 1), ["alice", "bob", "carol"], 5)
+            
+            assert list(result.users) == ["alice", "bob"]
+            assert result.errors == {"carol": "Clockify API is currently unavailable"}
+            assert result.users["alice"].days["2024-10-01"].projects["Test Project"].total_hours == 2.0
+            assert "Unnamed" in result.users["bob"].days["2024-10-01"].projects
+            assert (result.summary.users, result.summary.failed_users, result.summary.total_time) == (2, 1, "3h 0m")
+            assert len(semaphores) == 1
+            
+            # Если не удалось получить никого - ошибка пробрасывается
+            with pytest.raises(ClockifyUnavailableError):
+                await service._build_team_timeline(date(2024, 10, 1), date(2024, 10, 1), ["carol"], 5)
+            
+            # Без списка берутся все участники, и лимит TEAM_MAX_USERS действует на них
+            client.get_workspace_users = AsyncMock(return_value=[MagicMock(id=f"user{index}") for index in range(3)])
+            with patch.object(settings, 'team_max_users', 2), pytest.raises(ValueError, match="Too many users"):
+                await service._build_team_timeline(date(2024, 10, 1), date(2024, 10, 1), None, 5)
+
+    
+    @pytest.mark.asyncio
+    async def test_daily_timeline_etag_skips_build(self):
+        """Тест что при совпавшем If-None-Match ответ не строится, а правка записи меняет ETag"""
+        entries = [make_entry("1", "2024-10-01T08:00:00Z", "2024-10-01T09:00:00Z", description="Morning")]
+        
+        with patch('app.services.timeline_service.ClockifyClient') as mock_client_class, \
+                patch.object(settings, 'day_cache_enabled', False), \
+                patch.object(settings, 'timeline_engine', 'python'):
+            client = mock_client_class.return_value
+            client.workspace_id = "workspace123"
+            client.user_id = "user123"
+            client.project_catalog.get_project_names = AsyncMock(return_value={"project123": "Test Project"})
+            service = TimelineService()
+            service._fetch_entries = AsyncMock(side_effect=lambda start_date, end_date: list(entries))
+            
+            etag, response = await service.get_daily_timeline_conditional(date(2024, 10, 1), date(2024, 10, 1))
+            assert response.summary.total_time == "1h 0m"
+            
+            with patch.object(service, '_build_daily_timeline') as build:
+                assert await service.get_daily_timeline_conditional(
+                    date(2024, 10, 1), date(2024, 10, 1), if_none_match=frozenset({etag})
+                ) == (etag, None)
+                build.assert_not_called()
+            
+            # Другой промежуток объединения - другой ответ и другой ETag
+            other_gap, _ = await service.get_daily_timeline_conditional(date(2024, 10, 1), date(2024, 10, 1), 30)
+            entries[0] = make_entry("1", "2024-10-01T08:00:00Z", "2024-10-01T09:00:00Z", description="Edited")
+            edited, response = await service.get_daily_timeline_conditional(
+                date(2024, 10, 1), date(2024, 10, 1), if_none_match=frozenset({etag})
+            )
+            assert len({etag, other_gap, edited}) == 3
+            assert response is not None
+    
+    def test_parse_if_none_match(self):
+        assert parse_if_none_match(None) == frozenset()
+        assert parse_if_none_match('"a", W/"b"') == {'"a"', '"b"'}
+        assert parse_if_none_match("*") == {"*"}
+    
+    def test_cache_control_for_closed_period(self):
+        """Тест что для периода из закрытых дней используются отдельные директивы"""
+        with patch('app.services.timeline_service.ClockifyClient'), \
+                patch.object(settings, 'timeline_cache_control', "private, no-cache"), \
+                patch.object(settings, 'timeline_cache_control_closed', "public, max-age=86400"):
+            service = TimelineService()
+            
+            assert service.cache_control(date(2020, 1, 31)) == "public, max-age=86400"
+            assert service.cache_control(date.today() + timedelta(days=1)) == "private, no-cache"
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from app.core.timing import PhaseTimer, phase, current_timer, _current_timer
+
+
+class TestPhaseTimer:
+
+    def test_server_timing_header(self):
+        """Тест формата Server-Timing: повторные фазы суммируются, total в конце"""
+        timer = PhaseTimer()
+        timer.add("fetch", 0.010)
+        timer.add("parse", 0.002)
+        timer.add("parse", 0.003)
+
+        assert timer.server_timing(0.020) == "fetch;dur=10.00, parse;dur=5.00, total;dur=20.00"
+        assert timer.log_fields() == {"fetch_ms": 10.0, "parse_ms": 5.0}
+
+    def test_phase_without_request(self):
+        """Тест что вне запроса фаза только пишет метрику"""
+        assert current_timer() is None
+        with phase("grouping"):
+            pass
+
+    @pytest.mark.asyncio
+    async def test_phase_in_child_task(self):
+        """Тест что задачи, созданные внутри запроса, пишут в его таймер"""
+        timer = PhaseTimer()
+        token = _current_timer.set(timer)
+        try:
+            async def work():
+                with phase("fetch"):
+                    await asyncio.sleep(0)
+
+            await asyncio.gather(asyncio.ensure_future(work()), asyncio.ensure_future(work()))
+        finally:
+            _current_timer.reset(token)
+
+        assert list(timer.phases) == ["fetch"]
+        assert timer.phases["fetch"] > 0